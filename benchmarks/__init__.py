@@ -0,0 +1 @@
+"""ConnectCore micro-benchmarks (run with ``python -m benchmarks.<name>``)."""
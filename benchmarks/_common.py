@@ -0,0 +1,43 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Iterable, List
+
+CHAT_PACKET: Dict[str, Any] = {
+    "type": "data_send",
+    "status": None,
+    "sid": 1024,
+    "to": ["all", "chat_relay"],
+    "from": ["k3J9a", "chat_relay"],
+    "payload": {
+        "player": "Steve",
+        "server": "survival",
+        "message": "anyone up for the ender dragon tonight?",
+        "dimension": "minecraft:overworld",
+    },
+    "timestamp": 1760000000.123456,
+    "checksum": "0" * 64,
+}
+
+
+def per_call_us(func: Callable[[], Any], iterations: int = 5000) -> float:
+    """Return the average CPU time of *func* in microseconds."""
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations * 1_000_000
+
+
+def print_table(headers: List[str], rows: Iterable[Iterable[Any]]) -> None:
+    rows = [[str(cell) for cell in row] for row in rows]
+    widths = [
+        max(len(header), *(len(row[index]) for row in rows))
+        for index, header in enumerate(headers)
+    ]
+    print("  ".join(header.ljust(width) for header, width in zip(headers, widths)))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,65 @@
+"""Frames, bytes and CPU for a burst of small packets: one frame each vs one batch.
+
+Seals a burst of chat-sized ``data_send`` packets the way a connection with
+``batch_v1`` does: the per-packet run encrypts every packet into its own
+envelope, the batched run joins the serialized packets into one JSON array and
+encrypts that once. Both ciphers are measured because the saving is mostly the
+fixed per-frame cost (Fernet's HMAC and base64, or the GCM tag and nonce).
+
+Usage::
+
+    python -m benchmarks.bench_batching
+"""
+
+from __future__ import annotations
+
+import os
+from typing import List
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.aes_encrypt import ROLE_CLIENT, SessionCipher
+from connect_core.tools import json_codec
+from connect_core.websockets.batching import pack
+from connect_core.websockets.envelope import encode_envelope
+from connect_core.websockets.outbound import OutboundFrame
+
+BURSTS = (8, 64)
+
+
+def main() -> None:
+    key = Fernet.generate_key().decode()
+    session = SessionCipher.derive(key, os.urandom(16), os.urandom(16), ROLE_CLIENT)
+    rows = []
+    for burst in BURSTS:
+        frames = [
+            OutboundFrame(json_codec.dumps({**CHAT_PACKET, "sid": sid}), "data_send", True)
+            for sid in range(burst)
+        ]
+        for cipher, kwargs in (("fernet", {"password": key}), ("aes-256-gcm", {"session": session})):
+
+            def per_packet() -> List[bytes]:
+                return [encode_envelope(frame.data, **kwargs) for frame in frames]  # type: ignore[arg-type]
+
+            def batched() -> List[bytes]:
+                return [encode_envelope(pack(frames), **kwargs)]
+
+            for mode, func in (("per packet", per_packet), ("batched", batched)):
+                sealed = func()
+                rows.append(
+                    [
+                        burst,
+                        cipher,
+                        mode,
+                        len(sealed),
+                        sum(len(frame) for frame in sealed),
+                        f"{per_call_us(func, 500) / burst:.2f}",
+                    ]
+                )
+    print(f"json backend: {json_codec.backend_name()}, packet: {frames[0].size} bytes\n")
+    print_table(["burst", "cipher", "mode", "frames", "wire bytes", "us/packet"], rows)
+
+
+if __name__ == "__main__":
+    main()
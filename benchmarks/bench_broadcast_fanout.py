@@ -0,0 +1,82 @@
+"""Broadcast encryption latency: serial vs parallel per-recipient encryption.
+
+Every recipient has its own account key, so a hub broadcast encrypts one copy
+per peer. This measures the wall-clock time of that stage for 10, 100 and 500
+recipients, serially on the loop thread and fanned out over the codec pool.
+
+Usage::
+
+    python -m benchmarks.bench_broadcast_fanout
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, List, Tuple
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, print_table
+from connect_core.aes_encrypt import aes_encrypt
+from connect_core.websockets.offload import CodecPool
+
+RECIPIENTS = (10, 100, 500)
+ROUNDS = 20
+
+
+def _encode(packet: Dict, key: str) -> bytes:
+    return aes_encrypt(json.dumps(packet).encode(), key)
+
+
+def _targets(count: int) -> List[Tuple[Dict, str]]:
+    return [
+        ({**CHAT_PACKET, "to": [f"sub{index}", "chat_relay"]}, Fernet.generate_key().decode())
+        for index in range(count)
+    ]
+
+
+def _best_ms(run: Callable[[], None]) -> float:
+    run()
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+async def _main() -> None:
+    workers = min(8, os.cpu_count() or 1)
+    pool = CodecPool(workers=workers, threshold=0)
+    loop = asyncio.get_running_loop()
+    rows = []
+    for count in RECIPIENTS:
+        targets = _targets(count)
+
+        def serial() -> None:
+            for packet, key in targets:
+                _encode(packet, key)
+
+        def parallel() -> None:
+            future = asyncio.run_coroutine_threadsafe(pool.map(_encode, targets), loop)
+            future.result()
+
+        serial_ms = _best_ms(serial)
+        parallel_ms = await loop.run_in_executor(None, _best_ms, parallel)
+        rows.append(
+            [count, f"{serial_ms:.2f}", f"{parallel_ms:.2f}", f"{serial_ms / parallel_ms:.2f}x"]
+        )
+    pool.shutdown()
+    print(f"codec pool workers: {workers}\n")
+    print_table(["recipients", "serial ms", "parallel ms", "speedup"], rows)
+
+
+def main() -> None:
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
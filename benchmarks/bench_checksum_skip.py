@@ -0,0 +1,89 @@
+"""Large-payload throughput with and without the per-packet payload checksum.
+
+Runs one packet through the sender and the receiver: build the packet, serialize
+and Fernet-encrypt it, then decrypt, parse, validate and verify it. With
+``transport_integrity_v1`` negotiated, neither side serializes-and-hashes the
+payload a second time, because the Fernet HMAC already authenticates the plaintext.
+
+Usage::
+
+    python -m benchmarks.bench_checksum_skip
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import time
+from typing import Any, Callable, Dict
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import print_table
+from connect_core.aes_encrypt import aes_decrypt, aes_encrypt
+from connect_core.tools import json_codec
+from connect_core.tools.common import verify_md5_checksum
+from connect_core.websockets.data_packet import Packet, PacketType
+
+ROUNDS = 20
+TO = ("sub1", "file_sync")
+FROM = ("-----", "file_sync")
+
+
+def _payloads() -> Dict[str, Dict[str, Any]]:
+    return {
+        "file chunk 256 KiB": {
+            "file_name": "world.zip",
+            "data": base64.b64encode(os.urandom(192 * 1024)).decode(),
+        },
+        "records 1 MiB": {
+            "rows": [
+                {"id": index, "name": f"player{index}", "pos": [index, 64, -index]}
+                for index in range(20000)
+            ]
+        },
+    }
+
+
+def _round_trip(payload: Dict[str, Any], key: str, checksum: bool) -> Callable[[], None]:
+    def run() -> None:
+        packet = Packet(PacketType.FILE_SENDING, 1, TO, FROM, payload, with_checksum=checksum)
+        frame = aes_encrypt(json_codec.dumps(packet.dump()), key)
+        received = Packet.validate(json_codec.loads(aes_decrypt(frame, key)))
+        if checksum:
+            assert verify_md5_checksum(received.payload, received.checksum)
+
+    return run
+
+
+def _best_seconds(run: Callable[[], None]) -> float:
+    run()
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    key = Fernet.generate_key().decode()
+    rows = []
+    for label, payload in _payloads().items():
+        size_mb = len(json_codec.dumps(payload)) / (1024 * 1024)
+        with_checksum = _best_seconds(_round_trip(payload, key, True))
+        without = _best_seconds(_round_trip(payload, key, False))
+        rows.append(
+            [
+                label,
+                f"{size_mb / with_checksum:.1f}",
+                f"{size_mb / without:.1f}",
+                f"{with_checksum / without:.2f}x",
+            ]
+        )
+    print(f"json backend: {json_codec.backend_name()}\n")
+    print_table(["payload", "checksum MB/s", "transport-only MB/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
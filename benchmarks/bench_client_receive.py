@@ -0,0 +1,97 @@
+"""Client receive path: decode-and-sniff vs first-byte frame classification.
+
+The old path UTF-8 decoded every frame (and re-encoded text frames) before
+deciding whether it was plain JSON or a Fernet token. The current path looks
+only at the frame type and the first byte.
+
+Usage::
+
+    python -m benchmarks.bench_client_receive
+"""
+
+from __future__ import annotations
+
+import json
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.aes_encrypt import aes_decrypt, aes_encrypt, aes_main
+from connect_core.websockets.envelope import (
+    FRAME_ENVELOPE,
+    FRAME_JSON,
+    classify_frame,
+    decode_envelope,
+    encode_envelope,
+    is_envelope,
+)
+
+
+def _legacy_sniff(message: bytes | str) -> str:
+    raw = message if isinstance(message, bytes) else message.encode()
+    if is_envelope(raw):
+        return FRAME_ENVELOPE
+    try:
+        if raw.decode().startswith("{"):
+            return FRAME_JSON
+    except UnicodeDecodeError:
+        pass
+    return "token"
+
+
+def _legacy(message: bytes | str) -> dict:
+    raw = message if isinstance(message, bytes) else message.encode()
+    if is_envelope(raw):
+        return json.loads(decode_envelope(raw)[1].decode())
+    try:
+        decoded = raw.decode()
+        if decoded.startswith("{"):
+            return json.loads(decoded)
+    except UnicodeDecodeError:
+        pass
+    return json.loads(aes_decrypt(raw).decode())
+
+
+def _classified(message: bytes | str) -> dict:
+    kind = classify_frame(message)
+    if kind == FRAME_ENVELOPE:
+        return json.loads(decode_envelope(message)[1])  # type: ignore[arg-type]
+    if kind == FRAME_JSON:
+        return json.loads(message)
+    return json.loads(aes_decrypt(message))
+
+
+def main() -> None:
+    aes_main(None, Fernet.generate_key().decode())  # type: ignore[arg-type]
+    plaintext = json.dumps(CHAT_PACKET).encode()
+    frames = {
+        "fernet binary": aes_encrypt(plaintext),
+        "fernet text": aes_encrypt(plaintext).decode(),
+        "wire v2 envelope": encode_envelope(plaintext),
+        "plain json text": plaintext.decode(),
+    }
+    dispatch_rows, full_rows = [], []
+    for name, frame in frames.items():
+        assert _legacy(frame) == _classified(frame)
+        dispatch_rows.append(
+            [
+                name,
+                f"{per_call_us(lambda: _legacy_sniff(frame), 50000):.3f}",
+                f"{per_call_us(lambda: classify_frame(frame), 50000):.3f}",
+            ]
+        )
+        full_rows.append(
+            [
+                name,
+                f"{per_call_us(lambda: _legacy(frame)):.2f}",
+                f"{per_call_us(lambda: _classified(frame)):.2f}",
+            ]
+        )
+    print("frame classification only\n")
+    print_table(["frame", "legacy us/msg", "classified us/msg"], dispatch_rows)
+    print("\nfull receive path (classification + decrypt + json)\n")
+    print_table(["frame", "legacy us/msg", "classified us/msg"], full_rows)
+
+
+if __name__ == "__main__":
+    main()
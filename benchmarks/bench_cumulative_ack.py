@@ -0,0 +1,72 @@
+"""Frames on the wire for chat traffic: one data_sendok per packet vs delayed cumulative acks.
+
+Each side of a connection receives ``MESSAGES`` chat ``data_send`` packets at a
+fixed interval. Per-packet acknowledgement costs one ``data_sendok`` frame per
+packet. With ``DelayedAcks`` (default 5 ms delay) packets arriving inside the
+delay share one cumulative ack; in the two-way run each side also sends a chat
+packet every interval, and with ``batch_v1`` the pending ack rides in that
+frame instead of being sent on its own.
+
+Usage::
+
+    python -m benchmarks.bench_cumulative_ack
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from benchmarks._common import print_table
+from connect_core.websockets.acks import DEFAULT_ACK_DELAY_MS, DelayedAcks
+
+MESSAGES = 400
+INTERVALS_MS = (1.0, 2.0, 10.0)
+
+
+async def _ack_frames(interval: float, two_way: bool) -> int:
+    """Return the number of standalone ack frames one side sends."""
+    flushed = 0
+
+    async def flush(_peer: str, _upto: int) -> None:
+        nonlocal flushed
+        flushed += 1
+
+    acks = DelayedAcks(flush, DEFAULT_ACK_DELAY_MS / 1000)
+    for sid in range(1, MESSAGES + 1):
+        acks.defer("alpha", sid)
+        await asyncio.sleep(interval / 2)
+        if two_way:
+            # the outgoing chat packet takes the pending ack into its batch
+            acks.take("alpha")
+        await asyncio.sleep(interval / 2)
+    await asyncio.sleep(DEFAULT_ACK_DELAY_MS / 1000 * 2)
+    return flushed
+
+
+def main() -> None:
+    rows = []
+    for two_way in (False, True):
+        directions = 2 if two_way else 1
+        for interval_ms in INTERVALS_MS:
+            ack_frames = asyncio.run(_ack_frames(interval_ms / 1000, two_way)) * directions
+            data_frames = MESSAGES * directions
+            per_packet = data_frames * 2
+            cumulative = data_frames + ack_frames
+            rows.append(
+                [
+                    "two-way" if two_way else "one-way",
+                    f"{interval_ms:g} ms",
+                    per_packet,
+                    cumulative,
+                    f"{cumulative / per_packet:.0%}",
+                ]
+            )
+    print(f"{MESSAGES} chat packets per direction, ack delay {DEFAULT_ACK_DELAY_MS:g} ms\n")
+    print_table(
+        ["traffic", "interval", "per-packet acks", "cumulative acks", "frames vs per-packet"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
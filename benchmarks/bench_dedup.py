@@ -0,0 +1,77 @@
+"""Cost of the receiver-side duplicate check and what it keeps from plugins.
+
+The first table times ``DuplicateFilter.first_seen`` per ``data_send`` for
+in-order sids, repeated sids and sids arriving a few places late, for several
+window sizes. The second replays a lossy link: ``MESSAGES`` packets where every
+``RESEND_EVERY``-th ack is lost, so the sender's retransmit timer resends the
+packet after ``RESEND_LAG`` newer ones; it counts how many plugin deliveries
+happen with and without the filter.
+
+Usage::
+
+    python -m benchmarks.bench_dedup
+"""
+
+from __future__ import annotations
+
+import itertools
+
+from benchmarks._common import per_call_us, print_table
+from connect_core.websockets.dedup import DEFAULT_DEDUP_WINDOW, DuplicateFilter
+
+WINDOW_SIZES = (64, DEFAULT_DEDUP_WINDOW, 4096)
+MESSAGES = 10_000
+RESEND_EVERY = 20
+RESEND_LAG = 8
+
+
+def _timings(size: int) -> list[str]:
+    in_order = DuplicateFilter(size)
+    sids = itertools.count(1)
+    repeated = DuplicateFilter(size)
+    repeated.first_seen("alpha", 1)
+    late = DuplicateFilter(size)
+    late_sids = itertools.count(1)
+
+    def late_check() -> None:
+        sid = next(late_sids)
+        # every even sid arrives after an odd sid a few places ahead of it
+        late.first_seen("alpha", sid + 4 if sid % 2 else sid)
+
+    return [
+        f"{per_call_us(lambda: in_order.first_seen('alpha', next(sids)), 50_000):.3f}",
+        f"{per_call_us(lambda: repeated.first_seen('alpha', 1), 50_000):.3f}",
+        f"{per_call_us(late_check, 50_000):.3f}",
+    ]
+
+
+def _arrivals() -> list[int]:
+    arrivals = list(range(1, MESSAGES + 1))
+    for sid in range(RESEND_EVERY, MESSAGES + 1, RESEND_EVERY):
+        arrivals.insert(arrivals.index(sid) + RESEND_LAG, sid)
+    return arrivals
+
+
+def main() -> None:
+    rows = [[size, *_timings(size)] for size in WINDOW_SIZES]
+    print("first_seen cost per data_send\n")
+    print_table(["window", "in-order (us)", "duplicate (us)", "late (us)"], rows)
+
+    arrivals = _arrivals()
+    duplicates = DuplicateFilter(DEFAULT_DEDUP_WINDOW)
+    delivered = sum(duplicates.first_seen("alpha", sid) for sid in arrivals)
+    print(
+        f"\n{MESSAGES} packets, 1 in {RESEND_EVERY} resent after {RESEND_LAG} newer ones "
+        f"({len(arrivals)} arrivals)\n"
+    )
+    print_table(
+        ["receiver", "plugin deliveries", "duplicates delivered"],
+        [
+            ["no filter", len(arrivals), len(arrivals) - MESSAGES],
+            [f"window {DEFAULT_DEDUP_WINDOW}", delivered, delivered - MESSAGES],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
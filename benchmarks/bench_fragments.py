@@ -0,0 +1,93 @@
+"""Hub peak memory while relaying one oversized data_send: single frame vs fragments.
+
+Runs the hub's receive-and-forward pipeline for one direct message: decrypt the
+sender's frame, parse and validate it, then serialize and encrypt one copy for
+the target. The single-frame run handles the whole payload at once; the
+fragmented run feeds ``data_fragment`` frames through the same pipeline one
+after another, which is how the hub relays them without reassembling.
+
+Usage::
+
+    python -m benchmarks.bench_fragments
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import print_table
+from connect_core.aes_encrypt import aes_decrypt, aes_encrypt
+from connect_core.tools import json_codec
+from connect_core.websockets.data_packet import Packet, PacketType
+from connect_core.websockets.fragments import DEFAULT_FRAGMENT_SIZE, split
+from connect_core.websockets.relay import dumps_packet
+
+TO = ("sub1", "backup")
+FROM = ("sub2", "backup")
+SIZES_MB = (4, 20)
+
+
+def _payload(size_mb: int) -> Dict[str, Any]:
+    row = {"name": "player", "pos": [1, 64, -1], "inventory": "x" * 180}
+    return {"rows": [row] * (size_mb * 1024 * 1024 // 230)}
+
+
+def _frames(payload: Dict[str, Any], key: str, fragmented: bool) -> List[bytes]:
+    if not fragmented:
+        packet = Packet(PacketType.DATA_SEND, 1, TO, FROM, payload, with_checksum=False)
+        return [aes_encrypt(json_codec.dumps(packet.dump()), key)]
+    text = json_codec.dumps_str(payload)
+    return [
+        aes_encrypt(
+            json_codec.dumps(
+                Packet(PacketType.DATA_FRAGMENT, 1, TO, FROM, fragment, with_checksum=False).dump()
+            ),
+            key,
+        )
+        for fragment in split(text, DEFAULT_FRAGMENT_SIZE)
+    ]
+
+
+def _relay(frames: List[bytes], sender_key: str, target_key: str) -> Tuple[float, float]:
+    """Return (peak MiB, seconds) for relaying *frames* one at a time."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    for frame in frames:
+        packet = Packet.validate(json_codec.loads(aes_decrypt(frame, sender_key)))
+        aes_encrypt(dumps_packet(packet.dump()), target_key)
+        del packet
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024), elapsed
+
+
+def main() -> None:
+    sender_key = Fernet.generate_key().decode()
+    target_key = Fernet.generate_key().decode()
+    rows = []
+    for size_mb in SIZES_MB:
+        payload = _payload(size_mb)
+        for fragmented in (False, True):
+            frames = _frames(payload, sender_key, fragmented)
+            peak, elapsed = _relay(frames, sender_key, target_key)
+            rows.append(
+                [
+                    f"{size_mb} MiB",
+                    "fragments" if fragmented else "single frame",
+                    len(frames),
+                    f"{peak:.1f}",
+                    f"{elapsed * 1000:.0f}",
+                ]
+            )
+            del frames
+    print(f"json backend: {json_codec.backend_name()}, fragment size: {DEFAULT_FRAGMENT_SIZE} chars\n")
+    print_table(["payload", "mode", "frames", "hub peak MiB", "hub ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
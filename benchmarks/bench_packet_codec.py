@@ -0,0 +1,70 @@
+"""Packet construct/validate/dump: pydantic DataModel vs the slotted Packet.
+
+Every frame the hub relays is validated once on receipt and rebuilt once per
+destination, so these three operations sit on the per-message hot path.
+
+Usage::
+
+    python -m benchmarks.bench_packet_codec
+"""
+
+from __future__ import annotations
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.tools.common import generate_md5_checksum
+from connect_core.websockets.data_packet import DataModel, Packet, PacketType
+
+TO = ("all", "chat_relay")
+FROM = ("k3J9a", "chat_relay")
+PAYLOAD = CHAT_PACKET["payload"]
+FANOUT = 8
+
+
+def _fanout_models() -> None:
+    for sid in range(FANOUT):
+        DataModel(type=PacketType.DATA_SEND, sid=sid, to=TO, from_=FROM, payload=PAYLOAD)  # type: ignore[call-arg]
+
+
+def _fanout_packets() -> None:
+    checksum = generate_md5_checksum(PAYLOAD)
+    for sid in range(FANOUT):
+        Packet(PacketType.DATA_SEND, sid, TO, FROM, PAYLOAD, checksum=checksum)
+
+
+def main() -> None:
+    # Received packets already carry a checksum; only new packets compute one.
+    incoming = dict(CHAT_PACKET)
+    model = DataModel.model_validate(dict(incoming))
+    packet = Packet.validate(dict(incoming))
+
+    cases = [
+        (
+            "validate",
+            lambda: DataModel.model_validate(dict(incoming)),
+            lambda: Packet.validate(dict(incoming)),
+        ),
+        (
+            "construct",
+            lambda: DataModel(
+                type=PacketType.DATA_SEND, sid=1, to=TO, from_=FROM, payload=PAYLOAD  # type: ignore[call-arg]
+            ),
+            lambda: Packet(PacketType.DATA_SEND, 1, TO, FROM, PAYLOAD),
+        ),
+        (f"broadcast x{FANOUT}", _fanout_models, _fanout_packets),
+        (
+            "dump",
+            lambda: model.model_dump(by_alias=True),
+            lambda: packet.dump(),
+        ),
+    ]
+
+    rows = []
+    for name, old, new in cases:
+        before = per_call_us(old, 20000)
+        after = per_call_us(new, 20000)
+        rows.append([name, f"{before:.2f}", f"{after:.2f}", f"{before / after:.1f}x"])
+    print_table(["operation", "DataModel us", "Packet us", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Chat latency during a file transfer: one FIFO queue vs priority lanes.
+
+Feeds an ``OutboundQueue`` with 1 MiB ``file_sending`` chunks (a world backup)
+while a chat message is queued every few milliseconds. The socket is
+simulated at a fixed bandwidth, so a frame's write time is proportional to its
+size. The FIFO run tags every frame with the same lane, which is what a single
+queue does; the lanes run uses the packet-type classification from
+``connect_core.websockets.lanes``.
+
+Usage::
+
+    python -m benchmarks.bench_priority_lanes
+"""
+
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks._common import CHAT_PACKET, print_table
+from connect_core.tools import json_codec
+from connect_core.websockets.lanes import PRIORITY_INTERACTIVE, priority_of
+from connect_core.websockets.outbound import OutboundFrame, OutboundQueue
+
+BANDWIDTH = 200 * 1024 * 1024  # bytes per second
+CHUNKS = 32
+CHUNK = b"0" * (2 * 1024 * 1024)  # 1 MiB of file data hex-encodes to 2 MiB
+CHAT_INTERVAL = 0.005
+CHATS = 40
+
+
+async def _run(lanes: bool) -> List[float]:
+    chat = json_codec.dumps(CHAT_PACKET)
+    queued_at: Dict[int, float] = {}
+    latencies: List[float] = []
+
+    async def send(data: bytes | str) -> None:
+        await asyncio.sleep(len(data) / BANDWIDTH)
+        if data is not CHUNK:
+            latencies.append(time.perf_counter() - queued_at[id(data)])
+
+    queue = OutboundQueue(send, max_packets=CHUNKS + CHATS + 1, max_bytes=1 << 40)
+    for _ in range(CHUNKS):
+        lane = priority_of("file_sending") if lanes else PRIORITY_INTERACTIVE
+        queue.put(OutboundFrame(CHUNK, "file_sending", True, lane))
+    for _ in range(CHATS):
+        frame = bytes(chat)
+        queued_at[id(frame)] = time.perf_counter()
+        queue.put(OutboundFrame(frame, "data_send", True, priority_of("data_send")))
+        await asyncio.sleep(CHAT_INTERVAL)
+    while queue.depth:
+        await asyncio.sleep(0.01)
+    await queue.close()
+    return latencies
+
+
+def main() -> None:
+    rows = []
+    for name, lanes in (("single fifo", False), ("priority lanes", True)):
+        latencies = asyncio.run(_run(lanes))
+        rows.append(
+            [
+                name,
+                len(latencies),
+                f"{statistics.median(latencies) * 1000:.1f}",
+                f"{max(latencies) * 1000:.1f}",
+            ]
+        )
+    print(
+        f"{CHUNKS} file_sending frames of {len(CHUNK) // (1024 * 1024)} MiB at "
+        f"{BANDWIDTH // (1024 * 1024)} MiB/s, one chat message every {CHAT_INTERVAL * 1000:.0f} ms\n"
+    )
+    print_table(["queue", "chats", "median latency ms", "max latency ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
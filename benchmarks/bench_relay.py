@@ -0,0 +1,119 @@
+"""Hub CPU per relayed data_send: re-hash/re-serialize vs payload passthrough.
+
+Runs the hub's receive-and-forward pipeline for one message: decrypt the
+sender's frame, parse it, validate, build the per-target packets and encrypt
+one copy per target. Passthrough reuses the sender's checksum and serializes
+payloads over 1 KiB once for every target. The "codec" columns repeat the run without
+the Fernet stages to isolate the hash/serialize work the passthrough removes.
+
+Usage::
+
+    python -m benchmarks.bench_relay
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.aes_encrypt import aes_decrypt, aes_encrypt
+from connect_core.context import GlobalContext
+from connect_core.tools import json_codec
+from connect_core.tools.common import generate_md5_checksum
+from connect_core.websockets.data_packet import Packet, PacketStore, PacketType
+from connect_core.websockets.relay import dumps_packet, share
+
+PAYLOADS = {
+    "chat": CHAT_PACKET["payload"],
+    "4 KiB": {"players": [{"name": f"player{i}", "x": i, "y": 64, "z": -i} for i in range(80)]},
+}
+TARGETS = (1, 8)
+
+
+def _pipeline(
+    sender_key: str,
+    target_keys: Dict[str, str],
+    passthrough: bool,
+    crypto: bool,
+) -> Callable[[bytes], List[bytes]]:
+    dumps = dumps_packet if passthrough else json_codec.dumps
+    to = ("all", "chat_relay") if len(target_keys) > 1 else (next(iter(target_keys)), "chat_relay")
+
+    def relay(frame: bytes) -> List[bytes]:
+        plaintext = aes_decrypt(frame, sender_key) if crypto else frame
+        packet = Packet.validate(json_codec.loads(plaintext))
+        payload, checksum = packet.payload, None
+        if passthrough:
+            payload, checksum = share(payload), packet.checksum  # type: ignore[arg-type]
+        # A fresh store keeps the history scan from growing across iterations.
+        packets = PacketStore().create_packets(
+            PacketType.DATA_SEND,
+            to,
+            packet.from_,
+            payload,
+            known_targets=target_keys,
+            checksum=checksum,
+        )
+        frames = []
+        assert len(packets) == len(target_keys)
+        for dest, out in packets.items():
+            data = dumps(out.dump())
+            frames.append(aes_encrypt(data, target_keys[dest]) if crypto else data)
+        return frames
+
+    return relay
+
+
+def main() -> None:
+    GlobalContext.reset()
+    GlobalContext(server=True)
+    sender_key = Fernet.generate_key().decode()
+    rows = []
+    for label, payload in PAYLOADS.items():
+        incoming = {
+            **CHAT_PACKET,
+            "from": ["sender", "chat_relay"],
+            "payload": payload,
+            "checksum": generate_md5_checksum(payload),
+        }
+        plaintext = json_codec.dumps(incoming)
+        frame = aes_encrypt(plaintext, sender_key)
+        for count in TARGETS:
+            target_keys = {f"sub{i}": Fernet.generate_key().decode() for i in range(count)}
+            timings = []
+            for crypto in (True, False):
+                source = frame if crypto else plaintext
+                for passthrough in (False, True):
+                    relay = _pipeline(sender_key, target_keys, passthrough, crypto)
+                    timings.append(per_call_us(lambda: relay(source), 2000))
+            full_before, full_after, codec_before, codec_after = timings
+            rows.append(
+                [
+                    label,
+                    count,
+                    f"{full_before:.1f}",
+                    f"{full_after:.1f}",
+                    f"{codec_before:.1f}",
+                    f"{codec_after:.1f}",
+                    f"{codec_before / codec_after:.1f}x",
+                ]
+            )
+    print(f"json backend: {json_codec.backend_name()}\n")
+    print_table(
+        [
+            "payload",
+            "targets",
+            "hub us before",
+            "hub us after",
+            "codec us before",
+            "codec us after",
+            "codec speedup",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
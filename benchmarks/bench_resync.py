@@ -0,0 +1,85 @@
+"""History replay on ping after an outage: unbounded per-packet replay vs the bounded resync.
+
+A sub-server that missed ``N`` chat packets pings the hub. The old handler
+dumped every history entry and sealed each one into its own Fernet frame. The
+bounded resync replays at most ``resync_max_packets`` packets, sealing
+``resync_batch_size`` of them per frame, and answers a larger backlog with a
+single gap marker in the pong. CPU covers selecting, serializing and sealing
+the replay; the pong is counted in the frames but not timed.
+
+Usage::
+
+    python -m benchmarks.bench_resync
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.tools import json_codec
+from connect_core.websockets.batching import pack
+from connect_core.websockets.data_packet import Packet
+from connect_core.websockets.envelope import encode_envelope
+from connect_core.websockets.outbound import OutboundFrame
+from connect_core.websockets.resync import ResyncPolicy
+
+BACKLOGS = (50, 250, 1000, 10_000)
+
+
+def _history(count: int) -> list[Packet]:
+    now = time.time()
+    return [
+        Packet.validate({**CHAT_PACKET, "sid": sid, "timestamp": now})
+        for sid in range(1, count + 1)
+    ]
+
+
+def main() -> None:
+    key = Fernet.generate_key().decode()
+    policy = ResyncPolicy()
+    rows = []
+    for count in BACKLOGS:
+        history = _history(count)
+        iterations = max(5, 2_000 // count)
+
+        def unbounded() -> None:
+            for packet in history:
+                encode_envelope(json_codec.dumps(packet.dump()), password=key)
+
+        def bounded() -> None:
+            plan = policy.plan(history, time.time())
+            frames = [
+                OutboundFrame(json_codec.dumps(packet.dump()), "data_send", True)
+                for packet in plan.packets
+            ]
+            for start in range(0, len(frames), policy.batch_size):
+                encode_envelope(pack(frames[start : start + policy.batch_size]), password=key)
+
+        plan = policy.plan(history, time.time())
+        frames = math.ceil(len(plan.packets) / policy.batch_size) + 1
+        rows.append(
+            [
+                count,
+                count + 1,
+                frames,
+                "gap" if plan.gap else len(plan.packets),
+                f"{per_call_us(unbounded, iterations):.0f}",
+                f"{per_call_us(bounded, iterations):.0f}",
+            ]
+        )
+    print(
+        f"max {policy.max_packets} packets / {policy.max_bytes // 1024} KiB replayed, "
+        f"{policy.batch_size} per frame; frame counts include the pong\n"
+    )
+    print_table(
+        ["backlog", "old frames", "new frames", "replayed", "old CPU (us)", "new CPU (us)"],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
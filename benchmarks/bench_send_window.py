@@ -0,0 +1,55 @@
+"""Messages per second over a slow link: stop-and-wait vs a send window.
+
+A sender pushes ``data_send`` packets through a simulated link with a fixed
+one-way delay; the receiver acknowledges every packet by sid. A window of one
+is the legacy behaviour, where each packet waits for the previous ack. Larger
+windows use ``SendWindow`` the same way ``WebsocketClient`` does.
+
+Usage::
+
+    python -m benchmarks.bench_send_window
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from benchmarks._common import CHAT_PACKET, print_table
+from connect_core.websockets.send_window import SendWindow
+
+ONE_WAY_DELAY = 0.02  # 40 ms round trip
+MESSAGES = 200
+WINDOWS = (1, 8, 32)
+
+
+async def _run(size: int) -> float:
+    window = SendWindow(size)
+    loop = asyncio.get_running_loop()
+
+    def deliver(sid: int) -> None:
+        # the ack travels back over the same link
+        loop.call_later(ONE_WAY_DELAY, window.ack, sid)
+
+    started = time.perf_counter()
+    for sid in range(MESSAGES):
+        await window.wait_for_room()
+        window.track(sid, {**CHAT_PACKET, "sid": sid})
+        loop.call_later(ONE_WAY_DELAY, deliver, sid)
+    while len(window):
+        await asyncio.sleep(ONE_WAY_DELAY / 4)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    rows = []
+    for size in WINDOWS:
+        elapsed = asyncio.run(_run(size))
+        name = "stop-and-wait" if size == 1 else f"window {size}"
+        rows.append([name, f"{elapsed * 1000:.0f}", f"{MESSAGES / elapsed:.0f}"])
+    print(f"{MESSAGES} data_send packets, {ONE_WAY_DELAY * 2000:.0f} ms round trip\n")
+    print_table(["sender", "total ms", "messages/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
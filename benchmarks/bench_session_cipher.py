@@ -0,0 +1,67 @@
+"""Bytes and CPU per message: Fernet vs the AES-256-GCM session cipher.
+
+Usage::
+
+    python -m benchmarks.bench_session_cipher
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.aes_encrypt import ROLE_CLIENT, ROLE_SERVER, SessionCipher
+from connect_core.websockets.envelope import decode_envelope, encode_envelope
+
+
+def main() -> None:
+    key = Fernet.generate_key().decode()
+    client_nonce, server_nonce = os.urandom(16), os.urandom(16)
+    sender = SessionCipher.derive(key, client_nonce, server_nonce, ROLE_CLIENT)
+    receiver = SessionCipher.derive(key, client_nonce, server_nonce, ROLE_SERVER)
+    plaintext = json.dumps(CHAT_PACKET).encode()
+
+    def fernet_encode() -> bytes:
+        return encode_envelope(plaintext, key)
+
+    def session_encode() -> bytes:
+        return encode_envelope(plaintext, session=sender)
+
+    fernet_frame = fernet_encode()
+    session_frame = session_encode()
+
+    def fernet_decode() -> bytes:
+        return decode_envelope(fernet_frame, key)[1]
+
+    def session_round_trip() -> bytes:
+        # 会话帧拒绝重放，因此解密计时包含一次加密
+        return decode_envelope(session_encode(), session=receiver)[1]
+
+    encode_us = per_call_us(session_encode)
+    print(f"plaintext packet: {len(plaintext)} bytes\n")
+    print_table(
+        ["cipher", "bytes/msg", "overhead", "encode us/msg", "decode us/msg"],
+        [
+            [
+                "fernet",
+                len(fernet_frame),
+                len(fernet_frame) - len(plaintext),
+                f"{per_call_us(fernet_encode):.1f}",
+                f"{per_call_us(fernet_decode):.1f}",
+            ],
+            [
+                "aes-256-gcm session",
+                len(session_frame),
+                len(session_frame) - len(plaintext),
+                f"{encode_us:.1f}",
+                f"{per_call_us(session_round_trip) - encode_us:.1f}",
+            ],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Bytes and CPU per message: wire v1 (JSON + base64 Fernet) vs wire v2 (binary envelope).
+
+Usage::
+
+    python -m benchmarks.bench_wire_envelope
+"""
+
+from __future__ import annotations
+
+import json
+
+from cryptography.fernet import Fernet
+
+from benchmarks._common import CHAT_PACKET, per_call_us, print_table
+from connect_core.aes_encrypt import aes_decrypt, aes_encrypt
+from connect_core.websockets.envelope import decode_envelope, encode_envelope
+
+
+def main() -> None:
+    key = Fernet.generate_key().decode()
+    account = "k3J9a"
+
+    def v1_encode() -> str:
+        encrypted = aes_encrypt(json.dumps(CHAT_PACKET).encode(), key).decode()
+        return json.dumps({"account": account, "data": encrypted})
+
+    def v2_encode() -> bytes:
+        return encode_envelope(json.dumps(CHAT_PACKET).encode(), key)
+
+    v1_frame = v1_encode()
+    v2_frame = v2_encode()
+
+    def v1_decode() -> dict:
+        msg = json.loads(v1_frame)
+        return json.loads(aes_decrypt(msg["data"], key).decode())
+
+    def v2_decode() -> dict:
+        _, plaintext = decode_envelope(v2_frame, key)
+        return json.loads(plaintext.decode())
+
+    plaintext_size = len(json.dumps(CHAT_PACKET).encode())
+    print(f"plaintext packet: {plaintext_size} bytes\n")
+    print_table(
+        ["format", "bytes/msg", "encode us/msg", "decode us/msg"],
+        [
+            ["v1 json+base64", len(v1_frame.encode()), f"{per_call_us(v1_encode):.1f}", f"{per_call_us(v1_decode):.1f}"],
+            ["v2 binary", len(v2_frame), f"{per_call_us(v2_encode):.1f}", f"{per_call_us(v2_decode):.1f}"],
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+AccountListener = Callable[[str, str], None]
+
+
+class AccountRegistry:
+    """内存中的账户表，镜像 ``account.json``。
+
+    热路径上的 :meth:`get` 只做一次字典查询，不触发任何文件系统调用；
+    外部对文件的修改由 :meth:`refresh` 通过 mtime/size 检测后重新加载。
+    """
+
+    def __init__(self, account_file: Path) -> None:
+        self._file = account_file
+        self._lock = threading.Lock()
+        self._accounts: Dict[str, str] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._listeners: List[AccountListener] = []
+        self.reload()
+
+    # ===== 查询 =====
+    def get(self, account: str) -> Optional[str]:
+        """返回账户密码；未知账户返回 ``None``。"""
+        return self._accounts.get(account)
+
+    def __contains__(self, account: object) -> bool:
+        return account in self._accounts
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def snapshot(self) -> Dict[str, str]:
+        """返回当前账户表的副本。"""
+        return dict(self._accounts)
+
+    # ===== 监听 =====
+    def add_listener(self, listener: AccountListener) -> None:
+        """注册回调，在账户被删除或密码变化时以 ``(账户名, 旧密码)`` 调用。"""
+        self._listeners.append(listener)
+
+    # ===== 同步 =====
+    def refresh(self) -> bool:
+        """若文件 mtime/size 发生变化则重新加载，返回是否重新加载。"""
+        if self._read_stamp() == self._stamp:
+            return False
+        self.reload()
+        return True
+
+    def reload(self) -> None:
+        with self._lock:
+            stamp = self._read_stamp()
+            try:
+                with self._file.open("r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (json.JSONDecodeError, FileNotFoundError):
+                data = {}
+            if not isinstance(data, dict):
+                data = {}
+            self._swap({str(key): str(value) for key, value in data.items()}, stamp)
+
+    def replace(self, accounts: Dict[str, str]) -> None:
+        """整体写回账户表并同步内存。"""
+        with self._lock:
+            self._write(accounts)
+            self._swap(dict(accounts), self._read_stamp())
+
+    def set(self, account: str, password: str) -> None:
+        with self._lock:
+            accounts = dict(self._accounts)
+            accounts[account] = password
+            self._write(accounts)
+            self._swap(accounts, self._read_stamp())
+
+    def remove(self, account: str) -> None:
+        with self._lock:
+            if account not in self._accounts:
+                return
+            accounts = dict(self._accounts)
+            accounts.pop(account, None)
+            self._write(accounts)
+            self._swap(accounts, self._read_stamp())
+
+    # ===== 内部 =====
+    def _swap(
+        self, accounts: Dict[str, str], stamp: Optional[Tuple[int, int]]
+    ) -> None:
+        previous = self._accounts
+        # 整体替换字典引用，读取方无需加锁
+        self._accounts = accounts
+        self._stamp = stamp
+        changed = [
+            (account, password)
+            for account, password in previous.items()
+            if accounts.get(account) != password
+        ]
+        for account, password in changed:
+            for listener in list(self._listeners):
+                try:
+                    listener(account, password)
+                except Exception:  # pragma: no cover - listener side effect
+                    pass
+
+    def _write(self, accounts: Dict[str, str]) -> None:
+        with self._file.open("w", encoding="utf-8") as fh:
+            json.dump(accounts, fh, indent=4, ensure_ascii=False)
+
+    def _read_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
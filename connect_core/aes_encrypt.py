@@ -1,46 +1,241 @@
 from __future__ import annotations
 
+import base64
 import threading
+from collections import OrderedDict
 
-from typing import Optional, TYPE_CHECKING
+from typing import Dict, Optional, TYPE_CHECKING
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 if TYPE_CHECKING:  # pragma: no cover
     from connect_core.interface.control_interface import CoreControlInterface
 
 _fernet: Fernet | None = None
+_password: str | None = None
 _control_interface: Optional["CoreControlInterface"] = None
 _fernet_lock = threading.Lock()
 
+CIPHER_CACHE_SIZE = 1024
+
+SESSION_NONCE_SIZE = 16
+SESSION_COUNTER_SIZE = 8
+SESSION_REPLAY_WINDOW = 64
+SESSION_INFO = b"connect-core aead session v1"
+ROLE_CLIENT = "client"
+ROLE_SERVER = "server"
+_DIRECTION = {ROLE_CLIENT: b"\x01\x00\x00\x00", ROLE_SERVER: b"\x02\x00\x00\x00"}
+
 
 class DecryptionError(ValueError):
     """Raised when decrypting data fails due to invalid key or payload."""
 
 
+class CipherCache:
+    """Bounded LRU cache of Fernet ciphers keyed by password."""
+
+    def __init__(self, max_size: int = CIPHER_CACHE_SIZE) -> None:
+        self._max_size = max(1, max_size)
+        self._ciphers: OrderedDict[str, Fernet] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, password: str) -> Fernet:
+        with self._lock:
+            fernet = self._ciphers.get(password)
+            if fernet is not None:
+                self._ciphers.move_to_end(password)
+                self.hits += 1
+                return fernet
+            self.misses += 1
+        fernet = Fernet(password.encode())
+        with self._lock:
+            self._ciphers[password] = fernet
+            self._ciphers.move_to_end(password)
+            while len(self._ciphers) > self._max_size:
+                self._ciphers.popitem(last=False)
+                self.evictions += 1
+        return fernet
+
+    def evict(self, password: str) -> None:
+        with self._lock:
+            if self._ciphers.pop(password, None) is not None:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ciphers.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._ciphers),
+                "max_size": self._max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_cipher_cache = CipherCache()
+
+
+class SessionCipher:
+    """Per-connection AES-256-GCM cipher derived at login.
+
+    Each message carries an 8-byte big-endian counter followed by the
+    ciphertext and 16-byte tag. The 12-byte nonce is a direction prefix plus
+    the counter, so the two sides never reuse a nonce under the same key.
+    Received counters are checked against a sliding window that tolerates
+    reordering but rejects replays.
+    """
+
+    def __init__(self, key: bytes, role: str) -> None:
+        if role not in _DIRECTION:
+            raise ValueError(f"Unknown session role: {role}")
+        self._aead = AESGCM(key)
+        self._send_prefix = _DIRECTION[role]
+        self._recv_prefix = _DIRECTION[ROLE_SERVER if role == ROLE_CLIENT else ROLE_CLIENT]
+        self._lock = threading.Lock()
+        self._send_counter = 0
+        self._recv_highest = -1
+        self._recv_bitmap = 0
+
+    @classmethod
+    def derive(
+        cls,
+        password: str,
+        client_nonce: bytes,
+        server_nonce: bytes,
+        role: str,
+    ) -> "SessionCipher":
+        """Derive the session key from the account key and both login nonces."""
+        hkdf = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=client_nonce + server_nonce,
+            info=SESSION_INFO,
+        )
+        return cls(hkdf.derive(base64.urlsafe_b64decode(password)), role)
+
+    def encrypt(self, data: bytes, associated_data: Optional[bytes] = None) -> bytes:
+        with self._lock:
+            counter = self._send_counter
+            if counter >= 1 << (8 * SESSION_COUNTER_SIZE):
+                raise ValueError("Session counter exhausted")
+            self._send_counter += 1
+        prefix = counter.to_bytes(SESSION_COUNTER_SIZE, "big")
+        return prefix + self._aead.encrypt(self._send_prefix + prefix, data, associated_data)
+
+    def decrypt(self, data: bytes, associated_data: Optional[bytes] = None) -> bytes:
+        if len(data) < SESSION_COUNTER_SIZE + 16:
+            raise DecryptionError("Session payload too short")
+        prefix = data[:SESSION_COUNTER_SIZE]
+        counter = int.from_bytes(prefix, "big")
+        with self._lock:
+            if self._is_replay(counter):
+                raise DecryptionError(f"Replayed session counter: {counter}")
+        try:
+            plaintext = self._aead.decrypt(
+                self._recv_prefix + prefix, data[SESSION_COUNTER_SIZE:], associated_data
+            )
+        except InvalidTag as exc:
+            raise DecryptionError("Decryption failed: invalid session tag") from exc
+        with self._lock:
+            if self._is_replay(counter):
+                raise DecryptionError(f"Replayed session counter: {counter}")
+            self._accept(counter)
+        return plaintext
+
+    def _is_replay(self, counter: int) -> bool:
+        if counter > self._recv_highest:
+            return False
+        offset = self._recv_highest - counter
+        if offset >= SESSION_REPLAY_WINDOW:
+            return True
+        return bool(self._recv_bitmap >> offset & 1)
+
+    def _accept(self, counter: int) -> None:
+        if counter > self._recv_highest:
+            shift = counter - self._recv_highest
+            mask = (1 << SESSION_REPLAY_WINDOW) - 1
+            self._recv_bitmap = ((self._recv_bitmap << shift) | 1) & mask
+            self._recv_highest = counter
+        else:
+            self._recv_bitmap |= 1 << (self._recv_highest - counter)
+
+
+def evict_cipher(password: str) -> None:
+    """Drop the cached cipher for *password*, e.g. after an account is removed."""
+    _cipher_cache.evict(password)
+
+
+def get_cipher_cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters of the per-key cipher cache."""
+    return _cipher_cache.stats()
+
+
 def aes_main(
     control_interface: "CoreControlInterface", password: str | None = None
 ) -> None:
     """Initialize global Fernet cipher with optional password."""
-    global _fernet, _control_interface
+    global _fernet, _password, _control_interface
 
     _control_interface = control_interface
     with _fernet_lock:
         if password:
             _fernet = Fernet(password.encode())
+            _password = password
         else:
             _fernet = None
+            _password = None
+
+
+def derive_session(
+    client_nonce: bytes,
+    server_nonce: bytes,
+    role: str,
+    password: str | None = None,
+) -> SessionCipher:
+    """Derive a :class:`SessionCipher` from *password*.
+
+    Only the client role falls back to the configured key; the server must pass
+    the key of the account that logged in.
+    """
+    if not password and role == ROLE_CLIENT:
+        with _fernet_lock:
+            password = _password
+    if not password:
+        raise InvalidToken("Password initialization error!")
+    return SessionCipher.derive(password, client_nonce, server_nonce, role)
+
 
+def aes_encrypt(
+    data: bytes | str,
+    password: str | None = None,
+    *,
+    session: SessionCipher | None = None,
+    associated_data: bytes | None = None,
+) -> bytes:
+    """Encrypt *data* using configured Fernet cipher or provided password.
 
-def aes_encrypt(data: bytes | str, password: str | None = None) -> bytes:
-    """Encrypt *data* using configured Fernet cipher or provided password."""
+    With *session*, the raw AEAD message is returned instead of a Fernet token.
+    """
     payload = data.encode() if isinstance(data, str) else data
+    if session is not None:
+        return session.encrypt(payload, associated_data)
     with _fernet_lock:
         fernet = _fernet
 
     if password:
-        fernet = Fernet(password.encode())
-        return fernet.encrypt(payload)
+        return _cipher_cache.get(password).encrypt(payload)
 
     if fernet is None:
         raise InvalidToken("Password initialization error!")
@@ -48,14 +243,22 @@ def aes_encrypt(data: bytes | str, password: str | None = None) -> bytes:
     return fernet.encrypt(payload)
 
 
-def aes_decrypt(data: bytes | str, password: str | None = None) -> bytes:
+def aes_decrypt(
+    data: bytes | str,
+    password: str | None = None,
+    *,
+    session: SessionCipher | None = None,
+    associated_data: bytes | None = None,
+) -> bytes:
     """Decrypt *data* using configured Fernet cipher or provided password."""
     payload = data.encode() if isinstance(data, str) else data
+    if session is not None:
+        return session.decrypt(payload, associated_data)
     with _fernet_lock:
         fernet = _fernet
 
     if password:
-        fernet = Fernet(password.encode())
+        fernet = _cipher_cache.get(password)
     if fernet is None or not payload:
         raise DecryptionError("Password initialization error or data error!")
 
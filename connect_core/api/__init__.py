@@ -48,6 +48,7 @@ from connect_core.websockets.data_packet import (
     StatusRegistry,
     status_registry,
     PROTOCOL_VERSION,
+    MIN_PROTOCOL_VERSION,
 )
 
 # 向后兼容: 原名 DataPacket -> 现名 DataModel
@@ -101,6 +102,7 @@ __all__ = [
     "StatusRegistry",
     "status_registry",
     "PROTOCOL_VERSION",
+    "MIN_PROTOCOL_VERSION",
     # Account
     "analyze_password",
     "get_password",
@@ -271,6 +271,151 @@ class ServerConfig(BaseConfig):
         "单个 WebSocket 消息最大字节数。0 表示不限制。默认 64 MiB。"
         " / Max bytes per WebSocket message; 0 means unlimited; default 64 MiB.",
     )
+    broadcast_concurrent: bool = Field(True, "广播时是否并发发送到所有子服务器 / Send broadcasts to all sub-servers concurrently")
+    broadcast_send_timeout: float = Field(
+        5.0,
+        "广播时单个子服务器的发送超时秒数，0 表示不限制 / Per-recipient broadcast send timeout in seconds; 0 disables it",
+    )
+    broadcast_parallel_min_recipients: int = Field(
+        8,
+        "广播目标达到该数量时在编解码线程池中并行加密，0 表示始终串行"
+        " / Encrypt broadcast copies in parallel on the codec pool once there are this many recipients; 0 keeps it serial",
+    )
+    outbound_queue_max_packets: int = Field(1024, "每个子服务器发送队列的最大数据包数 / Max packets queued per sub-server connection")
+    outbound_queue_max_bytes: int = Field(
+        64 * 1024 * 1024,
+        "每个子服务器发送队列的最大字节数 / Max bytes queued per sub-server connection",
+    )
+    outbound_queue_policy: str = Field(
+        "drop_oldest",
+        "发送队列超限策略 [drop_oldest/disconnect]：丢弃最旧的非持久化数据包，或以 4008 断开慢速子服务器"
+        " / Policy when a send queue is full [drop_oldest/disconnect]: drop the oldest non-persistent packets, or close the slow peer with code 4008",
+    )
+    frame_cache_max_bytes: int = Field(
+        16 * 1024 * 1024,
+        "重发与历史重放复用的已加密帧缓存上限（字节），0 表示禁用"
+        " / Byte limit of the encoded-frame cache reused by resends and history replay; 0 disables it",
+    )
+    relay_passthrough_enabled: bool = Field(
+        True,
+        "转发 data_send 时沿用发送方的校验和，payload 只序列化一次供所有目标复用"
+        " / Relay data_send with the sender's checksum and serialize the payload once for all targets",
+    )
+    compression_enabled: bool = Field(True, "是否协商负载压缩（仅二进制信封连接） / Negotiate payload compression (binary-envelope connections only)")
+    compression_threshold: int = Field(256, "明文达到该字节数时才压缩 / Compress payloads only at or above this many plaintext bytes")
+    aead_session_enabled: bool = Field(
+        False,
+        "是否协商 AES-256-GCM 会话密钥替代逐条 Fernet 加密（仅二进制信封连接）"
+        " / Negotiate an AES-256-GCM session key instead of per-message Fernet (binary-envelope connections only)",
+    )
+    offload_threshold: int = Field(
+        256 * 1024,
+        "达到该字节数的帧在线程池中加解密与序列化，较小的帧仍在事件循环内处理"
+        " / Frames at or above this many bytes are encrypted, decrypted and (de)serialized in a worker pool; smaller frames stay inline",
+    )
+    offload_workers: int = Field(4, "编解码线程池大小，0 表示全部内联处理 / Codec worker pool size; 0 keeps all frames inline")
+    group_key_enabled: bool = Field(
+        True,
+        "是否协商广播组密钥，使中心服务器的广播只加密一次（仅二进制信封连接）"
+        " / Negotiate a broadcast group key so hub broadcasts are encrypted once (binary-envelope connections only)",
+    )
+    transport_integrity_enabled: bool = Field(
+        True,
+        "是否协商由已认证的加密传输替代逐包 payload 校验和"
+        " / Negotiate letting the authenticated transport replace per-packet payload checksums",
+    )
+    fragmentation_enabled: bool = Field(
+        True,
+        "是否协商把超大 data_send 拆分为分片发送 / Negotiate splitting oversized data_send payloads into fragments",
+    )
+    fragment_size: int = Field(
+        1024 * 1024,
+        "序列化后超过该字符数的 data_send payload 拆分为分片，0 表示不分片"
+        " / Split data_send payloads whose JSON exceeds this many characters into fragments; 0 disables splitting",
+    )
+    fragment_buffer_max_bytes: int = Field(
+        256 * 1024 * 1024,
+        "所有未完成的分片重组合计占用的缓冲上限（字节） / Combined buffer limit in bytes for all in-progress fragment reassemblies",
+    )
+    fragment_timeout: float = Field(
+        60.0,
+        "分片重组超过该秒数没有新分片即丢弃 / Drop a fragment reassembly after this many seconds without a new fragment",
+    )
+    batch_window_ms: float = Field(
+        0.0,
+        "小数据包合并窗口（毫秒），窗口内发往同一连接的数据包合并为一个加密帧，0 表示不合并"
+        " / Coalescing window in milliseconds; small packets for the same connection inside it share one encrypted frame; 0 disables it",
+    )
+    batch_max_packets: int = Field(64, "单个合并帧最多包含的数据包数 / Max packets per coalesced frame")
+    batch_max_bytes: int = Field(
+        64 * 1024,
+        "单个合并帧的明文字节上限，超过该大小的数据包不参与合并"
+        " / Plaintext byte limit per coalesced frame; larger packets bypass the window",
+    )
+    priority_weights: dict[str, int] = Field(
+        {"control": 8, "interactive": 4, "bulk": 1},
+        "各优先级通道每轮最多写入的数据包数，control 为握手、心跳与确认，interactive 为普通数据，bulk 为文件与分片"
+        " / Packets written per round for each priority lane: control (handshake, heartbeat, acks), interactive (data), bulk (files and fragments)",
+    )
+    send_window_size: int = Field(
+        32,
+        "每个对端最多保留的未确认 data_send 数量，对端支持 send_window_v1 时无需逐个等待确认"
+        " / Maximum unacknowledged data_send packets kept per peer; with send_window_v1 the sender no longer waits for each ack",
+    )
+    ack_delay_ms: float = Field(
+        5.0,
+        "对端支持 cumulative_ack_v1 时，data_sendok 最多延迟的毫秒数，期间收到的数据包合并为一个累计确认"
+        " / Milliseconds a data_sendok may be delayed when the peer supports cumulative_ack_v1; packets received meanwhile share one cumulative ack",
+    )
+    dedup_window_size: int = Field(
+        1024,
+        "每个来源记录的最近 data_send sid 数量，窗口内重复到达的数据包只回发确认、不再交给插件"
+        " / Recent data_send sids remembered per source; duplicates inside the window are acked without being redelivered",
+    )
+    retransmit_min_timeout: float = Field(
+        1.0,
+        "未确认 data_send 的最短重传超时（秒），实际超时按往返时延估算"
+        " / Minimum retransmission timeout in seconds for unacknowledged data_send; the actual timeout follows the measured round trip time",
+    )
+    retransmit_max_timeout: float = Field(
+        60.0,
+        "重传超时指数退避的上限（秒） / Upper bound in seconds for the exponentially backed-off retransmission timeout",
+    )
+    retransmit_max_retries: int = Field(
+        5,
+        "单个数据包的最大重传次数，超过后交给重连后的历史重放"
+        " / Maximum retransmissions per packet before it is left to history replay after reconnect",
+    )
+    resync_max_packets: int = Field(
+        256,
+        "ping 时最多重放的历史数据包数，超过时改为在 pong 中告知子服务器跳过这段 sid"
+        " / Maximum history packets replayed on ping; beyond it the pong tells the sub-server to skip those sids instead",
+    )
+    resync_max_bytes: int = Field(
+        1024 * 1024,
+        "ping 时重放的历史数据包 payload 字节上限，超过时同样改为跳过"
+        " / Byte limit for replayed history payloads on ping; beyond it the sids are skipped as well",
+    )
+    resync_max_age: float = Field(
+        300.0,
+        "超过该秒数的历史数据包不再重放 / History packets older than this many seconds are not replayed",
+    )
+    resync_ttls: dict[str, float] = Field(
+        {
+            "registered": 0.0,
+            "register_error": 0.0,
+            "logined": 0.0,
+            "login_error": 0.0,
+            "new_login": 60.0,
+            "del_login": 60.0,
+        },
+        "按数据包类型设置的重放过期秒数，0 表示从不重放，未列出的类型使用 resync_max_age"
+        " / Replay expiry in seconds per packet type; 0 never replays, unlisted types use resync_max_age",
+    )
+    resync_batch_size: int = Field(
+        32,
+        "对端支持 batch_v1 时每个重放帧包含的数据包数 / Packets per replay frame when the peer supports batch_v1",
+    )
 
 
 class ClientConfig(BaseConfig):
@@ -287,3 +432,74 @@ class ClientConfig(BaseConfig):
         "单个 WebSocket 消息最大字节数。0 表示不限制。默认 64 MiB。"
         " / Max bytes per WebSocket message; 0 means unlimited; default 64 MiB.",
     )
+    compression_enabled: bool = Field(True, "是否协商负载压缩（仅二进制信封连接） / Negotiate payload compression (binary-envelope connections only)")
+    compression_threshold: int = Field(256, "明文达到该字节数时才压缩 / Compress payloads only at or above this many plaintext bytes")
+    aead_session_enabled: bool = Field(
+        False,
+        "是否协商 AES-256-GCM 会话密钥替代逐条 Fernet 加密（仅二进制信封连接）"
+        " / Negotiate an AES-256-GCM session key instead of per-message Fernet (binary-envelope connections only)",
+    )
+    offload_threshold: int = Field(
+        256 * 1024,
+        "达到该字节数的帧在线程池中加解密与序列化，较小的帧仍在事件循环内处理"
+        " / Frames at or above this many bytes are encrypted, decrypted and (de)serialized in a worker pool; smaller frames stay inline",
+    )
+    offload_workers: int = Field(4, "编解码线程池大小，0 表示全部内联处理 / Codec worker pool size; 0 keeps all frames inline")
+    group_key_enabled: bool = Field(
+        True,
+        "是否协商广播组密钥，使中心服务器的广播只加密一次（仅二进制信封连接）"
+        " / Negotiate a broadcast group key so hub broadcasts are encrypted once (binary-envelope connections only)",
+    )
+    transport_integrity_enabled: bool = Field(
+        True,
+        "是否协商由已认证的加密传输替代逐包 payload 校验和"
+        " / Negotiate letting the authenticated transport replace per-packet payload checksums",
+    )
+    fragmentation_enabled: bool = Field(
+        True,
+        "是否协商把超大 data_send 拆分为分片发送 / Negotiate splitting oversized data_send payloads into fragments",
+    )
+    fragment_size: int = Field(
+        1024 * 1024,
+        "序列化后超过该字符数的 data_send payload 拆分为分片，0 表示不分片"
+        " / Split data_send payloads whose JSON exceeds this many characters into fragments; 0 disables splitting",
+    )
+    fragment_buffer_max_bytes: int = Field(
+        256 * 1024 * 1024,
+        "所有未完成的分片重组合计占用的缓冲上限（字节） / Combined buffer limit in bytes for all in-progress fragment reassemblies",
+    )
+    fragment_timeout: float = Field(
+        60.0,
+        "分片重组超过该秒数没有新分片即丢弃 / Drop a fragment reassembly after this many seconds without a new fragment",
+    )
+    batch_window_ms: float = Field(
+        0.0,
+        "小数据包合并窗口（毫秒），窗口内发往同一连接的数据包合并为一个加密帧，0 表示不合并"
+        " / Coalescing window in milliseconds; small packets for the same connection inside it share one encrypted frame; 0 disables it",
+    )
+    batch_max_packets: int = Field(64, "单个合并帧最多包含的数据包数 / Max packets per coalesced frame")
+    batch_max_bytes: int = Field(
+        64 * 1024,
+        "单个合并帧的明文字节上限，超过该大小的数据包不参与合并"
+        " / Plaintext byte limit per coalesced frame; larger packets bypass the window",
+    )
+    priority_weights: dict[str, int] = Field(
+        {"control": 8, "interactive": 4, "bulk": 1},
+        "各优先级通道每轮最多写入的数据包数，control 为握手、心跳与确认，interactive 为普通数据，bulk 为文件与分片"
+        " / Packets written per round for each priority lane: control (handshake, heartbeat, acks), interactive (data), bulk (files and fragments)",
+    )
+    send_window_size: int = Field(
+        32,
+        "每个对端最多保留的未确认 data_send 数量，对端支持 send_window_v1 时无需逐个等待确认"
+        " / Maximum unacknowledged data_send packets kept per peer; with send_window_v1 the sender no longer waits for each ack",
+    )
+    ack_delay_ms: float = Field(
+        5.0,
+        "对端支持 cumulative_ack_v1 时，data_sendok 最多延迟的毫秒数，期间收到的数据包合并为一个累计确认"
+        " / Milliseconds a data_sendok may be delayed when the peer supports cumulative_ack_v1; packets received meanwhile share one cumulative ack",
+    )
+    dedup_window_size: int = Field(
+        1024,
+        "每个来源记录的最近 data_send sid 数量，窗口内重复到达的数据包只回发确认、不再交给插件"
+        " / Recent data_send sids remembered per source; duplicates inside the window are acked without being redelivered",
+    )
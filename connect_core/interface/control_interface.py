@@ -348,7 +348,14 @@ class PluginControlInterface(CoreControlInterface):
         self.language_file = YmlLanguage(path=self.self_path, sid=self.sid, lang=plugin_lang)
         self.command_control = self.CommandControl(self.sid)
 
-    def send_data(self, server_id: str, plugin_id: str, data: dict) -> None:
+    def send_data(
+        self,
+        server_id: str,
+        plugin_id: str,
+        data: dict,
+        urgent: bool = False,
+        priority: Optional[str] = None,
+    ) -> None:
         """
         向指定的服务器发送消息。
 
@@ -356,15 +363,23 @@ class PluginControlInterface(CoreControlInterface):
             server_id: 目标服务器ID
             plugin_id: 目标插件ID
             data: 要发送的数据
+            urgent: 对延迟敏感的消息跳过合并窗口立即发送
+            priority: 发送优先级 ``control`` / ``interactive`` / ``bulk``，默认 ``interactive``
+
+        Raises:
+            ValueError: 未知的发送优先级
         """
+        from connect_core.websockets.lanes import validate
+
+        validate(priority)
         if self.is_server:
             from connect_core.websockets.server import send_data as server_send_data
 
-            server_send_data("-----", self.sid, server_id, plugin_id, data)
+            server_send_data("-----", self.sid, server_id, plugin_id, data, urgent, priority)
         else:
             from connect_core.websockets.client import send_data as client_send_data
 
-            client_send_data(self.sid, server_id, plugin_id, data)
+            client_send_data(self.sid, server_id, plugin_id, data, urgent, priority)
 
     def send_file(
         self, server_id: str, plugin_id: str, file_path: str, save_path: str
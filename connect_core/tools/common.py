@@ -8,6 +8,8 @@ import random
 import string
 from typing import Any, Optional
 
+from connect_core.tools.json_codec import canonical_dumps
+
 try:  # pragma: no cover - optional dependency
     from cryptography.fernet import Fernet
 except ImportError:  # pragma: no cover - fallback when cryptography is unavailable
@@ -31,7 +33,7 @@ def generate_md5_checksum(data: Any) -> str:
     """Return the SHA-256 checksum for arbitrary serialisable data."""
 
     if isinstance(data, (dict, list)):
-        encoded = json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        encoded = canonical_dumps(data)
     elif isinstance(data, str):
         encoded = data.encode("utf-8")
     elif isinstance(data, bytes):
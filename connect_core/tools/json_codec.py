@@ -0,0 +1,108 @@
+"""JSON 编解码抽象：安装了 orjson / msgspec 时使用其快速路径，否则回退到标准库。
+
+线上格式只要求可被任意 JSON 解析器读取，因此 :func:`dumps` 可以输出紧凑格式；
+:func:`canonical_dumps` 用于校验和，必须与历史版本逐字节一致，始终由标准库生成。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - fallback when orjson is unavailable
+    orjson = None  # type: ignore[assignment]
+
+try:  # pragma: no cover - optional dependency
+    import msgspec
+except ImportError:  # pragma: no cover - fallback when msgspec is unavailable
+    msgspec = None  # type: ignore[assignment]
+
+__all__ = [
+    "available_backends",
+    "backend_name",
+    "canonical_dumps",
+    "dumps",
+    "dumps_str",
+    "loads",
+    "use_backend",
+]
+
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[bytes | str], Any]
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode("utf-8")
+
+
+def _std_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+def _backends() -> Dict[str, Tuple[Encoder, Decoder]]:
+    backends: Dict[str, Tuple[Encoder, Decoder]] = {}
+    if orjson is not None:
+        backends["orjson"] = (
+            lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            orjson.loads,
+        )
+    if msgspec is not None:
+        backends["msgspec"] = (msgspec.json.encode, msgspec.json.decode)
+    backends["json"] = (_std_dumps, _std_loads)
+    return backends
+
+
+_BACKENDS = _backends()
+_name, (_encode, _decode) = next(iter(_BACKENDS.items()))
+
+
+def available_backends() -> list[str]:
+    return list(_BACKENDS)
+
+
+def backend_name() -> str:
+    """返回当前使用的 JSON 后端名称。"""
+    return _name
+
+
+def use_backend(name: str) -> None:
+    """切换 JSON 后端；后端未安装时抛出 ``ValueError``。"""
+    global _name, _encode, _decode
+    if name not in _BACKENDS:
+        raise ValueError(f"JSON backend not available: {name}")
+    _name = name
+    _encode, _decode = _BACKENDS[name]
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 字节；快速后端不支持的值（如超大整数、NaN）回退到标准库。"""
+    if _encode is _std_dumps:
+        return _std_dumps(obj)
+    try:
+        return _encode(obj)
+    except (TypeError, ValueError, OverflowError):
+        return _std_dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """解析 JSON；输入非法时抛出 :class:`json.JSONDecodeError`。"""
+    if isinstance(data, (bytearray, memoryview)):
+        data = bytes(data)
+    if _decode is _std_loads:
+        return _std_loads(data)
+    try:
+        return _decode(data)
+    except Exception:
+        # 快速后端拒绝的输入（如 NaN）交给标准库，非法输入由其抛出标准异常
+        return _std_loads(data)
+
+
+def canonical_dumps(obj: Any) -> bytes:
+    """校验和使用的规范化序列化，与历史版本逐字节一致。"""
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True).encode("utf-8")
@@ -0,0 +1,120 @@
+"""``data_send`` 的累计确认与延迟确认。
+
+双方协商了 ``cumulative_ack_v1`` 时，接收方不再为每个 ``data_send`` 立即回发 ``data_sendok``，
+而是在 ``ack_delay_ms`` 毫秒内合并为一个 ``{"upto": N}``，表示已收到 sid 不超过 N 的所有数据包。
+延迟期间本端向同一对端发送可合并的数据包时，确认搭载在同一个批量帧中发出。
+
+同一连接按序传输，乱序只来自重发：sid 不大于已收到最大 sid 的数据包（重发或重复）立即以
+``{"sid": N}`` 单独确认，发送方收到 ``data_error`` 后的重发因此总能得到精确的确认。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+DEFAULT_ACK_DELAY_MS = 5.0
+
+
+def configured_delay(config: Any) -> float:
+    """读取配置中的确认延迟（秒），负数或非法值视为不延迟。"""
+    delay = getattr(config, "ack_delay_ms", DEFAULT_ACK_DELAY_MS)
+    if not isinstance(delay, (int, float)) or delay < 0:
+        return 0.0
+    return delay / 1000
+
+
+def cumulative_payload(upto: int) -> Dict[str, int]:
+    return {"upto": upto}
+
+
+def acked_through(payload: Any) -> Optional[int]:
+    """从 ``data_sendok`` 的 payload 中取出累计确认的 sid，单独确认或旧协议返回 ``None``。"""
+    if not isinstance(payload, dict):
+        return None
+    upto = payload.get("upto")
+    return upto if isinstance(upto, int) and not isinstance(upto, bool) else None
+
+
+class DelayedAcks:
+    """按对端合并待发送的累计确认，延迟到期后交给 ``flush`` 发送。"""
+
+    def __init__(self, flush: Callable[[str, int], Awaitable[None]], delay: float) -> None:
+        self._flush = flush
+        self.delay = max(0.0, delay)
+        self._highest: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Future[None]] = set()
+        self.deferred = 0
+        self.immediate = 0
+        self.cumulative = 0
+        self.piggybacked = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "deferred": self.deferred,
+            "immediate": self.immediate,
+            "cumulative": self.cumulative,
+            "piggybacked": self.piggybacked,
+        }
+
+    def defer(self, peer: str, sid: int) -> bool:
+        """登记校验通过的 *sid*；按序到达时延迟确认并返回 ``True``。
+
+        迟到或重复的 sid 返回 ``False``，调用方应立即单独确认。
+        """
+        highest = self._highest.get(peer)
+        if highest is not None and sid <= highest:
+            self.immediate += 1
+            return False
+        self._highest[peer] = sid
+        self._pending[peer] = sid
+        self.deferred += 1
+        if peer not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[peer] = loop.call_later(self.delay, self._expire, peer)
+        return True
+
+    def seen(self, peer: str, sid: int) -> None:
+        """登记校验失败的 *sid*，使它的重发按迟到处理并得到单独确认。"""
+        self._highest[peer] = max(self._highest.get(peer, sid), sid)
+
+    def take(self, peer: str) -> Optional[int]:
+        """取出待发送的累计确认，供调用方搭载在即将发出的数据上。"""
+        upto = self._pending.pop(peer, None)
+        timer = self._timers.pop(peer, None)
+        if timer is not None:
+            timer.cancel()
+        if upto is not None:
+            self.piggybacked += 1
+        return upto
+
+    def forget(self, peer: str) -> None:
+        """连接关闭或重新登录时丢弃该对端的状态，新连接的 sid 可能重新编号。"""
+        self._highest.pop(peer, None)
+        self._pending.pop(peer, None)
+        timer = self._timers.pop(peer, None)
+        if timer is not None:
+            timer.cancel()
+
+    def close(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+        self._highest.clear()
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
+
+    def _expire(self, peer: str) -> None:
+        self._timers.pop(peer, None)
+        upto = self._pending.pop(peer, None)
+        if upto is None:
+            return
+        self.cumulative += 1
+        task = asyncio.ensure_future(self._flush(peer, upto))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
@@ -0,0 +1,142 @@
+"""同一连接上小数据包的微批量合并。
+
+协商了 ``batch_v1`` 的连接上，发往同一对端的小数据包先在 :class:`Coalescer` 中停留
+``batch_window_ms`` 毫秒，窗口到期或达到数量/字节上限时把已序列化的明文拼成一个
+JSON 数组，只加密一次、作为一个 WebSocket 帧发出；接收方的 ``parse_msg`` 逐个拆开处理。
+窗口内只有一个数据包时仍按普通单包帧发送。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from connect_core.websockets.lanes import PRIORITY_INTERACTIVE, priority_of
+from connect_core.websockets.offload import exceeds
+from connect_core.websockets.outbound import OutboundFrame
+
+DEFAULT_BATCH_MAX_PACKETS = 64
+DEFAULT_BATCH_MAX_BYTES = 64 * 1024
+
+# 批量帧在发送队列与压缩统计中的类型名
+BATCH_TYPE = "batch"
+
+
+def batchable(packet: Dict[str, Any], max_bytes: int) -> bool:
+    """*packet* 是否可以放入合并窗口：属于 ``interactive`` 通道且估算大小不超过 *max_bytes*。
+
+    批量帧固定走 ``interactive`` 通道；握手、控制与确认包以及文件、分片等大帧各自走
+    ``control`` / ``bulk`` 通道，不参与合并，以保证每个通道内的发送顺序。
+    """
+    return priority_of(packet.get("type")) == PRIORITY_INTERACTIVE and not exceeds(
+        packet, max_bytes
+    )
+
+
+def rides_along(packet: Dict[str, Any], coalescer: "Coalescer") -> bool:
+    """累计确认在合并窗口中已有数据包时搭载进同一批次，不单独成帧。"""
+    payload = packet.get("payload")
+    return (
+        coalescer.depth > 0
+        and packet.get("type") == "data_sendok"
+        and isinstance(payload, dict)
+        and "upto" in payload
+    )
+
+
+def pack(frames: Sequence[OutboundFrame]) -> bytes:
+    """把已序列化的数据包拼成批量明文；只有一个数据包时原样返回。"""
+    if len(frames) == 1:
+        return frames[0].data  # type: ignore[return-value]
+    return b"[" + b",".join(frame.data for frame in frames) + b"]"  # type: ignore[misc]
+
+
+class Coalescer:
+    """单个连接的合并窗口，收集明文 :class:`OutboundFrame` 并交给 ``sink`` 一次加密发送。
+
+    第一个数据包进入时开始计时，``window`` 秒后或达到 ``max_packets`` / ``max_bytes``
+    时冲刷；不参与合并的数据包发送前应先 ``await flush()``，以保持发送顺序。
+    达到上限时当前批次立即截断并排入待发队列，批次大小不会超过上限。
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[OutboundFrame]], Awaitable[None]],
+        *,
+        window: float,
+        max_packets: int = DEFAULT_BATCH_MAX_PACKETS,
+        max_bytes: int = DEFAULT_BATCH_MAX_BYTES,
+    ) -> None:
+        self._sink = sink
+        self.window = max(0.0, window)
+        self.max_packets = max(1, max_packets)
+        self.max_bytes = max(1, max_bytes)
+        self._pending: List[OutboundFrame] = []
+        self._bytes = 0
+        # 已截断、等待交给 sink 的批次，按截断顺序发送
+        self._ready: deque[List[OutboundFrame]] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Future[None]] = set()
+        self.batches = 0
+        self.packets = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending) + sum(len(batch) for batch in self._ready)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": self.depth, "batches": self.batches, "packets": self.packets}
+
+    def add(self, frame: OutboundFrame) -> None:
+        """放入一个已序列化的数据包，按窗口或上限安排冲刷。"""
+        self._pending.append(frame)
+        self._bytes += frame.size
+        if len(self._pending) >= self.max_packets or self._bytes >= self.max_bytes:
+            self._cut()
+            self._spawn(self._drain())
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._on_timer)
+
+    async def flush(self) -> None:
+        """立即发出窗口内的数据包。"""
+        self._cut()
+        await self._drain()
+
+    def close(self) -> None:
+        """丢弃未发出的数据包并取消计时，连接关闭时调用。"""
+        self._cancel_timer()
+        self._pending.clear()
+        self._ready.clear()
+        self._bytes = 0
+        for task in self._tasks:
+            task.cancel()
+
+    def _cut(self) -> None:
+        self._cancel_timer()
+        if self._pending:
+            self._ready.append(self._pending)
+            self._pending, self._bytes = [], 0
+
+    async def _drain(self) -> None:
+        async with self._lock:
+            while self._ready:
+                batch = self._ready.popleft()
+                self.batches += 1
+                self.packets += len(batch)
+                await self._sink(batch)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._spawn(self.flush())
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import os
 import sys
 import threading
 from concurrent.futures import Future
-from typing import Any, Awaitable, Dict, Optional, TYPE_CHECKING
+from typing import Any, Awaitable, Dict, List, Optional, TYPE_CHECKING
 
 import websockets
 from websockets.client import WebSocketClientProtocol  # type: ignore[attr-defined]
@@ -16,15 +15,44 @@ from websockets.exceptions import (
     ConnectionClosedOK,
 )
 
-from connect_core.aes_encrypt import aes_decrypt, aes_encrypt
+from connect_core.aes_encrypt import (
+    SESSION_NONCE_SIZE,
+    SessionCipher,
+    aes_decrypt,
+    aes_encrypt,
+)
 from connect_core.plugin.init_plugin import disconnected, websockets_started
+from connect_core.tools import json_codec
 from connect_core.tools.common import get_file_hash
+from connect_core.websockets import acks, batching, fragments, lanes, send_window
+from connect_core.websockets.compression import Compressor
+from connect_core.websockets.group_key import GroupKeyring
+from connect_core.websockets.outbound import OutboundFrame
+from connect_core.websockets.offload import (
+    DEFAULT_OFFLOAD_THRESHOLD,
+    DEFAULT_OFFLOAD_WORKERS,
+    CodecPool,
+)
 from connect_core.websockets.data_packet import (
+    Capability,
     ClientDataPacket,
     PacketType,
+    MIN_PROTOCOL_VERSION,
     PROTOCOL_VERSION,
     DEFAULT_SERVER,
     DEFAULT_TEMP,
+    encode_session_nonce,
+    ensure_checksum,
+    local_capabilities,
+)
+from connect_core.websockets.envelope import (
+    FLAG_COMPRESSED,
+    FLAG_GROUP,
+    FRAME_ENVELOPE,
+    FRAME_JSON,
+    classify_frame,
+    decode_envelope,
+    encode_envelope,
 )
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -38,7 +66,11 @@ websocket_client: Optional["WebsocketClient"] = None
 class WebsocketClient:
     """WebSocket 客户端，实现子服务器与主服务器之间的数据通讯。"""
 
-    def __init__(self, control_interface: "CoreControlInterface") -> None:
+    def __init__(
+        self,
+        control_interface: "CoreControlInterface",
+        carried: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
         self._control = control_interface
         raw_config = control_interface.get_config()
         if not isinstance(raw_config, dict):
@@ -61,7 +93,38 @@ class WebsocketClient:
         self._keepalive_task: Optional[asyncio.Task[None]] = None
 
         self.server_id: Optional[str] = None
+        # 登录成功后由 LOGINED 下发的协商能力
+        self.capabilities: set[str] = set()
+        # 登录成功后协商出的协议版本
+        self.protocol_version: int = PROTOCOL_VERSION
+        # 协商 AEAD 会话后用于替代 Fernet 的会话密钥
+        self.session_nonce: Optional[bytes] = None
+        self.session: Optional[SessionCipher] = None
+        # 中心服务器广播使用的组密钥，按纪元保存
+        self.group_keys = GroupKeyring()
+        self.compressor = Compressor(
+            getattr(control_interface.config, "compression_threshold", 256)
+        )
+        self.codec = CodecPool(
+            getattr(control_interface.config, "offload_workers", DEFAULT_OFFLOAD_WORKERS),
+            getattr(control_interface.config, "offload_threshold", DEFAULT_OFFLOAD_THRESHOLD),
+            "WebsocketClientCodec",
+        )
+        # 协商了 batch_v1 且启用合并窗口时的小数据包合并器
+        self._coalescer: Optional[batching.Coalescer] = None
+        # 并发写入 socket 时按优先级通道放行，文件分块不阻塞聊天与控制数据包
+        self.write_gate = lanes.WriteGate(lanes.configured_weights(control_interface.config))
         self.last_data_packet: Optional[Dict[str, Dict[str, Any]]] = None
+        # 协商了 send_window_v1 时保存所有未确认的 data_send
+        self.send_window = send_window.SendWindow(
+            send_window.configured_size(control_interface.config)
+        )
+        # 上一个连接上未确认的 data_send，登录后重新编号发送
+        self._carried: List[Dict[str, Any]] = list(carried or [])
+        # 协商了 cumulative_ack_v1 时延迟合并发往中心服务器的确认
+        self.acks = acks.DelayedAcks(
+            self._flush_ack, acks.configured_delay(control_interface.config)
+        )
         self.data_packet = ClientDataPacket(control_interface, self)
 
         self.loop = asyncio.new_event_loop()
@@ -69,11 +132,20 @@ class WebsocketClient:
         self._keepalive_started = False
 
     # ===== 生命周期 =====
+    def _max_packet_size(self) -> Optional[int]:
+        max_size = getattr(self._control.config, "max_packet_size", 64 * 1024 * 1024)
+        if not isinstance(max_size, int) or max_size <= 0:
+            return None  # 不限制
+        return max_size
+
     def _run_loop(self) -> None:
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
 
     def start_server(self) -> None:
+        self._control.info(
+            self._control.tr("net_core.service.json_codec", json_codec.backend_name())
+        )
         self.loop_thread = threading.Thread(target=self._run_loop, daemon=True)
         self.loop_thread.start()
         asyncio.run_coroutine_threadsafe(self._init_main(), self.loop)
@@ -120,6 +192,7 @@ class WebsocketClient:
 
         if self.loop_thread and not in_loop_thread:
             self.loop_thread.join(timeout=3)
+        self.codec.shutdown()
 
         self.finish_close = True
 
@@ -129,10 +202,9 @@ class WebsocketClient:
             while True:
                 try:
                     uri = f"ws://{self.host}:{self.port}"
-                    max_size = getattr(self._control.config, "max_packet_size", 64 * 1024 * 1024)
-                    if not isinstance(max_size, int) or max_size <= 0:
-                        max_size = None  # 不限制
-                    self.websocket = await websockets.connect(uri, max_size=max_size)
+                    self.websocket = await websockets.connect(
+                        uri, max_size=self._max_packet_size()
+                    )
                     self.finish_start = True
                     self._control.info(
                         self._control.tr("net_core.service.connect_websocket", "")
@@ -148,11 +220,11 @@ class WebsocketClient:
             self._control.info(self._control.tr("net_core.service.stop_websocket"))
 
     # ===== 接收数据 =====
-    async def _get_recv(self) -> Optional[bytes]:
+    async def _get_recv(self) -> Optional[bytes | str]:
         while True:
             try:
-                message = await asyncio.wait_for(self.websocket.recv(), timeout=4)  # type: ignore[union-attr]
-                return message if isinstance(message, bytes) else message.encode()
+                # 保持原始帧类型（二进制为 bytes，文本为 str），由 _decode_frame 按首字节分类
+                return await asyncio.wait_for(self.websocket.recv(), timeout=4)  # type: ignore[union-attr, no-any-return]
             except asyncio.TimeoutError:
                 continue
             except ConnectionClosed as closed:
@@ -176,9 +248,13 @@ class WebsocketClient:
                     + f" code={code} reason={reason}"
                 )
                 self._keepalive_started = False
+                self._close_coalescer()
+                self.acks.close()
+                # 重连会创建新的客户端实例，旧实例的编解码线程池不再使用
+                self.codec.shutdown()
                 disconnected()
                 if _control_interface is not None:
-                    websocket_client_main(_control_interface)
+                    websocket_client_main(_control_interface, self.unacked_data_sends())
                 return None
 
     async def _receive(self) -> None:
@@ -193,7 +269,11 @@ class WebsocketClient:
                 PacketType.REGISTER,
                 DEFAULT_SERVER,
                 DEFAULT_TEMP,
-                {"path": sys.argv[0], "protocol_version": PROTOCOL_VERSION},
+                {
+                    "path": sys.argv[0],
+                    "protocol_version": PROTOCOL_VERSION,
+                    "min_protocol_version": MIN_PROTOCOL_VERSION,
+                },
             )
             self._control.debug("[WS][HANDSHAKE] account=-----", level=3)
             await self.send(register_packet)
@@ -233,36 +313,70 @@ class WebsocketClient:
         self._control.debug(
             f"[FLOW][LOGIN] start account={account} reason={reason}", level=2
         )
+        # 每次登录重新协商能力与会话密钥
+        capabilities = local_capabilities(self._control.config)
+        self._close_coalescer()
+        self.capabilities = set()
+        self.protocol_version = PROTOCOL_VERSION
+        self.session = None
+        self.session_nonce = None
+        self.group_keys.clear()
+        payload: Dict[str, Any] = {
+            "path": sys.argv[0],
+            "protocol_version": PROTOCOL_VERSION,
+            "min_protocol_version": MIN_PROTOCOL_VERSION,
+            "capabilities": capabilities,
+        }
+        if Capability.AEAD_SESSION.value in capabilities:
+            self.session_nonce = os.urandom(SESSION_NONCE_SIZE)
+            payload["session_nonce"] = encode_session_nonce(self.session_nonce)
         login_packet = self.data_packet.get_data_packet(
             PacketType.LOGIN,
             DEFAULT_SERVER,
             (account, "system"),
-            {"path": sys.argv[0], "protocol_version": PROTOCOL_VERSION},
+            payload,
         )
         self._control.debug(f"[WS][HANDSHAKE] account={account}", level=3)
         await self.send(login_packet)
 
-    async def _decode_payload(self, raw: bytes) -> Optional[Dict[str, Any]]:
+    async def _decode_payload(self, raw: bytes | str) -> Optional[Dict[str, Any]]:
         try:
-            decoded = raw.decode()
-            if decoded.startswith("{"):
-                return json.loads(decoded)  # type: ignore[no-any-return]
-        except UnicodeDecodeError:
-            pass
-
-        try:
-            decrypted = aes_decrypt(raw)
-            return json.loads(decrypted.decode())  # type: ignore[no-any-return]
+            return await self.codec.run(len(raw), self._decode_frame, raw)
         except Exception as exc:
             self._control.logger.error(f"Failed to decode payload: {exc}")
             return None
 
+    def _decode_frame(self, raw: bytes | str) -> Dict[str, Any]:
+        kind = classify_frame(raw)
+        if kind == FRAME_ENVELOPE and isinstance(raw, bytes):
+            flags, decrypted = decode_envelope(
+                raw, None, self._max_packet_size(), self.session, self.group_keys
+            )
+            packet = json_codec.loads(decrypted)
+            if flags & FLAG_GROUP:
+                # 组广播共用一份密文，各成员的 sid 记录在 sids 中
+                sid = (packet.pop("sids", None) or {}).get(self.server_id)
+                if sid is None:
+                    raise ValueError("Group frame is not addressed to this server")
+                packet["sid"] = sid
+            return packet  # type: ignore[no-any-return]
+        if kind == FRAME_JSON:
+            return json_codec.loads(raw)  # type: ignore[no-any-return]
+        return json_codec.loads(aes_decrypt(raw))  # type: ignore[no-any-return]
+
     # ===== 发送数据 =====
     async def send(
         self,
         data: Dict[str, Dict[str, Any]] | Dict[str, Any],
         account: Optional[str] = None,
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
     ) -> None:
+        """加密并发送单个数据包。
+
+        *urgent* 为真时跳过合并窗口立即发送；*priority* 覆盖按数据包类型决定的优先级通道。
+        """
         if not self.websocket:
             return
 
@@ -279,22 +393,162 @@ class WebsocketClient:
             return
 
         account = account or self.config.get("account", "")
+        packet = ensure_checksum(
+            packet, Capability.TRANSPORT_INTEGRITY.value in self.capabilities
+        )
         self._control.debug(
             f"[S][{packet['type']}][{packet['from']} -> {packet['to']}({account})][{packet['sid']}] {packet.get('payload')}",
             level=1,
         )
 
+        lane = lanes.priority_of(packet["type"], priority)
         try:
-            encrypted = aes_encrypt(json.dumps(packet).encode()).decode()
-            message = json.dumps({"account": account, "data": encrypted})
-            self._control.debug(f"[WS][RAW] send={message!r}", level=3)
-            await self.websocket.send(message)
+            coalescer = self._batch_coalescer(account)
+            if coalescer is not None:
+                if not urgent and (
+                    (lane == lanes.PRIORITY_INTERACTIVE and batching.batchable(packet, coalescer.max_bytes))
+                    or (priority is None and batching.rides_along(packet, coalescer))
+                ):
+                    coalescer.add(self._batch_frame(packet))
+                    self._piggyback_ack(coalescer)
+                    return
+                # 先发出窗口内已合并的数据包，保持发送顺序
+                await coalescer.flush()
+            outbound = await self.codec.run_for_packet(
+                packet, self._encode_message, packet, account
+            )
+            async with self.write_gate.slot(lane):
+                # 会话帧在获得写入权后才加密，计数器按写出顺序递增
+                message = outbound.wire()
+                self._control.debug(f"[WS][RAW] send={message!r}", level=3)
+                await self.websocket.send(message)
+            self._mark_written(outbound)
         except (ConnectionClosedError, ConnectionClosedOK):
             pass
 
+    def _mark_written(self, frame: OutboundFrame) -> None:
+        """*frame* 已写入连接，其中的 ``data_send`` 此后才接受累计确认。"""
+        if frame.packet_type == PacketType.DATA_SEND.value and frame.sid is not None:
+            self.send_window.written(frame.sid)
+
+    def _encode_message(self, packet: Dict[str, Any], account: str) -> OutboundFrame:
+        packet_type = str(getattr(packet["type"], "value", packet["type"]))
+        if (
+            Capability.BINARY_ENVELOPE.value in self.capabilities
+            and account == self.server_id
+        ):
+            # 账户已在登录时绑定到连接，直接发送二进制信封
+            return self._seal(
+                OutboundFrame(json_codec.dumps(packet), packet_type, True, sid=packet.get("sid"))
+            )
+        encrypted = aes_encrypt(json_codec.dumps(packet)).decode()
+        return OutboundFrame(
+            json_codec.dumps_str({"account": account, "data": encrypted}),
+            packet_type,
+            True,
+            sid=packet.get("sid"),
+        )
+
+    def _seal(self, frame: OutboundFrame) -> OutboundFrame:
+        """压缩并加密 *frame*；有会话密钥时加密留给 :meth:`OutboundFrame.wire`。"""
+        plaintext = frame.data if isinstance(frame.data, bytes) else frame.data.encode()
+        flags = 0
+        if Capability.COMPRESSION.value in self.capabilities:
+            plaintext, compressed = self.compressor.maybe_compress(plaintext, frame.packet_type)
+            if compressed:
+                flags |= FLAG_COMPRESSED
+        if self.session is not None:
+            frame.data = plaintext
+            return frame.seal_later(self.session, flags)
+        frame.data = encode_envelope(plaintext, None, flags)
+        return frame
+
+    def _batch_coalescer(self, account: str) -> Optional[batching.Coalescer]:
+        """登录后协商了 ``batch_v1`` 且启用合并窗口时返回合并器。"""
+        window = getattr(self._control.config, "batch_window_ms", 0.0)
+        if (
+            not window
+            or window <= 0
+            or account != self.server_id
+            or Capability.BATCHING.value not in self.capabilities
+        ):
+            return None
+        if self._coalescer is None:
+            config = self._control.config
+            self._coalescer = batching.Coalescer(
+                self._send_batch,
+                window=window / 1000,
+                max_packets=getattr(
+                    config, "batch_max_packets", batching.DEFAULT_BATCH_MAX_PACKETS
+                ),
+                max_bytes=getattr(config, "batch_max_bytes", batching.DEFAULT_BATCH_MAX_BYTES),
+            )
+        return self._coalescer
+
+    async def _send_batch(self, batch: list[OutboundFrame]) -> None:
+        """把合并窗口内的明文拼成一个帧，加密一次后发送。"""
+        if not self.websocket:
+            return
+        packet_type = batch[0].packet_type if len(batch) == 1 else batching.BATCH_TYPE
+        try:
+            frame = self._seal(OutboundFrame(batching.pack(batch), packet_type, True))
+            async with self.write_gate.slot(lanes.PRIORITY_INTERACTIVE):
+                await self.websocket.send(frame.wire())
+            for item in batch:
+                self._mark_written(item)
+        except (ConnectionClosedError, ConnectionClosedOK):
+            pass
+        except Exception as exc:
+            self._control.logger.warning(f"Failed to send batch of {len(batch)} packets: {exc}")
+
+    @staticmethod
+    def _batch_frame(packet: Dict[str, Any]) -> OutboundFrame:
+        return OutboundFrame(
+            json_codec.dumps(packet),
+            str(getattr(packet["type"], "value", packet["type"])),
+            True,
+            sid=packet.get("sid"),
+        )
+
+    def _piggyback_ack(self, coalescer: batching.Coalescer) -> None:
+        """把待发送的累计确认放进同一合并窗口，随即将发出的数据一起成帧。"""
+        upto = self.acks.take(DEFAULT_SERVER[0])
+        if upto is None or not self.server_id:
+            return
+        ack = self.data_packet.get_data_packet(
+            PacketType.DATA_SENDOK,
+            DEFAULT_SERVER,
+            (self.server_id, "system"),
+            acks.cumulative_payload(upto),
+        )[DEFAULT_TEMP[0]]
+        coalescer.add(
+            self._batch_frame(
+                ensure_checksum(ack, Capability.TRANSPORT_INTEGRITY.value in self.capabilities)
+            )
+        )
+
+    async def _flush_ack(self, _peer: str, upto: int) -> None:
+        if not self.server_id:
+            return
+        await self.send(
+            self.data_packet.get_data_packet(
+                PacketType.DATA_SENDOK,
+                DEFAULT_SERVER,
+                (self.server_id, "system"),
+                acks.cumulative_payload(upto),
+            )
+        )
+
+    def _close_coalescer(self) -> None:
+        if self._coalescer is not None:
+            self._coalescer.close()
+            self._coalescer = None
+
     async def _trigger_websocket_client(self) -> None:
         if self.last_data_packet:
             await self.send(self.last_data_packet)
+        for packet in self.send_window.resend_all():
+            await self.send(packet)
         if self.server_id:
             await self.send(
                 self.data_packet.get_data_packet(
@@ -305,6 +559,27 @@ class WebsocketClient:
                 )
             )
 
+    def unacked_data_sends(self) -> List[Dict[str, Any]]:
+        """按发送顺序返回尚未确认的 ``data_send``，供重连后的新实例重发。"""
+        pending = [packet[DEFAULT_TEMP[0]] for _, packet in self.send_window.unacked()]
+        if self.last_data_packet is not None:
+            pending.append(self.last_data_packet[DEFAULT_TEMP[0]])
+        return self._carried + pending
+
+    async def resend_carried(self) -> None:
+        """登录完成后重发上一个连接上未确认的 ``data_send``。
+
+        中心服务器为新连接重新编号，这些数据包按当前连接的 sid 重新生成并登记到发送窗口。
+        """
+        carried, self._carried = self._carried, []
+        for packet in carried:
+            to_info, from_info = packet["to"], packet["from"]
+            await self._send_data_send(
+                (to_info[0], to_info[1]),
+                (str(self.server_id), from_info[1]),
+                packet.get("payload") or {},
+            )
+
     def start_keepalive(self) -> None:
         if not self._keepalive_started:
             self._keepalive_task = asyncio.create_task(self._keepalive_loop())
@@ -317,6 +592,9 @@ class WebsocketClient:
         t_server_id: str,
         t_plugin_id: str,
         data: Dict[str, Any],
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
     ) -> None:
         if not self.server_id:
             return
@@ -329,14 +607,62 @@ class WebsocketClient:
             )
             return
 
-        packet = self.data_packet.get_data_packet(
-            PacketType.DATA_SEND,
+        fragment_size = fragments.configured_size(self._control.config)
+        if (
+            Capability.FRAGMENTATION.value in self.capabilities
+            and fragments.oversized(data, fragment_size)
+        ):
+            await self._send_fragments(
+                (t_server_id, t_plugin_id), (self.server_id, f_plugin_id), data, fragment_size
+            )
+            return
+
+        await self._send_data_send(
             (t_server_id, t_plugin_id),
             (self.server_id, f_plugin_id),
             data,
+            urgent=urgent,
+            priority=priority,
         )
-        self.last_data_packet = packet
-        await self.send(packet)
+
+    async def _send_data_send(
+        self,
+        to_info: tuple[str, str],
+        from_info: tuple[str, str],
+        data: Dict[str, Any],
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
+    ) -> None:
+        windowed = Capability.SEND_WINDOW.value in self.capabilities
+        if windowed:
+            # 窗口已满时等待确认，向插件施加背压
+            await self.send_window.wait_for_room()
+        packet = self.data_packet.get_data_packet(PacketType.DATA_SEND, to_info, from_info, data)
+        sid = packet[DEFAULT_TEMP[0]]["sid"]
+        if windowed:
+            # 写入连接前不接受累计确认，以免被更高优先级通道上后发先至的数据包一并确认
+            self.send_window.track(sid, packet, written=False)
+        else:
+            self.last_data_packet = packet
+        # 写入连接后由 _mark_written 标记，放入合并窗口时要等批量帧写出
+        await self.send(packet, urgent=urgent, priority=priority)
+
+    async def _send_fragments(
+        self,
+        to_info: tuple[str, str],
+        from_info: tuple[str, str],
+        data: Dict[str, Any],
+        fragment_size: int,
+    ) -> None:
+        """把超大 payload 序列化一次后拆成 ``data_fragment`` 依次发送，每次只构建一个分片。"""
+        text = await self.codec.run_for_packet(data, json_codec.dumps_str, data)
+        for fragment in fragments.split(text, fragment_size):
+            await self.send(
+                self.data_packet.get_data_packet(
+                    PacketType.DATA_FRAGMENT, to_info, from_info, fragment
+                )
+            )
 
     async def send_file_to_other_server(
         self,
@@ -427,11 +753,14 @@ class WebsocketClient:
 
 
 # ===== 全局方法 =====
-def websocket_client_main(control_interface: "CoreControlInterface") -> None:
+def websocket_client_main(
+    control_interface: "CoreControlInterface",
+    carried: Optional[List[Dict[str, Any]]] = None,
+) -> None:
     global _control_interface, websocket_client
 
     _control_interface = control_interface
-    websocket_client = WebsocketClient(control_interface)
+    websocket_client = WebsocketClient(control_interface, carried)
     websocket_client.start_server()
 
 
@@ -461,12 +790,14 @@ def send_data(
     t_server_id: str,
     t_plugin_id: str,
     data: Dict[str, Any],
+    urgent: bool = False,
+    priority: Optional[str] = None,
 ) -> None:
     if websocket_client is None:
         return
     try:
         coro = websocket_client.send_data_to_other_server(
-            f_plugin_id, t_server_id, t_plugin_id, data
+            f_plugin_id, t_server_id, t_plugin_id, data, urgent=urgent, priority=priority
         )
         _schedule_on_client_loop(coro)
     except NameError:
@@ -0,0 +1,96 @@
+"""协商式负载压缩：在加密前以带预置字典的 zlib 压缩明文。"""
+
+from __future__ import annotations
+
+import threading
+import zlib
+from typing import Dict, Optional, Tuple
+
+# 预置字典收录数据包中高频出现的 JSON 片段，小包也能获得可观的压缩率。
+# 字典内容属于协议的一部分，修改时必须同时更换能力名称。
+ZDICT = (
+    b'"server_id": "player": "message": "players": "name": "uuid": "dimension": '
+    b'"minecraft:overworld" "file_name": "save_path": "hash": "error": "password": '
+    b'"test_connect" "ping" "pong" "register" "registered" "login" "logined" '
+    b'"new_login" "del_login" "data_sendok" "data_error" "file_send" "file_sending" '
+    b'"file_sendok" "file_error" "system" "all" "-----" '
+    b'{"type": "data_send", "status": null, "sid": , "to": ["all", '
+    b'"from": ["-----", "system"], "payload": {"capabilities": ["protocol_version": 1, '
+    b'"path": , "timestamp": 17, "checksum": "'
+)
+
+LEVEL = 6
+
+
+class DecompressionError(ValueError):
+    """Raised when a compressed payload is corrupt or exceeds the size limit."""
+
+
+def compress(data: bytes) -> bytes:
+    compressor = zlib.compressobj(LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, zdict=ZDICT)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data: bytes, max_size: Optional[int] = None) -> bytes:
+    """解压 *data*；超过 *max_size* 字节时拒绝，防止压缩炸弹。"""
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=ZDICT)
+    try:
+        if max_size:
+            result = decompressor.decompress(data, max_size)
+            if decompressor.unconsumed_tail:
+                raise DecompressionError(
+                    f"Decompressed payload exceeds {max_size} bytes"
+                )
+        else:
+            result = decompressor.decompress(data)
+        result += decompressor.flush()
+    except zlib.error as exc:
+        raise DecompressionError(f"Invalid compressed payload: {exc}") from exc
+    return result
+
+
+class Compressor:
+    """按阈值压缩明文，并按数据包类型统计压缩率。"""
+
+    def __init__(self, threshold: int = 256) -> None:
+        self.threshold = max(0, threshold)
+        self._lock = threading.Lock()
+        # packet_type -> [压缩包数, 跳过包数, 原始字节, 压缩后字节]
+        self._stats: Dict[str, list[int]] = {}
+
+    def maybe_compress(self, data: bytes, packet_type: str) -> Tuple[bytes, bool]:
+        """返回 ``(data, compressed)``；小于阈值或压缩无收益时原样返回。"""
+        if len(data) < self.threshold:
+            self._record(packet_type, len(data), None)
+            return data, False
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            self._record(packet_type, len(data), None)
+            return data, False
+        self._record(packet_type, len(data), len(compressed))
+        return compressed, True
+
+    def _record(self, packet_type: str, raw: int, compressed: Optional[int]) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(packet_type, [0, 0, 0, 0])
+            if compressed is None:
+                entry[1] += 1
+                return
+            entry[0] += 1
+            entry[2] += raw
+            entry[3] += compressed
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                packet_type: {
+                    "compressed": packets,
+                    "skipped": skipped,
+                    "raw_bytes": raw,
+                    "compressed_bytes": compressed,
+                    "ratio": round(compressed / raw, 4) if raw else 1.0,
+                }
+                for packet_type, (packets, skipped, raw, compressed) in sorted(
+                    self._stats.items()
+                )
+            }
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import base64
 import os
 import time
 from enum import Enum
-from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeGuard, Union, TYPE_CHECKING, cast
 
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 from connect_core.context import GlobalContext
-from connect_core.aes_encrypt import aes_main
+from connect_core.aes_encrypt import (
+    ROLE_CLIENT,
+    ROLE_SERVER,
+    SESSION_NONCE_SIZE,
+    aes_main,
+    derive_session,
+)
 from connect_core.plugin.init_plugin import (
     connected,
     del_connect,
@@ -23,6 +30,13 @@ from connect_core.tools.common import (
     verify_file_hash,
     verify_md5_checksum,
 )
+from connect_core.websockets.dedup import filter_for
+from connect_core.websockets.fragments import FragmentError, reassembler_for
+from connect_core.websockets.group_key import parse_group_key
+from connect_core.websockets.relay import RawPayload, materialize, share
+from connect_core.websockets.resync import gap_payload, gap_range, policy_for
+from connect_core.websockets.acks import acked_through, cumulative_payload
+from connect_core.websockets.send_window import ack_payload, acked_sid
 
 if TYPE_CHECKING:  # pragma: no cover
     from connect_core.interface.control_interface import CoreControlInterface
@@ -54,19 +68,51 @@ class PacketType(str, Enum):
     DATA_SEND = "data_send"
     DATA_SENDOK = "data_sendok"
     DATA_ERROR = "data_error"
+    DATA_FRAGMENT = "data_fragment"
     FILE_SEND = "file_send"
     FILE_SENDING = "file_sending"
     FILE_SENDOK = "file_sendok"
     FILE_ERROR = "file_error"
+    GROUP_KEY = "group_key"
 
 
 PERSISTENT_TYPES: set[PacketType] = {
     packet_type
     for packet_type in PacketType
-    if packet_type not in {PacketType.TEST_CONNECT, PacketType.PING, PacketType.PONG}
+    if packet_type
+    not in {
+        PacketType.TEST_CONNECT,
+        PacketType.PING,
+        PacketType.PONG,
+        PacketType.GROUP_KEY,
+        PacketType.DATA_FRAGMENT,
+    }
 }
 
 
+# 接收时不记入历史的数据包类型
+UNRECORDED_TYPES: frozenset[PacketType] = frozenset(
+    {PacketType.PING, PacketType.PONG, PacketType.DATA_FRAGMENT}
+)
+
+# 确认类数据包：双方协商 cumulative_ack_v1 后只对当前连接有意义，不占用 sid、不进入历史重放
+ACK_TYPES: frozenset[PacketType] = frozenset({PacketType.DATA_SENDOK, PacketType.DATA_ERROR})
+
+
+def is_persistent(packet_type: PacketType, transient_acks: bool = False) -> bool:
+    """数据包是否占用新的 sid 并记入发送历史。
+
+    未协商 ``cumulative_ack_v1`` 的对端仍按旧规则为确认分配 sid 并记入历史，
+    本端必须同样推进 sid，否则下一个持久化数据包会复用该 sid 覆盖对端的历史记录。
+    """
+    return packet_type in PERSISTENT_TYPES and not (transient_acks and packet_type in ACK_TYPES)
+
+
+def is_recorded(packet_type: PacketType, transient_acks: bool = False) -> bool:
+    """接收到的数据包是否记入历史，*transient_acks* 含义同 :func:`is_persistent`。"""
+    return packet_type not in UNRECORDED_TYPES and not (transient_acks and packet_type in ACK_TYPES)
+
+
 class PacketStatus(str, Enum):
     """Built-in packet statuses. Custom statuses can use any string."""
     REQUEST = "request"
@@ -82,6 +128,128 @@ class PacketStatus(str, Enum):
 
 
 PROTOCOL_VERSION: int = 1
+# 仍可互通的最低协议版本；可选的性能特性通过能力协商逐连接启用，不需要提升版本号
+MIN_PROTOCOL_VERSION: int = 1
+
+
+class Capability(str, Enum):
+    """登录时协商的可选传输能力。"""
+    BINARY_ENVELOPE = "binary_envelope"
+    COMPRESSION = "zlib_v1"
+    AEAD_SESSION = "aead_aes256gcm_v1"
+    GROUP_KEY = "group_key_v1"
+    # 已认证的传输层（Fernet HMAC / AEAD）替代逐包的 payload 校验和
+    TRANSPORT_INTEGRITY = "transport_integrity_v1"
+    # 超大 data_send 拆分为 data_fragment 分片，中心服务器逐片转发
+    FRAGMENTATION = "data_fragment_v1"
+    # 时间窗口内的小数据包合并为一个 JSON 数组帧
+    BATCHING = "batch_v1"
+    # data_sendok / data_error 携带 sid，发送方可保留多个未确认的 data_send
+    SEND_WINDOW = "send_window_v1"
+    # data_sendok 携带 {"upto": N} 累计确认，并可延迟合并或搭载在批量帧中
+    CUMULATIVE_ACK = "cumulative_ack_v1"
+    # 接收方按 (来源, sid) 抑制重复投递，中心服务器只对声明了该能力的子服务器逐包重传
+    DUPLICATE_SUPPRESSION = "dedup_v1"
+
+
+SUPPORTED_CAPABILITIES: frozenset[str] = frozenset(
+    capability.value for capability in Capability
+)
+
+# 能力依赖：所依赖的能力未同时协商时，该能力也会被剔除
+CAPABILITY_REQUIRES: Dict[Capability, frozenset[Capability]] = {
+    # 依赖二进制信封 flags 位的能力
+    Capability.COMPRESSION: frozenset({Capability.BINARY_ENVELOPE}),
+    Capability.AEAD_SESSION: frozenset({Capability.BINARY_ENVELOPE}),
+    Capability.GROUP_KEY: frozenset({Capability.BINARY_ENVELOPE}),
+    Capability.BATCHING: frozenset({Capability.BINARY_ENVELOPE}),
+    Capability.CUMULATIVE_ACK: frozenset({Capability.SEND_WINDOW}),
+}
+
+# 能力对应的配置开关与默认值；未列出的能力始终启用
+CAPABILITY_SWITCHES: Dict[Capability, Tuple[str, bool]] = {
+    Capability.COMPRESSION: ("compression_enabled", True),
+    Capability.AEAD_SESSION: ("aead_session_enabled", False),
+    Capability.GROUP_KEY: ("group_key_enabled", True),
+    Capability.TRANSPORT_INTEGRITY: ("transport_integrity_enabled", True),
+    Capability.FRAGMENTATION: ("fragmentation_enabled", True),
+}
+
+
+def negotiate_capabilities(
+    advertised: Any, supported: Optional[Iterable[str]] = None
+) -> List[str]:
+    """返回对端声明的能力与本端支持能力的交集，并剔除依赖未满足的能力。"""
+    if not isinstance(advertised, (list, tuple, set, frozenset)):
+        return []
+    local = SUPPORTED_CAPABILITIES if supported is None else frozenset(supported)
+    agreed = set(local.intersection(str(item) for item in advertised))
+    changed = True
+    while changed:
+        changed = False
+        for capability, requires in CAPABILITY_REQUIRES.items():
+            if capability.value in agreed and any(
+                required.value not in agreed for required in requires
+            ):
+                agreed.discard(capability.value)
+                changed = True
+    return sorted(agreed)
+
+
+def _is_version(value: Any) -> TypeGuard[int]:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def negotiate_protocol_version(payload: Any) -> Optional[int]:
+    """返回双方都支持的最高协议版本，没有交集时返回 ``None``。
+
+    对端以 ``protocol_version`` 声明最高版本、``min_protocol_version`` 声明最低版本；
+    只携带 ``protocol_version`` 的旧客户端视为仅支持该版本。
+    """
+    if not isinstance(payload, dict):
+        return None
+    highest = payload.get("protocol_version")
+    lowest = payload.get("min_protocol_version", highest)
+    if not _is_version(highest) or not _is_version(lowest):
+        return None
+    if lowest > highest:
+        return None
+    version = min(highest, PROTOCOL_VERSION)
+    return version if version >= max(lowest, MIN_PROTOCOL_VERSION) else None
+
+
+def encode_session_nonce(nonce: bytes) -> str:
+    return base64.urlsafe_b64encode(nonce).decode()
+
+
+def decode_session_nonce(value: Any) -> Optional[bytes]:
+    """解析登录时交换的会话随机数，格式不正确时返回 ``None``。"""
+    if not isinstance(value, str):
+        return None
+    try:
+        nonce = base64.urlsafe_b64decode(value.encode())
+    except (ValueError, TypeError):
+        return None
+    return nonce if len(nonce) == SESSION_NONCE_SIZE else None
+
+
+def local_capabilities(config: Any) -> List[str]:
+    """根据配置返回本端启用的能力列表。"""
+    enabled = set(SUPPORTED_CAPABILITIES)
+    for capability, (option, default) in CAPABILITY_SWITCHES.items():
+        if not getattr(config, option, default):
+            enabled.discard(capability.value)
+    return sorted(enabled)
+
+
+def ensure_checksum(packet: Dict[str, Any], trusted: bool) -> Dict[str, Any]:
+    """对端未协商 ``transport_integrity_v1`` 时补齐省略的校验和。
+
+    历史重放可能跨越一次重新登录，缓存的数据包不一定适用于新的协商结果。
+    """
+    if trusted or packet.get("checksum") or packet.get("payload") is None:
+        return packet
+    return {**packet, "checksum": generate_md5_checksum(materialize(packet["payload"]))}
 
 
 class StatusRegistry:
@@ -151,7 +319,155 @@ class DataModel(BaseModel):
         return values
 
 
-HistoryEntry = Tuple[int, DataModel | None, str]
+class PacketValidationError(ValueError):
+    """Raised when a received packet does not match the packet schema."""
+
+
+def _coerce_int(value: Any, field: str) -> int:
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise PacketValidationError(f"{field}: expected an integer, got {value!r}")
+
+
+def _coerce_route(value: Any, field: str) -> Tuple[str, str]:
+    if (
+        isinstance(value, (list, tuple))
+        and len(value) == 2
+        and isinstance(value[0], str)
+        and isinstance(value[1], str)
+    ):
+        return value[0], value[1]
+    raise PacketValidationError(f"{field}: expected [server_id, plugin_id], got {value!r}")
+
+
+class Packet:
+    """热路径使用的轻量数据包，字段与 :class:`DataModel` 一致。
+
+    内部收发、存储与历史重放都使用该类型，只有插件的自定义处理器需要时
+    才通过 :meth:`to_model` 转换为 ``DataModel``。
+    """
+
+    __slots__ = ("type", "status", "sid", "to", "from_", "payload", "timestamp", "checksum")
+
+    def __init__(
+        self,
+        type: PacketType,
+        sid: int,
+        to: Tuple[str, str],
+        from_: Tuple[str, str],
+        payload: Optional[Dict[str, Any]] = None,
+        status: Optional[str] = None,
+        timestamp: Optional[float] = None,
+        checksum: Optional[str] = None,
+        *,
+        with_checksum: bool = True,
+    ) -> None:
+        self.type = type
+        self.status = status
+        self.sid = sid
+        self.to = to
+        self.from_ = from_
+        self.payload = payload
+        self.timestamp = time.time() if timestamp is None else timestamp
+        if not checksum and payload is not None and with_checksum:
+            checksum = generate_md5_checksum(payload)
+        self.checksum = checksum
+
+    @classmethod
+    def validate(cls, data: Any) -> "Packet":
+        """校验并转换接收到的字典，规则与 ``DataModel.model_validate`` 的宽松模式一致。"""
+        if not isinstance(data, dict):
+            raise PacketValidationError(f"packet: expected an object, got {type(data).__name__}")
+        try:
+            packet_type = PacketType(data["type"])
+            sid = _coerce_int(data["sid"], "sid")
+            to = _coerce_route(data["to"], "to")
+            from_ = _coerce_route(data["from"], "from")
+        except KeyError as exc:
+            raise PacketValidationError(f"{exc.args[0]}: field required") from None
+        except ValueError as exc:
+            if isinstance(exc, PacketValidationError):
+                raise
+            raise PacketValidationError(f"type: {exc}") from None
+
+        status = data.get("status")
+        if status is not None and not isinstance(status, str):
+            raise PacketValidationError(f"status: expected a string, got {status!r}")
+        payload = data.get("payload")
+        if payload is not None and not isinstance(payload, dict):
+            raise PacketValidationError(f"payload: expected an object, got {payload!r}")
+        timestamp = None
+        if "timestamp" in data:
+            timestamp = data["timestamp"]
+            try:
+                timestamp = float(timestamp)
+            except (TypeError, ValueError):
+                raise PacketValidationError(
+                    f"timestamp: expected a number, got {timestamp!r}"
+                ) from None
+        checksum = data.get("checksum")
+        if checksum is not None and not isinstance(checksum, str):
+            raise PacketValidationError(f"checksum: expected a string, got {checksum!r}")
+        return cls(packet_type, sid, to, from_, payload, status, timestamp, checksum)
+
+    def dump(self) -> Dict[str, Any]:
+        """与 ``DataModel.model_dump(by_alias=True)`` 结构一致的字典。"""
+        return {
+            "type": self.type,
+            "status": self.status,
+            "sid": self.sid,
+            "to": self.to,
+            "from": self.from_,
+            "payload": self.payload,
+            "timestamp": self.timestamp,
+            "checksum": self.checksum,
+        }
+
+    def to_model(self) -> DataModel:
+        return DataModel.model_construct(
+            type=self.type,
+            status=self.status,
+            sid=self.sid,
+            to=self.to,
+            from_=self.from_,
+            payload=self.payload,
+            timestamp=self.timestamp,
+            checksum=self.checksum,
+        )
+
+    @classmethod
+    def from_model(cls, model: DataModel) -> "Packet":
+        return cls(
+            model.type,
+            model.sid,
+            model.to,
+            model.from_,
+            model.payload,
+            model.status,
+            model.timestamp,
+            model.checksum,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Packet):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (
+            f"Packet(type={self.type!r}, status={self.status!r}, sid={self.sid!r}, "
+            f"to={self.to!r}, from_={self.from_!r}, payload={self.payload!r})"
+        )
+
+
+HistoryEntry = Tuple[int, Packet | None, str]
 
 
 class PacketStore:
@@ -162,7 +478,7 @@ class PacketStore:
         self._history: Dict[str, List[HistoryEntry]] = {}
 
     @staticmethod
-    def _upsert_entry(bucket: List[HistoryEntry], sid: int, packet: DataModel | None, direction: str) -> None:
+    def _upsert_entry(bucket: List[HistoryEntry], sid: int, packet: Packet | None, direction: str) -> None:
         for index, (existing_sid, _, _) in enumerate(bucket):
             if existing_sid == sid:
                 bucket[index] = (sid, packet, direction)
@@ -174,28 +490,40 @@ class PacketStore:
         type_: PacketType,
         to: Tuple[str, str],
         from_: Tuple[str, str],
-        payload: Optional[Dict[str, Any]] = None,
+        payload: Union[Dict[str, Any], RawPayload, None] = None,
         *,
         status: Optional[str] = None,
         exclude: Optional[Iterable[str]] = None,
         record_history: Optional[bool] = None,
         known_targets: Optional[Iterable[str]] = None,
-    ) -> Dict[str, DataModel]:
-        """构建要发送的数据包集合。"""
+        checksum: Optional[str] = None,
+        needs_checksum: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Packet]:
+        """构建要发送的数据包集合。
+
+        转发时传入 *checksum* 沿用发送方的校验和；*needs_checksum* 对所有目标都返回
+        ``False`` 时不计算校验和。
+        """
 
         exclude_ids = set(exclude or [])
         record = PERSISTENT_TYPES.__contains__(type_) if record_history is None else record_history
         targets = self._resolve_targets(to[0], exclude_ids, bool(record), known_targets)
-        packets: Dict[str, DataModel] = {}
+        packets: Dict[str, Packet] = {}
+        # 所有目标共享同一 payload，校验和只计算一次
+        if (
+            checksum is None
+            and payload is not None
+            and targets
+            and (needs_checksum is None or any(map(needs_checksum, targets)))
+        ):
+            checksum = generate_md5_checksum(materialize(payload))
+        timestamp = time.time()
+        # RawPayload 只出现在待发送的转发包中，由 dump / dumps_packet 原样拼接，不会被当作字典读取
+        packet_payload = cast(Optional[Dict[str, Any]], payload)
 
         for dest, sid in targets.items():
-            packet = DataModel(
-                type=type_,
-                sid=sid,
-                to=to,
-                from_=from_,  # type: ignore[call-arg]
-                payload=payload,
-                status=status,
+            packet = Packet(
+                type_, sid, to, from_, packet_payload, status, timestamp, checksum, with_checksum=False
             )
             if record and dest != DEFAULT_TEMP[0]:
                 bucket = self._history.setdefault(dest, [])
@@ -203,13 +531,14 @@ class PacketStore:
             packets[dest] = packet
         return packets
 
-    def record_received(self, client_id: str, packet: DataModel) -> None:
-        if packet.type in {PacketType.PING, PacketType.PONG}:
+    def record_received(self, client_id: str, packet: Packet, *, transient_acks: bool = False) -> None:
+        # 分片只转发不入历史，中心服务器不因转发而缓存整个 payload
+        if not is_recorded(packet.type, transient_acks):
             return
         bucket = self._history.setdefault(client_id, [])
         self._upsert_entry(bucket, packet.sid, packet, "received")
 
-    def history(self, server_id: str, since_sid: int) -> List[DataModel]:
+    def history(self, server_id: str, since_sid: int) -> List[Packet]:
         bucket = self._history.get(server_id, [])
         return [
             packet
@@ -225,19 +554,19 @@ class PacketStore:
         return max((sid for sid, _, _ in bucket), default=0)
 
     @staticmethod
-    def dump_packet(packet: DataModel) -> Dict[str, Any]:
-        return packet.model_dump(by_alias=True)
+    def dump_packet(packet: Packet) -> Dict[str, Any]:
+        return packet.dump()
 
     @staticmethod
-    def dump_mapping(packets: Dict[str, DataModel]) -> Dict[str, Dict[str, Any]]:
-        return {sid: pkt.model_dump(by_alias=True) for sid, pkt in packets.items()}
+    def dump_mapping(packets: Dict[str, Packet]) -> Dict[str, Dict[str, Any]]:
+        return {sid: pkt.dump() for sid, pkt in packets.items()}
 
     def recent_packets(
         self,
         limit: int = 20,
         server_id: Optional[str] = None,
-    ) -> List[Tuple[DataModel, str, str]]:
-        entries: List[Tuple[DataModel, str, str]] = []
+    ) -> List[Tuple[Packet, str, str]]:
+        entries: List[Tuple[Packet, str, str]] = []
         for owner_id, packets in self._history.items():
             if server_id is not None and owner_id != server_id:
                 continue
@@ -301,18 +630,27 @@ class ServerDataPacket:
         self._websocket_server = websocket_server
         self._store = PacketStore()
         self._wait_files: Dict[str, Any] = {}
+        # 自身是接收方或目标未协商分片时才在此重组
+        self.fragments = reassembler_for(control_interface.config)
+        # 按子服务器记录已收到的 data_send sid，转发与本地投递前丢弃重复
+        self.duplicates = filter_for(control_interface.config)
+        self.resync = policy_for(control_interface.config)
 
     def get_data_packet(
         self,
         packet_type: PacketType,
         to_info: Tuple[str, str],
         from_info: Tuple[str, str],
-        payload: Optional[Dict[str, Any]] = None,
+        payload: Union[Dict[str, Any], RawPayload, None] = None,
         exclude_server_ids: Optional[Iterable[str]] = None,
         *,
         status: Optional[str] = None,
+        checksum: Optional[str] = None,
     ) -> Dict[str, Dict[str, Any]]:
         """对外兼容旧接口，返回 JSON 可序列化的数据包映射。"""
+        record_history = None
+        if packet_type in ACK_TYPES:
+            record_history = is_persistent(packet_type, self._transient_acks(to_info[0]))
         packets = self._store.create_packets(
             packet_type,
             to_info,
@@ -320,13 +658,20 @@ class ServerDataPacket:
             payload,
             status=status,
             exclude=exclude_server_ids,
+            record_history=record_history,
             known_targets=self._websocket_server.websockets.keys(),
+            checksum=checksum,
+            needs_checksum=self._needs_checksum,
         )
         return self._store.dump_mapping(packets)
 
     def add_recv_packet(self, server_id: str, packet: Dict[str, Any]) -> None:
-        model = DataModel.model_validate(packet)
-        self._store.record_received(server_id, model)
+        self._store.record_received(
+            server_id, Packet.validate(packet), transient_acks=self._transient_acks(server_id)
+        )
+
+    def _transient_acks(self, server_id: str) -> bool:
+        return self._websocket_server.peer_supports(server_id, Capability.CUMULATIVE_ACK)
 
     def get_history_packet(self, server_id: str, old_sid: int) -> List[Dict[str, Any]]:
         return [
@@ -341,7 +686,8 @@ class ServerDataPacket:
     ) -> List[Dict[str, Any]]:
         recent: List[Dict[str, Any]] = []
         for packet, direction, owner_id in self._store.recent_packets(limit, server_id):
-            record = packet.model_dump(by_alias=True)
+            record = packet.dump()
+            record["payload"] = materialize(record["payload"])
             record["direction"] = direction
             record["server_id"] = owner_id
             recent.append(record)
@@ -349,6 +695,8 @@ class ServerDataPacket:
 
     def del_server_id(self, server_id: str) -> None:
         self._store.drop_server(server_id)
+        self.fragments.drop_source(server_id)
+        self.duplicates.forget(server_id)
         if server_id in self._wait_files:
             try:
                 self._wait_files[server_id].close()
@@ -356,11 +704,18 @@ class ServerDataPacket:
                 pass
             self._wait_files.pop(server_id, None)
 
-    async def parse_msg(self, data: Dict[str, Any], websocket: Any) -> None:
+    async def parse_msg(self, data: Dict[str, Any] | List[Any], websocket: Any) -> None:
+        if isinstance(data, list):
+            # batch_v1 批量帧：按发送顺序逐个处理
+            for item in data:
+                if not isinstance(item, dict):
+                    raise ValueError("Batch frame items must be packets")
+                await self.parse_msg(item, websocket)
+            return
         self._control.debug("[FLOW][DISPATCH] validating packet", level=4)
         try:
-            packet = DataModel.model_validate(data)
-        except ValidationError as exc:
+            packet = Packet.validate(data)
+        except PacketValidationError as exc:
             self._control.logger.error(f"Invalid packet received: {exc}")
             self._control.debug(f"[FLOW][DISPATCH] raw={data}", level=2)
             return
@@ -370,7 +725,19 @@ class ServerDataPacket:
             self._control.debug(
                 f"[FLOW][DISPATCH] record server_id={server_id}", level=2
             )
-            self._store.record_received(server_id, packet)
+            if packet.type is PacketType.DATA_SEND and not self.duplicates.first_seen(
+                server_id, packet.sid
+            ):
+                # 重复到达的 data_send 只补发确认，既不转发也不交给插件
+                self._control.debug(
+                    f"[FLOW][DISPATCH] duplicate data_send sid={packet.sid} from {server_id}",
+                    level=2,
+                )
+                await self._send_acknowledgement(server_id, websocket, packet.sid)
+                return
+            self._store.record_received(
+                server_id, packet, transient_acks=self._transient_acks(server_id)
+            )
             self._control.debug(
                 f"[R][{packet.type}][{packet.from_} -> {packet.to}][{packet.sid}] {packet.payload}",
                 level=1,
@@ -389,19 +756,26 @@ class ServerDataPacket:
             if GlobalContext.get_debug_level() >= 3:
                 self._control.logger.exception("Dispatch stacktrace")
 
-    async def _handle_broadcast_or_global(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_broadcast_or_global(self, packet: Packet, websocket: Any) -> None:
         if packet.to[0] == DEFAULT_ALL[0]:
-            payload = packet.payload
+            payload, checksum = self._relay_payload(packet)
+            exclude = [packet.from_[0]]
+            if packet.type is PacketType.DATA_FRAGMENT:
+                # 未协商分片的目标在重组完成后收到完整的 data_send
+                exclude.extend(self._fragment_fallback_targets())
             packets = self.get_data_packet(
                 packet.type,
                 packet.to,
                 packet.from_,
                 payload,
-                exclude_server_ids=[packet.from_[0]],
+                exclude_server_ids=exclude,
+                checksum=checksum,
             )
             if packet.type == PacketType.DATA_SEND:
-                self._websocket_server.last_send_packet.update(packets)
+                self._websocket_server.track_data_send(packets)
             await self._websocket_server.broadcast(packets)
+            if packet.type is PacketType.DATA_FRAGMENT:
+                await self._websocket_server.wait_for_room(packets)
 
         try:
             packet_type = (
@@ -430,6 +804,8 @@ class ServerDataPacket:
             await self._handle_data_sendok(packet)
         elif packet_type is PacketType.DATA_ERROR:
             await self._handle_data_error(packet, websocket)
+        elif packet_type is PacketType.DATA_FRAGMENT:
+            await self._handle_data_fragment(packet, websocket)
         elif packet_type is PacketType.FILE_SEND:
             await self._handle_file_send(packet, websocket)
         elif packet_type is PacketType.FILE_SENDING:
@@ -446,7 +822,7 @@ class ServerDataPacket:
                     level=2,
                 )
 
-    async def _dispatch_custom_handlers(self, packet: DataModel) -> bool:
+    async def _dispatch_custom_handlers(self, packet: Packet) -> bool:
         """查找并执行 StatusRegistry 中注册的自定义处理器。"""
         handlers = status_registry.get_handlers(str(packet.type), packet.status)  # type: ignore[arg-type]
         if not handlers:
@@ -454,7 +830,8 @@ class ServerDataPacket:
         for handler in handlers:
             try:
                 import asyncio
-                result = handler(packet)
+                # 插件处理器沿用公开的 DataModel 类型
+                result = handler(packet.to_model())
                 if asyncio.iscoroutine(result):
                     await result
             except Exception as exc:
@@ -463,13 +840,58 @@ class ServerDataPacket:
                 )
         return True
 
-    async def _handle_direct_message(self, packet: DataModel, websocket: Any) -> None:
+    def _needs_checksum(self, server_id: str) -> bool:
+        return not self._websocket_server.peer_supports(
+            server_id, Capability.TRANSPORT_INTEGRITY
+        )
+
+    def _payload_intact(self, packet: Packet, payload: Any) -> bool:
+        """协商了 ``transport_integrity_v1`` 的连接由传输层认证明文，不再逐包校验。"""
+        if not self._needs_checksum(packet.from_[0]):
+            return True
+        return verify_md5_checksum(payload, packet.checksum)
+
+    def _relay_payload(
+        self, packet: Packet
+    ) -> Tuple[Union[Dict[str, Any], RawPayload, None], Optional[str]]:
+        """转发 data_send 时沿用发送方的校验和，较大的 payload 只序列化一次供所有目标复用。
+
+        发送方经 ``transport_integrity_v1`` 省略校验和时，仅在有目标需要时才计算。
+        """
+        if (
+            packet.type in {PacketType.DATA_SEND, PacketType.DATA_FRAGMENT}
+            and isinstance(packet.payload, dict)
+            and getattr(self._control.config, "relay_passthrough_enabled", True)
+        ):
+            return share(packet.payload), packet.checksum
+        return packet.payload, None
+
+    async def _handle_direct_message(self, packet: Packet, websocket: Any) -> None:
         target_id = packet.to[0]
-        payload = packet.payload
-        packets = self.get_data_packet(packet.type, packet.to, packet.from_, payload)
+        acknowledge = True
+        if packet.type is PacketType.DATA_FRAGMENT and not self._websocket_server.peer_supports(
+            target_id, Capability.FRAGMENTATION
+        ):
+            # 目标未协商分片：重组后按普通 data_send 转发
+            payload = self._reassemble(packet)
+            if payload is None:
+                return
+            packet = Packet(
+                PacketType.DATA_SEND, packet.sid, packet.to, packet.from_, payload, with_checksum=False
+            )
+            acknowledge = False
+        relayed, checksum = self._relay_payload(packet)
+        packets = self.get_data_packet(
+            packet.type,
+            packet.to,
+            packet.from_,
+            relayed,
+            checksum=checksum,
+        )
         if packet.type == PacketType.DATA_SEND:
-            self._websocket_server.last_send_packet[target_id] = packets
-            await self._send_acknowledgement(packet.from_[0], websocket)
+            self._websocket_server.track_data_send(packets)
+            if acknowledge:
+                await self._send_acknowledgement(packet.from_[0], websocket, packet.sid)
         to_websocket = self._websocket_server.websockets.get(target_id)
         if to_websocket is None:
             to_websocket = websocket
@@ -479,63 +901,48 @@ class ServerDataPacket:
                 to_websocket,
                 target_id,
             )
+        if packet.type is PacketType.DATA_FRAGMENT:
+            await self._websocket_server.wait_for_room([target_id])
 
-    async def _handle_ping(self, packet: DataModel, websocket: Any) -> None:
-        history_packets = [
-            entry
-            for entry in self.get_history_packet(packet.from_[0], packet.sid)
-            if entry.get("type") not in {PacketType.PING, PacketType.PONG}
-        ]
-        highest_sid = self._store.max_sid(packet.from_[0])
-        if history_packets:
-            for history in history_packets:
-                await self._websocket_server.send(history, websocket, packet.from_[0])
-                sid_value = history.get("sid")
-                if isinstance(sid_value, int):
-                    highest_sid = max(highest_sid, sid_value)
-        highest_sid = max(highest_sid, packet.sid)
+    async def _handle_ping(self, packet: Packet, websocket: Any) -> None:
+        server_id = packet.from_[0]
+        plan = self.resync.plan(self._store.history(server_id, packet.sid), time.time())
+        if plan.packets:
+            self.resync.frames += await self._websocket_server.replay(
+                server_id,
+                websocket,
+                [self._store.dump_packet(history) for history in plan.packets],
+            )
+        if plan.gap is not None:
+            self._control.debug(
+                f"[FLOW][PING] skip replay sids={plan.gap} server_id={server_id}", level=2
+            )
+        highest_sid = max(self._store.max_sid(server_id), packet.sid)
 
         pong_packet = self.get_data_packet(
             PacketType.PONG,
-            (packet.from_[0], "system"),
+            (server_id, "system"),
             DEFAULT_SERVER,
-            None,
+            gap_payload(plan.gap),
         )
-        response = pong_packet.get(packet.from_[0])
+        response = pong_packet.get(server_id)
         if response is None:
             self._control.debug(
-                f"[FLOW][PING] missing pong payload for server_id={packet.from_[0]}",
+                f"[FLOW][PING] missing pong payload for server_id={server_id}",
                 level=2,
             )
             return
 
         response["sid"] = highest_sid
-        await self._websocket_server.send(response, websocket, packet.from_[0])
+        await self._websocket_server.send(response, websocket, server_id)
 
-    async def _handle_register(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_register(self, packet: Packet, websocket: Any) -> None:
         self._control.debug(
             "[FLOW][REGISTER] start", level=2
         )
-        client_version = (packet.payload or {}).get("protocol_version")
-        if client_version != PROTOCOL_VERSION:
-            self._control.logger.warning(
-                self._control.tr(
-                    "net_core.service.protocol_mismatch",
-                    client_version,
-                    PROTOCOL_VERSION,
-                )
-            )
-            error_packet = self.get_data_packet(
-                PacketType.REGISTER_ERROR,
-                DEFAULT_TEMP,
-                DEFAULT_SERVER,
-                {"error": f"Protocol version mismatch: client={client_version}, server={PROTOCOL_VERSION}"},
-            )
-            await self._websocket_server.send(
-                error_packet.get(DEFAULT_TEMP[0]),  # type: ignore[arg-type]
-                websocket, DEFAULT_TEMP[0]
-            )
-            await self._websocket_server.close_connect(DEFAULT_TEMP[0], 4001, websocket)
+        if await self._negotiate_version(
+            packet, websocket, PacketType.REGISTER_ERROR, DEFAULT_TEMP
+        ) is None:
             return
         server_id, password = self._generate_server_credentials()
         self._save_credentials(server_id, password)
@@ -565,53 +972,108 @@ class ServerDataPacket:
             f"[FLOW][REGISTER] success server_id={server_id}", level=2
         )
 
-    async def _handle_register_error(self, packet: DataModel, websocket: Any) -> None:
+    async def _negotiate_version(
+        self,
+        packet: Packet,
+        websocket: Any,
+        error_type: PacketType,
+        target: Tuple[str, str],
+    ) -> Optional[int]:
+        """协商协议版本；版本范围没有交集时回复错误并以 4001 关闭连接。"""
+        version = negotiate_protocol_version(packet.payload)
+        if version is not None:
+            return version
+        client_version = (packet.payload or {}).get("protocol_version")
+        self._control.logger.warning(
+            self._control.tr(
+                "net_core.service.protocol_mismatch",
+                client_version,
+                PROTOCOL_VERSION,
+            )
+        )
+        error_packet = self.get_data_packet(
+            error_type,
+            target,
+            DEFAULT_SERVER,
+            {
+                "error": f"Protocol version mismatch: client={client_version}, server={PROTOCOL_VERSION}",
+                "min_protocol_version": MIN_PROTOCOL_VERSION,
+                "protocol_version": PROTOCOL_VERSION,
+            },
+        )
+        await self._websocket_server.send(
+            error_packet.get(target[0]),  # type: ignore[arg-type]
+            websocket, target[0]
+        )
+        await self._websocket_server.close_connect(target[0], 4001, websocket)
+        return None
+
+    async def _handle_register_error(self, packet: Packet, websocket: Any) -> None:
         self._control.debug(
             "[FLOW][REGISTER] retry last account", level=2
         )
-        accounts = self._control.get_config(config_path="account.json")
+        accounts = self._websocket_server.read_accounts()
         if accounts:
             accounts.pop(next(reversed(accounts)))
-        self._control.save_config(accounts, "account.json")
+        self._websocket_server.write_accounts(accounts)
         await self._handle_register(packet, websocket)
 
-    async def _handle_login(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_login(self, packet: Packet, websocket: Any) -> None:
         server_id = packet.from_[0]
         self._control.debug(
             f"[FLOW][LOGIN] start server_id={server_id}", level=2
         )
-        client_version = (packet.payload or {}).get("protocol_version")
-        if client_version != PROTOCOL_VERSION:
-            self._control.logger.warning(
-                self._control.tr(
-                    "net_core.service.protocol_mismatch",
-                    client_version,
-                    PROTOCOL_VERSION,
-                )
-            )
-            error_packet = self.get_data_packet(
-                PacketType.LOGIN_ERROR,
-                (server_id, "system"),
-                DEFAULT_SERVER,
-                {"error": f"Protocol version mismatch: client={client_version}, server={PROTOCOL_VERSION}"},
-            )
-            await self._websocket_server.send(
-                error_packet.get(server_id),  # type: ignore[arg-type]
-                websocket, server_id
-            )
-            await self._websocket_server.close_connect(server_id, 4001, websocket)
+        version = await self._negotiate_version(
+            packet, websocket, PacketType.LOGIN_ERROR, (server_id, "system")
+        )
+        if version is None:
             return
         if server_id not in self._websocket_server.websockets:
+            account_key = self._websocket_server._resolve_account_key(server_id)
+            if account_key is None:
+                # 账户在登录过程中被删除，无法回复也无法派生会话密钥
+                self._control.logger.warning(f"Login from unknown account: {server_id}")
+                await self._websocket_server.close_connect(server_id, 401, websocket)
+                return
+            capabilities = negotiate_capabilities(
+                (packet.payload or {}).get("capabilities"),
+                local_capabilities(self._control.config),
+            )
+            client_nonce = decode_session_nonce((packet.payload or {}).get("session_nonce"))
+            if client_nonce is None and Capability.AEAD_SESSION.value in capabilities:
+                capabilities.remove(Capability.AEAD_SESSION.value)
             self._websocket_server.websockets[server_id] = websocket
-            self._websocket_server.servers_info[server_id] = packet.payload or {}
+            self._websocket_server.servers_info[server_id] = {
+                **(packet.payload or {}),
+                "protocol_version": version,
+                "capabilities": capabilities,
+            }
             self._control.logger.info(self._control.tr("net_core.service.server_login", server_id))
+            response_payload: Dict[str, Any] = {"capabilities": capabilities}
+            if "min_protocol_version" in (packet.payload or {}):
+                # 只回复声明了版本范围的客户端，旧客户端的 logined 保持原样
+                response_payload["protocol_version"] = version
+            server_nonce = b""
+            if Capability.AEAD_SESSION.value in capabilities:
+                server_nonce = os.urandom(SESSION_NONCE_SIZE)
+                response_payload["session_nonce"] = encode_session_nonce(server_nonce)
+            if Capability.GROUP_KEY.value in capabilities:
+                response_payload["group_key"] = self._websocket_server.group_keys.export()
             response = self.get_data_packet(
                 PacketType.LOGINED,
                 (server_id, "system"),
                 DEFAULT_SERVER,
-                None,
+                response_payload if capabilities or "protocol_version" in response_payload else None,
             )
+            # LOGINED 仍以账户密钥加密，之后的帧才切换到会话密钥
             await self._websocket_server.send(response.get(server_id), websocket, server_id)  # type: ignore[arg-type]
+            if server_nonce:
+                self._websocket_server.sessions[server_id] = derive_session(
+                    client_nonce,  # type: ignore[arg-type]
+                    server_nonce,
+                    ROLE_SERVER,
+                    account_key,
+                )
             self._control.debug(
                 f"[FLOW][LOGIN] success server_id={server_id}", level=2
             )
@@ -630,22 +1092,72 @@ class ServerDataPacket:
                 f"[FLOW][LOGIN] reject server_id={server_id}", level=2
             )
 
-    async def _handle_data_send(self, packet: DataModel, websocket: Any) -> None:
-        if verify_md5_checksum(packet.payload, packet.checksum):
+    async def _handle_data_send(self, packet: Packet, websocket: Any) -> None:
+        if self._payload_intact(packet, packet.payload):
             recv_data(packet.to[1], packet.from_[0], packet.payload)  # type: ignore[arg-type]
-            await self._send_acknowledgement(packet.from_[0], websocket)
+            await self._send_acknowledgement(packet.from_[0], websocket, packet.sid)
         else:
-            await self._send_data_error(packet.from_[0], websocket)
+            # 校验失败的数据包不算已收到，重发时仍需投递
+            self.duplicates.discard(packet.from_[0], packet.sid)
+            await self._send_data_error(packet.from_[0], websocket, packet.sid)
+
+    async def _handle_data_fragment(self, packet: Packet, websocket: Any) -> None:
+        """发往中心服务器自身或全体的分片：重组后交给本地插件，并转发给未协商分片的目标。"""
+        payload = self._reassemble(packet)
+        if payload is None:
+            return
+        recv_data(packet.to[1], packet.from_[0], payload)
+        if packet.to[0] != DEFAULT_ALL[0]:
+            return
+        fallback = set(self._fragment_fallback_targets()) - {packet.from_[0]}
+        if not fallback:
+            return
+        packets = self.get_data_packet(
+            PacketType.DATA_SEND,
+            packet.to,
+            packet.from_,
+            payload,
+            exclude_server_ids=(set(self._websocket_server.websockets) - fallback) | {packet.from_[0]},
+        )
+        self._websocket_server.track_data_send(packets)
+        await self._websocket_server.broadcast(packets)
+
+    def _reassemble(self, packet: Packet) -> Optional[Dict[str, Any]]:
+        """登记一个分片，收齐时返回完整 payload；校验失败或超限时记录并丢弃该传输。"""
+        if not self._payload_intact(packet, packet.payload):
+            self._control.logger.warning(
+                f"Dropping corrupted data fragment from {packet.from_[0]}"
+            )
+            return None
+        try:
+            return self.fragments.add(packet.from_[0], packet.payload)
+        except FragmentError as exc:
+            self._control.logger.warning(
+                f"Dropping fragmented data from {packet.from_[0]}: {exc}"
+            )
+            return None
 
-    async def _handle_data_sendok(self, packet: DataModel) -> None:  # type: ignore[override]
-        self._websocket_server.last_send_packet.pop(packet.from_[0], None)
+    def _fragment_fallback_targets(self) -> List[str]:
+        """已连接但未协商 ``data_fragment_v1`` 的子服务器。"""
+        return [
+            server_id
+            for server_id in self._websocket_server.websockets
+            if not self._websocket_server.peer_supports(server_id, Capability.FRAGMENTATION)
+        ]
 
-    async def _handle_data_error(self, packet: DataModel, websocket: Any) -> None:
-        await self._send_last_data_packet(packet.from_[0], websocket)
+    async def _handle_data_sendok(self, packet: Packet) -> None:  # type: ignore[override]
+        upto = acked_through(packet.payload)
+        if upto is not None:
+            self._websocket_server.acknowledge_through(packet.from_[0], upto)
+        else:
+            self._websocket_server.acknowledge(packet.from_[0], acked_sid(packet.payload))
 
-    async def _handle_file_send(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_data_error(self, packet: Packet, websocket: Any) -> None:
+        await self._send_last_data_packet(packet.from_[0], websocket, acked_sid(packet.payload))
+
+    async def _handle_file_send(self, packet: Packet, websocket: Any) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum):
+        if not self._payload_intact(packet, payload):
             await self._send_file_error(packet.from_[0], websocket)
             return
 
@@ -657,9 +1169,9 @@ class ServerDataPacket:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
         self._wait_files[packet.from_[0]] = open(save_path, "wb")
 
-    async def _handle_file_sending(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_file_sending(self, packet: Packet, websocket: Any) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum):
+        if not self._payload_intact(packet, payload):
             await self._send_file_error(packet.from_[0], websocket)
             return
 
@@ -674,9 +1186,9 @@ class ServerDataPacket:
         except ValueError:
             await self._send_file_error(packet.from_[0], websocket)
 
-    async def _handle_file_sendok(self, packet: DataModel, websocket: Any) -> None:
+    async def _handle_file_sendok(self, packet: Packet, websocket: Any) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum):
+        if not self._payload_intact(packet, payload):
             await self._send_file_error(packet.from_[0], websocket)
             return
 
@@ -691,28 +1203,56 @@ class ServerDataPacket:
         else:
             await self._send_file_error(packet.from_[0], websocket)
 
-    async def _send_acknowledgement(self, server_id: str, websocket: Any) -> None:
+    def _ack_payload(self, server_id: str, sid: Optional[int]) -> Optional[Dict[str, int]]:
+        if not self._websocket_server.peer_supports(server_id, Capability.SEND_WINDOW):
+            return None
+        return ack_payload(sid)
+
+    async def _send_acknowledgement(
+        self, server_id: str, websocket: Any, sid: Optional[int] = None
+    ) -> None:
+        if (
+            sid is not None
+            and self._websocket_server.peer_supports(server_id, Capability.CUMULATIVE_ACK)
+            and self._websocket_server.acks.defer(server_id, sid)
+        ):
+            return
         packet = self.get_data_packet(
             PacketType.DATA_SENDOK,
             (server_id, "system"),
             DEFAULT_SERVER,
-            None,
+            self._ack_payload(server_id, sid),
         )
         await self._websocket_server.send(packet.get(server_id), websocket, server_id)  # type: ignore[arg-type]
 
-    async def _send_data_error(self, server_id: str, websocket: Any) -> None:
+    def cumulative_ack(self, server_id: str, upto: int) -> Optional[Dict[str, Any]]:
+        """构建发往 *server_id* 的累计确认。"""
+        return self.get_data_packet(
+            PacketType.DATA_SENDOK,
+            (server_id, "system"),
+            DEFAULT_SERVER,
+            cumulative_payload(upto),
+        ).get(server_id)
+
+    async def _send_data_error(
+        self, server_id: str, websocket: Any, sid: Optional[int] = None
+    ) -> None:
+        if sid is not None and self._websocket_server.peer_supports(server_id, Capability.CUMULATIVE_ACK):
+            self._websocket_server.acks.seen(server_id, sid)
         error_packet = self.get_data_packet(
             PacketType.DATA_ERROR,
             (server_id, "system"),
             DEFAULT_SERVER,
-            None,
+            self._ack_payload(server_id, sid),
         )
         await self._websocket_server.send(error_packet.get(server_id), websocket, server_id)  # type: ignore[arg-type]
 
-    async def _send_last_data_packet(self, server_id: str, websocket: Any) -> None:
-        last_packet = self._websocket_server.last_send_packet.get(server_id)
+    async def _send_last_data_packet(
+        self, server_id: str, websocket: Any, sid: Optional[int] = None
+    ) -> None:
+        last_packet = self._websocket_server.unacked_data_send(server_id, sid)
         if last_packet:
-            await self._websocket_server.send(last_packet.get(server_id), websocket, server_id)  # type: ignore[arg-type]
+            await self._websocket_server.send(last_packet, websocket, server_id)
 
     async def _send_file_error(self, server_id: str, websocket: Any) -> None:
         error_packet = self.get_data_packet(
@@ -739,9 +1279,7 @@ class ServerDataPacket:
         return server_id, generate_password()
 
     def _save_credentials(self, server_id: str, password: str) -> None:
-        accounts = self._control.get_config(config_path="account.json")
-        accounts[server_id] = password
-        self._control.save_config(accounts, "account.json")
+        self._websocket_server.accounts.set(server_id, password)
 
 
 class ClientDataPacket:
@@ -755,14 +1293,17 @@ class ClientDataPacket:
         self._control = control_interface
         self._client = websocket_client
         self._history: Dict[str, List[HistoryEntry]] = {}
-        self._recent_packets: List[Tuple[DataModel, str, str]] = []
+        self._recent_packets: List[Tuple[Packet, str, str]] = []
         self._last_received_sid: int = 0
         self._last_sent_sid: int = 0
         self._wait_file: Optional[Any] = None
         self.server_list: List[str] = []
+        self.fragments = reassembler_for(control_interface.config)
+        # 中心服务器为每个连接重新编号，重新登录时清空
+        self.duplicates = filter_for(control_interface.config)
 
     @staticmethod
-    def _upsert_history_entry(bucket: List[HistoryEntry], sid: int, packet: DataModel | None, direction: str) -> None:
+    def _upsert_history_entry(bucket: List[HistoryEntry], sid: int, packet: Packet | None, direction: str) -> None:
         for index, (existing_sid, _, _) in enumerate(bucket):
             if existing_sid == sid:
                 bucket[index] = (sid, packet, direction)
@@ -788,28 +1329,30 @@ class ClientDataPacket:
         """构建客户端发送的数据包，保持向后兼容的返回结构。"""
 
         highest_known = self._highest_known_sid()
-        if packet_type in PERSISTENT_TYPES:
+        persistent = is_persistent(packet_type, self._transient_acks())
+        if persistent:
             sid = highest_known + 1
         elif packet_type is PacketType.PING:
             sid = highest_known
         else:
             sid = highest_known
-        packet = DataModel(
-            type=packet_type,
-            sid=sid,
-            to=to_info,
-            from_=from_info,  # type: ignore[call-arg]
-            payload=payload,
-            status=status,
+        packet = Packet(
+            packet_type,
+            sid,
+            to_info,
+            from_info,
+            payload,
+            status,
+            with_checksum=not self._transport_integrity(),
         )
-        if packet_type in PERSISTENT_TYPES:
+        if persistent:
             self._ensure_sid_continuity(sid, DEFAULT_TEMP[0])
             bucket = self._history_bucket()
             self._upsert_history_entry(bucket, sid, packet, "sent")
             self._last_sent_sid = max(self._last_sent_sid, sid)
             self._sort_history()
             self._record_recent(packet, "sent", DEFAULT_TEMP[0])
-        return {DEFAULT_TEMP[0]: packet.model_dump(by_alias=True)}
+        return {DEFAULT_TEMP[0]: packet.dump()}
 
     def get_history_packet(self, server_id: str, old_sid: int) -> List[Dict[str, Any]]:
         if server_id not in self._history:
@@ -819,7 +1362,7 @@ class ClientDataPacket:
         for sid, packet, direction in bucket:
             if sid <= old_sid or direction != "sent" or packet is None:
                 continue
-            results.append(packet.model_dump(by_alias=True))
+            results.append(packet.dump())
         return results
 
     def get_recent_packets(
@@ -835,20 +1378,32 @@ class ClientDataPacket:
         entries = filtered_entries[-limit:] if limit > 0 else filtered_entries
         return [
             {
-                **packet.model_dump(by_alias=True),
+                **packet.dump(),
                 "direction": direction,
                 "server_id": owner_id,
             }
             for packet, direction, owner_id in entries
         ]
 
-    async def parse_msg(self, data: Dict[str, Any]) -> None:
-        packet = DataModel.model_validate(data)
+    async def parse_msg(self, data: Dict[str, Any] | List[Any]) -> None:
+        if isinstance(data, list):
+            # batch_v1 批量帧：按发送顺序逐个处理
+            for item in data:
+                if not isinstance(item, dict):
+                    raise ValueError("Batch frame items must be packets")
+                await self.parse_msg(item)
+            return
+        packet = Packet.validate(data)
         server_id = packet.from_[0]
-        bucket = self._history.setdefault(server_id, [])
-        self._upsert_history_entry(bucket, packet.sid, packet, "received")
+        if packet.type is PacketType.DATA_FRAGMENT:
+            # 分片不进入历史与最近记录，收齐后按 data_send 交给插件
+            await self._handle_data_fragment(packet)
+            return
+        if is_recorded(packet.type, self._transient_acks()):
+            bucket = self._history.setdefault(server_id, [])
+            self._upsert_history_entry(bucket, packet.sid, packet, "received")
         self._record_recent(packet, "received", server_id)
-        if packet.type in PERSISTENT_TYPES:
+        if is_persistent(packet.type, self._transient_acks()):
             self._last_received_sid = max(self._last_received_sid, packet.sid)
         self._control.debug(
             f"[R][{packet.type}][{packet.from_} -> {packet.to}][{packet.sid}] {packet.payload}",
@@ -857,7 +1412,7 @@ class ClientDataPacket:
 
         match packet.type:
             case PacketType.PONG:
-                return
+                await self._handle_pong(packet)
             case PacketType.REGISTERED:
                 await self._handle_registered(packet)
             case PacketType.REGISTER_ERROR:
@@ -873,9 +1428,9 @@ class ClientDataPacket:
             case PacketType.DATA_SEND:
                 await self._handle_data_send(packet)
             case PacketType.DATA_SENDOK:
-                await self._handle_data_sendok()
+                await self._handle_data_sendok(packet)
             case PacketType.DATA_ERROR:
-                await self._handle_data_error()
+                await self._handle_data_error(packet)
             case PacketType.FILE_SEND:
                 await self._handle_file_send(packet)
             case PacketType.FILE_SENDING:
@@ -884,6 +1439,8 @@ class ClientDataPacket:
                 await self._handle_file_sendok(packet)
             case PacketType.FILE_ERROR:
                 await self._handle_file_error()
+            case PacketType.GROUP_KEY:
+                await self._handle_group_key(packet)
             case _:
                 handled = await self._dispatch_custom_handlers(packet)
                 if not handled:
@@ -892,7 +1449,7 @@ class ClientDataPacket:
                         level=3,
                     )
 
-    async def _dispatch_custom_handlers(self, packet: DataModel) -> bool:
+    async def _dispatch_custom_handlers(self, packet: Packet) -> bool:
         """查找并执行 StatusRegistry 中注册的自定义处理器。"""
         handlers = status_registry.get_handlers(str(packet.type), packet.status)  # type: ignore[arg-type]
         if not handlers:
@@ -900,7 +1457,8 @@ class ClientDataPacket:
         for handler in handlers:
             try:
                 import asyncio
-                result = handler(packet)
+                # 插件处理器沿用公开的 DataModel 类型
+                result = handler(packet.to_model())
                 if asyncio.iscoroutine(result):
                     await result
             except Exception as exc:
@@ -909,7 +1467,7 @@ class ClientDataPacket:
                 )
         return True
 
-    async def _handle_registered(self, packet: DataModel) -> None:
+    async def _handle_registered(self, packet: Packet) -> None:
         self._control.debug(
             f"[FLOW][REGISTER] success server_id={packet.to[0]}", level=2
         )
@@ -936,29 +1494,77 @@ class ClientDataPacket:
         aes_main(self._control, password)
         await self._client.start_login(reason="post-register")
 
-    async def _handle_register_error(self, packet: DataModel) -> None:
+    async def _handle_register_error(self, packet: Packet) -> None:
         self._control.debug(
             f"[FLOW][REGISTER] error payload={packet.payload}", level=2
         )
         self._control.logger.error(f"Register Error: {packet.payload}")
         self._client.stop_server()
 
-    async def _handle_logined(self, packet: DataModel) -> None:
+    async def _handle_pong(self, packet: Packet) -> None:
+        gap = gap_range(packet.payload)
+        if gap is None:
+            return
+        # 中心服务器不再重放这段 sid：跳过它们，之后的 ping 不再请求
+        self._control.logger.warning(
+            f"Hub skipped replay of packets sid {gap[0]}-{gap[1]}; they will not be delivered"
+        )
+        self._last_received_sid = max(self._last_received_sid, gap[1])
+
+    async def _handle_logined(self, packet: Packet) -> None:
         self._control.debug(
             f"[FLOW][LOGIN] success server_id={packet.to[0]}", level=2
         )
         self._client.server_id = packet.to[0]
+        payload = packet.payload or {}
+        self._client.capabilities = set(
+            negotiate_capabilities(payload.get("capabilities"))
+        )
+        self._client.protocol_version = negotiate_protocol_version(payload) or PROTOCOL_VERSION
+        server_nonce = decode_session_nonce(payload.get("session_nonce"))
+        if Capability.AEAD_SESSION.value in self._client.capabilities:
+            if server_nonce is None or self._client.session_nonce is None:
+                self._client.capabilities.discard(Capability.AEAD_SESSION.value)
+            else:
+                self._client.session = derive_session(
+                    self._client.session_nonce, server_nonce, ROLE_CLIENT
+                )
+        if Capability.GROUP_KEY.value in self._client.capabilities:
+            group_key = parse_group_key(payload.get("group_key"))
+            if group_key is None:
+                self._client.capabilities.discard(Capability.GROUP_KEY.value)
+            else:
+                self._client.group_keys.install(*group_key)
+        if Capability.SEND_WINDOW.value not in self._client.capabilities:
+            # 新会话未协商发送窗口：只保留最新的未确认数据包，按旧协议重发
+            unacked = self._client.send_window.unacked()
+            if unacked:
+                self._client.last_data_packet = unacked[-1][1]
+            self._client.send_window.clear()
+        # 中心服务器为新连接重新编号，旧连接上写出的数据包需重发后才能被累计确认
+        self._client.acks.forget(DEFAULT_SERVER[0])
+        self.duplicates.forget(DEFAULT_SERVER[0])
+        self._client.send_window.reset_written()
         self._client.start_keepalive()
+        await self._client.resend_carried()
         connected()
 
-    async def _handle_new_login(self, packet: DataModel) -> None:
+    async def _handle_group_key(self, packet: Packet) -> None:
+        group_key = parse_group_key(packet.payload)
+        if group_key is None:
+            self._control.logger.warning("Ignoring malformed group key packet")
+            return
+        self._client.group_keys.install(*group_key)
+        self._control.debug(f"[FLOW][GROUP_KEY] epoch={group_key[0]}", level=2)
+
+    async def _handle_new_login(self, packet: Packet) -> None:
         payload = packet.payload or {}
         server_id = payload.get("server_id")
         if server_id and server_id not in self.server_list:
             self.server_list.append(server_id)
             new_connect(server_id)
 
-    async def _handle_del_login(self, packet: DataModel) -> None:
+    async def _handle_del_login(self, packet: Packet) -> None:
         payload = packet.payload or {}
         server_id = payload.get("server_id")
         if server_id:
@@ -966,7 +1572,7 @@ class ClientDataPacket:
                 self.server_list.remove(server_id)
             del_connect(server_id)
 
-    async def _handle_login_error(self, packet: DataModel) -> None:
+    async def _handle_login_error(self, packet: Packet) -> None:
         payload = packet.payload or {}
         self._control.debug(
             f"[FLOW][LOGIN] error info={payload.get('error')}", level=2
@@ -974,22 +1580,56 @@ class ClientDataPacket:
         self._control.logger.error(f"Login Error: {payload.get('error')}")
         self._client.stop_server()
 
-    async def _handle_data_send(self, packet: DataModel) -> None:
-        if packet.payload is None or verify_md5_checksum(packet.payload, packet.checksum):
+    async def _handle_data_send(self, packet: Packet) -> None:
+        if packet.payload is None or self._payload_intact(packet, packet.payload):
+            if not self.duplicates.first_seen(DEFAULT_SERVER[0], packet.sid):
+                # 重发或历史重放带来的重复数据包只补发确认
+                await self._send_data_response(packet.sid)
+                return
             recv_data(packet.to[1], packet.from_[0], packet.payload)  # type: ignore[arg-type]
-            await self._send_data_response()
+            await self._send_data_response(packet.sid)
         else:
-            await self._send_data_error()
+            await self._send_data_error(packet.sid)
 
-    async def _handle_data_sendok(self) -> None:
-        self._client.last_data_packet = None
+    async def _handle_data_fragment(self, packet: Packet) -> None:
+        if not self._payload_intact(packet, packet.payload):
+            self._control.logger.warning(
+                f"Dropping corrupted data fragment from {packet.from_[0]}"
+            )
+            return
+        try:
+            payload = self.fragments.add(packet.from_[0], packet.payload)
+        except FragmentError as exc:
+            self._control.logger.warning(
+                f"Dropping fragmented data from {packet.from_[0]}: {exc}"
+            )
+            return
+        if payload is not None:
+            recv_data(packet.to[1], packet.from_[0], payload)
+
+    async def _handle_data_sendok(self, packet: Packet) -> None:
+        upto = acked_through(packet.payload)
+        sid = acked_sid(packet.payload)
+        if upto is not None:
+            self._client.send_window.ack_through(upto)
+        elif sid is None:
+            self._client.last_data_packet = None
+        else:
+            self._client.send_window.ack(sid)
 
-    async def _handle_data_error(self) -> None:
-        await self._send_last_data_packet()
+    async def _handle_data_error(self, packet: Packet) -> None:
+        sid = acked_sid(packet.payload)
+        if sid is None:
+            await self._send_last_data_packet()
+            return
+        self._client.send_window.nack(sid)
+        unacked = self._client.send_window.get(sid)
+        if unacked is not None:
+            await self._client.send(unacked)
 
-    async def _handle_file_send(self, packet: DataModel) -> None:
+    async def _handle_file_send(self, packet: Packet) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum):
+        if not self._payload_intact(packet, payload):
             await self._send_file_error()
             return
 
@@ -1001,9 +1641,9 @@ class ClientDataPacket:
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
         self._wait_file = open(save_path, "wb")
 
-    async def _handle_file_sending(self, packet: DataModel) -> None:
+    async def _handle_file_sending(self, packet: Packet) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum) or self._wait_file is None:
+        if not self._payload_intact(packet, payload) or self._wait_file is None:
             await self._send_file_error()
             return
 
@@ -1013,9 +1653,9 @@ class ClientDataPacket:
         except ValueError:
             await self._send_file_error()
 
-    async def _handle_file_sendok(self, packet: DataModel) -> None:
+    async def _handle_file_sendok(self, packet: Packet) -> None:
         payload = packet.payload or {}
-        if not verify_md5_checksum(payload, packet.checksum) or self._wait_file is None:
+        if not self._payload_intact(packet, payload) or self._wait_file is None:
             await self._send_file_error()
             return
 
@@ -1034,8 +1674,8 @@ class ClientDataPacket:
                 pass
             self._wait_file = None
 
-    def _record_recent(self, packet: DataModel, direction: str, server_id: str) -> None:
-        if packet.type not in PERSISTENT_TYPES:
+    def _record_recent(self, packet: Packet, direction: str, server_id: str) -> None:
+        if not is_persistent(packet.type, self._transient_acks()):
             return
         if direction == "received":
             self._last_received_sid = max(self._last_received_sid, packet.sid)
@@ -1157,6 +1797,13 @@ class ClientDataPacket:
     def _highest_known_sid(self) -> int:
         return max(self._highest_sid(), self._last_received_sid, self._last_sent_sid)
 
+    def _transport_integrity(self) -> bool:
+        return Capability.TRANSPORT_INTEGRITY.value in self._client.capabilities
+
+    def _payload_intact(self, packet: Packet, payload: Any) -> bool:
+        """协商了 ``transport_integrity_v1`` 时由传输层认证明文，不再逐包校验。"""
+        return self._transport_integrity() or verify_md5_checksum(payload, packet.checksum)
+
     def _ensure_sid_continuity(self, sid: int, server_id: str) -> None:
         if sid <= 0:
             return
@@ -1181,27 +1828,43 @@ class ClientDataPacket:
             )
         )
 
-    async def _send_data_response(self) -> None:
+    def _transient_acks(self) -> bool:
+        return Capability.CUMULATIVE_ACK.value in self._client.capabilities
+
+    def _ack_payload(self, sid: Optional[int]) -> Optional[Dict[str, int]]:
+        if Capability.SEND_WINDOW.value not in self._client.capabilities:
+            return None
+        return ack_payload(sid)
+
+    async def _send_data_response(self, sid: Optional[int] = None) -> None:
         if not self._client.server_id:
             return
+        if (
+            sid is not None
+            and Capability.CUMULATIVE_ACK.value in self._client.capabilities
+            and self._client.acks.defer(DEFAULT_SERVER[0], sid)
+        ):
+            return
         await self._client.send(
             self.get_data_packet(
                 PacketType.DATA_SENDOK,
                 DEFAULT_SERVER,
                 (self._client.server_id, "system"),
-                None,
+                self._ack_payload(sid),
             )
         )
 
-    async def _send_data_error(self) -> None:
+    async def _send_data_error(self, sid: Optional[int] = None) -> None:
         if not self._client.server_id:
             return
+        if sid is not None and Capability.CUMULATIVE_ACK.value in self._client.capabilities:
+            self._client.acks.seen(DEFAULT_SERVER[0], sid)
         await self._client.send(
             self.get_data_packet(
                 PacketType.DATA_ERROR,
                 DEFAULT_SERVER,
                 (self._client.server_id, "system"),
-                None,
+                self._ack_payload(sid),
             )
         )
 
@@ -0,0 +1,101 @@
+"""按 ``(来源, sid)`` 抑制重复投递的 ``data_send``。
+
+重传、``data_error`` 后的重发与 ``ping`` 历史重放都可能让同一个 ``data_send`` 多次到达接收方。
+sid 由每一跳的发送方分配（子服务器发往中心服务器的 sid 由子服务器分配，中心服务器转发时重新编号），
+因此“来源”是这一跳的发送方：中心服务器按子服务器区分，子服务器只有中心服务器一个来源。
+接收方为每个来源保留最近 ``dedup_window_size`` 个 sid 的接收位图（与 IPsec 防重放窗口相同），
+已见过的 sid 只回发确认、不再交给插件。比窗口更旧的 sid 无法判断，按新数据包投递。
+
+sid 由发送方按连接编号，连接重建后可能重新开始，因此位图随连接关闭或重新登录清空。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+DEFAULT_DEDUP_WINDOW = 1024
+
+
+def filter_for(config: Any) -> "DuplicateFilter":
+    """按配置中的窗口大小创建 :class:`DuplicateFilter`。"""
+    size = getattr(config, "dedup_window_size", DEFAULT_DEDUP_WINDOW)
+    return DuplicateFilter(size if isinstance(size, int) and size > 0 else DEFAULT_DEDUP_WINDOW)
+
+
+class SidWindow:
+    """单个来源最近 ``size`` 个 sid 的接收位图，第 0 位对应已收到的最大 sid。"""
+
+    __slots__ = ("size", "highest", "bits")
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.highest: Optional[int] = None
+        self.bits = 0
+
+    def mark(self, sid: int) -> Optional[bool]:
+        """登记 *sid*，首次出现返回 ``True``，重复返回 ``False``，超出窗口返回 ``None``。"""
+        if self.highest is None or sid - self.highest >= self.size:
+            self.highest = sid
+            self.bits = 1
+            return True
+        if sid > self.highest:
+            self.bits = ((self.bits << (sid - self.highest)) | 1) & ((1 << self.size) - 1)
+            self.highest = sid
+            return True
+        offset = self.highest - sid
+        if offset >= self.size:
+            return None
+        bit = 1 << offset
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+        return True
+
+    def unmark(self, sid: int) -> None:
+        """撤销登记，校验失败的数据包重发时仍按首次到达处理。"""
+        if self.highest is not None and 0 <= self.highest - sid < self.size:
+            self.bits &= ~(1 << (self.highest - sid))
+
+
+class DuplicateFilter:
+    """所有来源的接收位图。"""
+
+    def __init__(self, size: int = DEFAULT_DEDUP_WINDOW) -> None:
+        self.size = max(1, size)
+        self._windows: Dict[str, SidWindow] = {}
+        self.accepted = 0
+        self.duplicates = 0
+        self.too_old = 0
+
+    def first_seen(self, source: str, sid: int) -> bool:
+        """登记 ``(source, sid)``，返回是否应当投递给插件。"""
+        window = self._windows.get(source)
+        if window is None:
+            window = self._windows[source] = SidWindow(self.size)
+        fresh = window.mark(sid)
+        if fresh is False:
+            self.duplicates += 1
+            return False
+        if fresh is None:
+            self.too_old += 1
+        self.accepted += 1
+        return True
+
+    def discard(self, source: str, sid: int) -> None:
+        window = self._windows.get(source)
+        if window is not None:
+            window.unmark(sid)
+
+    def forget(self, source: str) -> None:
+        self._windows.pop(source, None)
+
+    def clear(self) -> None:
+        self._windows.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sources": len(self._windows),
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "too_old": self.too_old,
+        }
@@ -0,0 +1,172 @@
+"""二进制传输信封（wire v2）。
+
+登录完成后，连接两端以二进制 WebSocket 帧交换数据::
+
+    +-------+---------+-------+----------------------+
+    | magic | version | flags | ciphertext (raw)     |
+    | 1 B   | 1 B     | 1 B   | ...                  |
+    +-------+---------+-------+----------------------+
+
+账户在登录时与连接绑定，不再在每帧中重复；密文直接以原始字节携带，
+省去外层 JSON 与 base64 文本编码。wire v1（JSON + base64 Fernet 文本）
+仍用于注册、登录以及未协商该能力的旧客户端。
+
+置位 ``FLAG_SESSION`` 的帧携带会话密钥加密的 AEAD 消息（计数器 + 密文 + tag），
+帧头作为附加认证数据参与校验。置位 ``FLAG_GROUP`` 的帧在帧头后携带 4 字节组密钥纪元，
+其后是以该纪元组密钥加密的 Fernet 密文。
+"""
+
+from __future__ import annotations
+
+import base64
+import struct
+from typing import Optional, Tuple
+
+from connect_core.aes_encrypt import (
+    DecryptionError,
+    SessionCipher,
+    aes_decrypt,
+    aes_encrypt,
+)
+from connect_core.websockets.compression import decompress
+from connect_core.websockets.group_key import GroupKeyring
+
+MAGIC = 0xCC
+WIRE_VERSION_JSON = 1
+WIRE_VERSION_BINARY = 2
+
+HEADER = struct.Struct("!BBB")
+GROUP_EPOCH = struct.Struct("!I")
+
+# classify_frame 的返回值
+FRAME_ENVELOPE = "envelope"
+FRAME_JSON = "json"
+FRAME_TOKEN = "token"
+
+_JSON_START = ord("{")
+
+# flags 位定义
+FLAG_COMPRESSED = 0x01
+FLAG_SESSION = 0x02
+FLAG_GROUP = 0x04
+
+
+class EnvelopeError(ValueError):
+    """Raised when a binary frame is malformed or has an unsupported version."""
+
+
+def is_envelope(frame: bytes | str) -> bool:
+    """判断帧是否为二进制信封（首字节为 magic）。"""
+    return (
+        isinstance(frame, (bytes, bytearray, memoryview))
+        and len(frame) >= HEADER.size
+        and frame[0] == MAGIC
+    )
+
+
+def classify_frame(frame: bytes | str) -> str:
+    """仅凭首字节判断帧类别：二进制信封、明文 JSON 或 Fernet 令牌。
+
+    Fernet 令牌以 base64 字符开头，不会与 ``{`` 或 magic 冲突。
+    """
+    if isinstance(frame, str):
+        return FRAME_JSON if frame[:1] == "{" else FRAME_TOKEN
+    if not frame:
+        return FRAME_TOKEN
+    first = frame[0]
+    if first == MAGIC and len(frame) >= HEADER.size:
+        return FRAME_ENVELOPE
+    if first == _JSON_START:
+        return FRAME_JSON
+    return FRAME_TOKEN
+
+
+def pack_frame(token: bytes, flags: int = 0) -> bytes:
+    """把 Fernet token 转换为带头部的二进制帧。"""
+    return HEADER.pack(MAGIC, WIRE_VERSION_BINARY, flags) + base64.urlsafe_b64decode(token)
+
+
+def unpack_frame(frame: bytes) -> Tuple[int, bytes]:
+    """解析二进制帧，返回 ``(flags, fernet_token)``。"""
+    if not is_envelope(frame):
+        raise EnvelopeError("Not a binary envelope frame")
+    magic, version, flags = HEADER.unpack_from(frame)
+    if version != WIRE_VERSION_BINARY:
+        raise EnvelopeError(f"Unsupported wire version: {version}")
+    return flags, base64.urlsafe_b64encode(frame[HEADER.size :])
+
+
+def encode_envelope(
+    plaintext: bytes,
+    password: Optional[str] = None,
+    flags: int = 0,
+    session: Optional[SessionCipher] = None,
+) -> bytes:
+    """加密 *plaintext* 并封装为二进制帧；给定 *session* 时使用会话密钥。"""
+    if session is None:
+        return pack_frame(aes_encrypt(plaintext, password), flags)
+    header = HEADER.pack(MAGIC, WIRE_VERSION_BINARY, flags | FLAG_SESSION)
+    return header + aes_encrypt(plaintext, session=session, associated_data=header)
+
+
+def encode_group_envelope(
+    plaintext: bytes, epoch: int, key: str, flags: int = 0
+) -> bytes:
+    """以组密钥加密 *plaintext*，帧中携带纪元以便接收方选择密钥。"""
+    token = base64.urlsafe_b64decode(aes_encrypt(plaintext, key))
+    return (
+        HEADER.pack(MAGIC, WIRE_VERSION_BINARY, flags | FLAG_GROUP)
+        + GROUP_EPOCH.pack(epoch)
+        + token
+    )
+
+
+def decode_envelope(
+    frame: bytes,
+    password: Optional[str] = None,
+    max_size: Optional[int] = None,
+    session: Optional[SessionCipher] = None,
+    group_keys: Optional[GroupKeyring] = None,
+) -> Tuple[int, bytes]:
+    """解封并解密二进制帧，返回 ``(flags, plaintext)``；压缩帧会被透明解压。"""
+    if not is_envelope(frame):
+        raise EnvelopeError("Not a binary envelope frame")
+    flags = frame[2]
+    try:
+        if flags & FLAG_GROUP:
+            plaintext = _decrypt_group(frame, group_keys)
+        elif flags & FLAG_SESSION:
+            if session is None:
+                raise EnvelopeError("Session frame without a negotiated session")
+            if frame[1] != WIRE_VERSION_BINARY:
+                raise EnvelopeError(f"Unsupported wire version: {frame[1]}")
+            plaintext = aes_decrypt(
+                bytes(frame[HEADER.size :]),
+                session=session,
+                associated_data=bytes(frame[: HEADER.size]),
+            )
+        else:
+            flags, token = unpack_frame(frame)
+            plaintext = aes_decrypt(token, password)
+    except (DecryptionError, EnvelopeError):
+        raise
+    except Exception as exc:
+        raise EnvelopeError(f"Invalid envelope payload: {exc}") from exc
+    if flags & FLAG_COMPRESSED:
+        plaintext = decompress(plaintext, max_size)
+    return flags, plaintext
+
+
+def _decrypt_group(frame: bytes, group_keys: Optional[GroupKeyring]) -> bytes:
+    if group_keys is None:
+        raise EnvelopeError("Group frame without a group key")
+    if frame[1] != WIRE_VERSION_BINARY:
+        raise EnvelopeError(f"Unsupported wire version: {frame[1]}")
+    if len(frame) < HEADER.size + GROUP_EPOCH.size:
+        raise EnvelopeError("Truncated group frame")
+    (epoch,) = GROUP_EPOCH.unpack_from(frame, HEADER.size)
+    key = group_keys.get(epoch)
+    if key is None:
+        raise EnvelopeError(f"Unknown group key epoch: {epoch}")
+    token = base64.urlsafe_b64encode(frame[HEADER.size + GROUP_EPOCH.size :])
+    return aes_decrypt(token, key)
@@ -0,0 +1,216 @@
+"""超大 ``data_send`` payload 的分片与重组。
+
+序列化后的 payload 超过 ``fragment_size`` 时，发送方把 JSON 文本切成若干
+``data_fragment`` 数据包依次发送，每个分片都是一个独立加密的有界帧。中心服务器把分片
+原样转发给协商了 ``data_fragment_v1`` 的目标，只有自身是接收方或目标未协商该能力时
+才重组；接收方在 :class:`Reassembler` 中按声明的总长度预留缓冲，收齐后还原 payload。
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from connect_core.tools import json_codec
+from connect_core.websockets.offload import exceeds
+
+DEFAULT_FRAGMENT_SIZE = 1024 * 1024
+DEFAULT_BUFFER_LIMIT = 256 * 1024 * 1024
+DEFAULT_TIMEOUT = 60.0
+# 中心服务器转发分片时，目标发送队列最多积压的分片数；超过后暂停读取发送方
+RELAY_BACKLOG_FRAGMENTS = 4
+
+
+class FragmentError(ValueError):
+    """分片格式错误、与同一传输的其它分片冲突或超出重组缓冲限制。"""
+
+
+def configured_size(config: Any) -> int:
+    """读取配置中的分片大小，``0`` 表示关闭分片。"""
+    size = getattr(config, "fragment_size", DEFAULT_FRAGMENT_SIZE)
+    return size if isinstance(size, int) and size > 0 else 0
+
+
+def relay_backlog_bytes(config: Any) -> int:
+    """转发分片时目标发送队列允许积压的字节数。"""
+    return RELAY_BACKLOG_FRAGMENTS * (configured_size(config) or DEFAULT_FRAGMENT_SIZE)
+
+
+def reassembler_for(config: Any) -> "Reassembler":
+    """按配置中的缓冲上限与超时创建 :class:`Reassembler`。"""
+    return Reassembler(
+        getattr(config, "fragment_buffer_max_bytes", DEFAULT_BUFFER_LIMIT),
+        getattr(config, "fragment_timeout", DEFAULT_TIMEOUT),
+    )
+
+
+def oversized(payload: Any, fragment_size: int) -> bool:
+    """*payload* 估算超过 *fragment_size* 时需要分片发送；``fragment_size <= 0`` 表示关闭分片。"""
+    return fragment_size > 0 and isinstance(payload, dict) and exceeds(payload, fragment_size)
+
+
+def split(text: str, fragment_size: int) -> Iterator[Dict[str, Any]]:
+    """把已序列化的 payload 文本按 *fragment_size* 个字符切分为 ``data_fragment`` 的 payload。
+
+    逐个生成分片，调用方发送一个再取下一个，额外内存只有单个分片的大小。
+    """
+    fragment_size = max(1, fragment_size)
+    transfer_id = uuid.uuid4().hex
+    size = len(text)
+    count = max(1, -(-size // fragment_size))
+    for index in range(count):
+        start = index * fragment_size
+        yield {
+            "id": transfer_id,
+            "index": index,
+            "count": count,
+            "size": size,
+            "data": text[start:start + fragment_size],
+        }
+
+
+def _non_negative(fragment: Dict[str, Any], name: str) -> int:
+    value = fragment.get(name)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise FragmentError(f"Fragment {name} must be a non-negative integer")
+    return value
+
+
+def _parse(fragment: Any) -> Tuple[str, int, int, int, str]:
+    if not isinstance(fragment, dict):
+        raise FragmentError("Fragment payload must be a dict")
+    transfer_id = fragment.get("id")
+    if not isinstance(transfer_id, str) or not transfer_id:
+        raise FragmentError("Fragment id must be a non-empty string")
+    index = _non_negative(fragment, "index")
+    count = _non_negative(fragment, "count")
+    size = _non_negative(fragment, "size")
+    data = fragment.get("data")
+    if not isinstance(data, str):
+        raise FragmentError("Fragment data must be a string")
+    # 每个分片至少携带一个字符，分片数不会超过总长度
+    if not 0 < count <= max(1, size) or index >= count:
+        raise FragmentError(f"Fragment index {index} out of range for count {count}")
+    return transfer_id, index, count, size, data
+
+
+class _Transfer:
+    __slots__ = ("count", "size", "parts", "received", "deadline")
+
+    def __init__(self, count: int, size: int, deadline: float) -> None:
+        self.count = count
+        self.size = size
+        self.parts: Dict[int, str] = {}
+        self.received = 0
+        self.deadline = deadline
+
+
+class Reassembler:
+    """按来源与传输 id 缓存分片，收齐后还原 payload。
+
+    新传输按声明的 ``size`` 预留缓冲，所有进行中的传输合计不超过 ``max_bytes``；
+    超过 ``timeout`` 秒没有新分片的传输在下一次调用 :meth:`add` / :meth:`expire` 时丢弃。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_BUFFER_LIMIT,
+        timeout: float = DEFAULT_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self.timeout = timeout
+        self._clock = clock
+        self._transfers: Dict[Tuple[str, str], _Transfer] = {}
+        self.buffered = 0
+        self.completed = 0
+        self.expired = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._transfers)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "buffered": self.buffered,
+            "completed": self.completed,
+            "expired": self.expired,
+            "rejected": self.rejected,
+        }
+
+    def add(self, source: str, fragment: Any) -> Optional[Dict[str, Any]]:
+        """登记来自 *source* 的一个分片；最后一个分片到达时返回还原后的 payload。
+
+        格式错误、与已收分片冲突或超出缓冲限制时丢弃整个传输并抛出 :class:`FragmentError`。
+        """
+        now = self._clock()
+        self.expire(now)
+        try:
+            transfer_id, index, count, size, data = _parse(fragment)
+        except FragmentError:
+            self.rejected += 1
+            raise
+        key = (source, transfer_id)
+        transfer = self._transfers.get(key)
+        if transfer is None:
+            if size > self.max_bytes - self.buffered:
+                self.rejected += 1
+                raise FragmentError(
+                    f"Fragmented payload of {size} bytes exceeds the reassembly buffer limit"
+                )
+            transfer = _Transfer(count, size, now + self.timeout)
+            self._transfers[key] = transfer
+            self.buffered += size
+        elif count != transfer.count or size != transfer.size:
+            self._reject(key)
+            raise FragmentError(f"Fragment {transfer_id} changed its count or size")
+
+        if index not in transfer.parts:
+            transfer.received += len(data)
+            if transfer.received > transfer.size:
+                self._reject(key)
+                raise FragmentError(f"Fragment {transfer_id} exceeds its declared size")
+            transfer.parts[index] = data
+        transfer.deadline = now + self.timeout
+        if len(transfer.parts) < transfer.count:
+            return None
+
+        self._drop(key)
+        text = "".join(transfer.parts[position] for position in range(transfer.count))
+        transfer.parts.clear()
+        try:
+            payload = json_codec.loads(text)
+        except ValueError as exc:
+            self.rejected += 1
+            raise FragmentError(f"Fragment {transfer_id} is not valid JSON: {exc}") from exc
+        if not isinstance(payload, dict):
+            self.rejected += 1
+            raise FragmentError(f"Fragment {transfer_id} did not decode to a dict")
+        self.completed += 1
+        return payload
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """丢弃超时的传输，返回丢弃的数量。"""
+        now = self._clock() if now is None else now
+        stale = [key for key, transfer in self._transfers.items() if transfer.deadline <= now]
+        for key in stale:
+            self._drop(key)
+        self.expired += len(stale)
+        return len(stale)
+
+    def drop_source(self, source: str) -> None:
+        """丢弃来自 *source* 的所有未完成传输，例如连接断开时。"""
+        for key in [key for key in self._transfers if key[0] == source]:
+            self._drop(key)
+
+    def _reject(self, key: Tuple[str, str]) -> None:
+        self._drop(key)
+        self.rejected += 1
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        transfer = self._transfers.pop(key, None)
+        if transfer is not None:
+            self.buffered -= transfer.size
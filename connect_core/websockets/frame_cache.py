@@ -0,0 +1,100 @@
+"""已编码帧缓存：重发与历史重放直接复用之前的密文。
+
+缓存按 ``(account, 数据包标识)`` 索引，并记录加密时使用的账户密钥；密钥变化、
+连接断开或总字节数超出上限时条目失效。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+DEFAULT_FRAME_CACHE_BYTES = 16 * 1024 * 1024
+
+CacheKey = Tuple[str, Hashable]
+
+
+class FrameCache:
+    """以字节数为上限的 LRU 帧缓存。"""
+
+    def __init__(self, max_bytes: int = DEFAULT_FRAME_CACHE_BYTES) -> None:
+        self._max_bytes = max(0, max_bytes)
+        self._frames: "OrderedDict[CacheKey, Tuple[str, bytes]]" = OrderedDict()
+        self._by_account: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    def get(self, account: str, identity: Hashable, key: str) -> Optional[bytes]:
+        cache_key = (account, identity)
+        with self._lock:
+            entry = self._frames.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != key:
+                # 账户密钥已变化，旧密文不再有效
+                self._discard(cache_key)
+                self.misses += 1
+                return None
+            self._frames.move_to_end(cache_key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, account: str, identity: Hashable, key: str, frame: bytes) -> None:
+        if len(frame) > self._max_bytes:
+            return
+        cache_key = (account, identity)
+        with self._lock:
+            if cache_key in self._frames:
+                self._discard(cache_key)
+            self._frames[cache_key] = (key, frame)
+            self._by_account.setdefault(account, set()).add(identity)
+            self._bytes += len(frame)
+            while self._bytes > self._max_bytes:
+                oldest = next(iter(self._frames))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def evict_account(self, account: str) -> None:
+        with self._lock:
+            for identity in self._by_account.pop(account, set()):
+                entry = self._frames.pop((account, identity), None)
+                if entry is not None:
+                    self._bytes -= len(entry[1])
+                    self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self._by_account.clear()
+            self._bytes = 0
+
+    def _discard(self, cache_key: CacheKey) -> None:
+        entry = self._frames.pop(cache_key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry[1])
+        identities = self._by_account.get(cache_key[0])
+        if identities is not None:
+            identities.discard(cache_key[1])
+            if not identities:
+                self._by_account.pop(cache_key[0], None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._frames),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,79 @@
+"""中心服务器广播使用的轮换组密钥。
+
+组密钥在 ``logined`` 中下发给协商了 ``group_key_v1`` 的子服务器，成员离开时轮换，
+并以 ``group_key`` 数据包逐个（使用账户密钥）发送给剩余成员。中心服务器发起的广播
+只需序列化、加密一次，同一份字节发送给所有成员。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet
+
+# 客户端保留的历史纪元数量，容忍轮换前已在途的帧
+RETAINED_EPOCHS = 2
+
+
+class GroupKeyring:
+    """按纪元保存组密钥；中心服务器调用 :meth:`rotate`，子服务器调用 :meth:`install`。"""
+
+    def __init__(self, retained: int = RETAINED_EPOCHS) -> None:
+        self._retained = max(1, retained)
+        self._keys: "OrderedDict[int, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rotations = 0
+
+    @property
+    def epoch(self) -> int:
+        with self._lock:
+            return next(reversed(self._keys), 0)
+
+    def current(self) -> Tuple[int, str]:
+        """返回当前 ``(epoch, key)``，尚未生成时先生成第一把密钥。"""
+        with self._lock:
+            if not self._keys:
+                self._store(1, Fernet.generate_key().decode())
+            epoch = next(reversed(self._keys))
+            return epoch, self._keys[epoch]
+
+    def rotate(self) -> Tuple[int, str]:
+        with self._lock:
+            epoch = next(reversed(self._keys), 0) + 1
+            self._store(epoch, Fernet.generate_key().decode())
+            self.rotations += 1
+            return epoch, self._keys[epoch]
+
+    def install(self, epoch: int, key: str) -> None:
+        with self._lock:
+            self._store(epoch, key)
+
+    def get(self, epoch: int) -> Optional[str]:
+        with self._lock:
+            return self._keys.get(epoch)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def export(self) -> Dict[str, Any]:
+        epoch, key = self.current()
+        return {"epoch": epoch, "key": key}
+
+    def _store(self, epoch: int, key: str) -> None:
+        self._keys[epoch] = key
+        self._keys.move_to_end(epoch)
+        while len(self._keys) > self._retained:
+            self._keys.popitem(last=False)
+
+
+def parse_group_key(value: Any) -> Optional[Tuple[int, str]]:
+    """解析 ``{"epoch": int, "key": str}``，格式不正确时返回 ``None``。"""
+    if not isinstance(value, dict):
+        return None
+    epoch, key = value.get("epoch"), value.get("key")
+    if not isinstance(epoch, int) or epoch <= 0 or not isinstance(key, str) or not key:
+        return None
+    return epoch, key
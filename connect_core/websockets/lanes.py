@@ -0,0 +1,211 @@
+"""连接写入的优先级通道与加权调度。
+
+每个连接的写入分为三个优先级通道：``control``（握手、心跳、确认与控制指令）、
+``interactive``（普通 ``data_send``）和 ``bulk``（文件分块与超大数据分片）。
+:class:`WeightedLanes` 按权重轮流从各通道取出下一项，所有通道都有积压时每一轮
+``control`` / ``interactive`` / ``bulk`` 最多分别取出对应权重个，只有一个通道有积压时
+该通道独占写入；同一通道内保持先进先出。
+
+中心服务器的 :class:`~connect_core.websockets.outbound.OutboundQueue` 用它排列已编码的帧，
+子服务器直接写 socket，由 :class:`WriteGate` 按同样的规则决定下一个获得写入权的发送方。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Generic, Iterator, Mapping, Optional, Tuple, TypeVar
+
+from connect_core.websockets.data_packet import PacketType
+
+PRIORITY_CONTROL = "control"
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+# 按优先级从高到低排列
+PRIORITIES: Tuple[str, ...] = (PRIORITY_CONTROL, PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+DEFAULT_WEIGHTS: Dict[str, int] = {
+    PRIORITY_CONTROL: 8,
+    PRIORITY_INTERACTIVE: 4,
+    PRIORITY_BULK: 1,
+}
+
+CONTROL_TYPES: frozenset[str] = frozenset(
+    packet_type.value
+    for packet_type in (
+        PacketType.TEST_CONNECT,
+        PacketType.PING,
+        PacketType.PONG,
+        PacketType.CONTROL_STOP,
+        PacketType.CONTROL_RELOAD,
+        PacketType.CONTROL_MAINTENANCE,
+        PacketType.CONTROL_RESUME,
+        PacketType.REGISTER,
+        PacketType.REGISTERED,
+        PacketType.REGISTER_ERROR,
+        PacketType.LOGIN,
+        PacketType.LOGINED,
+        PacketType.LOGIN_ERROR,
+        PacketType.NEW_LOGIN,
+        PacketType.DEL_LOGIN,
+        PacketType.GROUP_KEY,
+        PacketType.DATA_SENDOK,
+        PacketType.DATA_ERROR,
+    )
+)
+
+BULK_TYPES: frozenset[str] = frozenset(
+    packet_type.value
+    for packet_type in (
+        PacketType.DATA_FRAGMENT,
+        PacketType.FILE_SEND,
+        PacketType.FILE_SENDING,
+        PacketType.FILE_SENDOK,
+        PacketType.FILE_ERROR,
+    )
+)
+
+T = TypeVar("T")
+
+
+def validate(priority: Optional[str]) -> Optional[str]:
+    """检查插件指定的优先级，``None`` 表示按数据包类型决定。"""
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(
+            f"Unknown priority {priority!r}, expected one of {', '.join(PRIORITIES)}"
+        )
+    return priority
+
+
+def priority_of(packet_type: Any, requested: Optional[str] = None) -> str:
+    """返回数据包所属的通道；*requested* 为插件显式指定的优先级。"""
+    if requested in PRIORITIES:
+        return requested  # type: ignore[return-value]
+    name = str(getattr(packet_type, "value", packet_type))
+    if name in CONTROL_TYPES:
+        return PRIORITY_CONTROL
+    if name in BULK_TYPES:
+        return PRIORITY_BULK
+    return PRIORITY_INTERACTIVE
+
+
+def configured_weights(config: Any) -> Dict[str, int]:
+    """读取配置中的通道权重，缺失或非正数的通道使用默认值。"""
+    weights = dict(DEFAULT_WEIGHTS)
+    configured = getattr(config, "priority_weights", None)
+    if isinstance(configured, Mapping):
+        for lane, weight in configured.items():
+            if lane in weights and isinstance(weight, int) and weight > 0:
+                weights[lane] = weight
+    return weights
+
+
+class WeightedLanes(Generic[T]):
+    """按优先级分组的先进先出队列，:meth:`popleft` 按加权轮转选择通道。"""
+
+    def __init__(self, weights: Optional[Mapping[str, int]] = None) -> None:
+        weights = weights or DEFAULT_WEIGHTS
+        self.weights = {lane: max(1, weights.get(lane, 1)) for lane in PRIORITIES}
+        self._lanes: Dict[str, Deque[T]] = {lane: deque() for lane in PRIORITIES}
+        self._credits = dict(self.weights)
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    def __bool__(self) -> bool:
+        return any(self._lanes.values())
+
+    def __iter__(self) -> Iterator[T]:
+        """按优先级从低到高、通道内从旧到新遍历，便于超限时优先丢弃低优先级的旧项。"""
+        for lane in reversed(PRIORITIES):
+            yield from list(self._lanes[lane])
+
+    def depths(self) -> Dict[str, int]:
+        return {lane: len(items) for lane, items in self._lanes.items()}
+
+    def append(self, item: T, priority: str) -> None:
+        self._lanes[priority if priority in self._lanes else PRIORITY_INTERACTIVE].append(item)
+
+    def remove(self, item: T) -> None:
+        for lane in self._lanes.values():
+            try:
+                lane.remove(item)
+            except ValueError:
+                continue
+            return
+        raise ValueError("item not queued")
+
+    def clear(self) -> None:
+        for lane in self._lanes.values():
+            lane.clear()
+        self._credits = dict(self.weights)
+
+    def popleft(self) -> T:
+        """取出下一项：优先级最高且本轮仍有配额的非空通道；所有非空通道配额用尽时开始新一轮。"""
+        for _ in range(2):
+            for lane in PRIORITIES:
+                if self._lanes[lane] and self._credits[lane] > 0:
+                    self._credits[lane] -= 1
+                    return self._lanes[lane].popleft()
+            if not self:
+                break
+            self._credits = dict(self.weights)
+        raise IndexError("pop from empty lanes")
+
+
+class WriteGate:
+    """单个 socket 的写入权，多个发送方并发写入时按 :class:`WeightedLanes` 的顺序放行。
+
+    没有竞争时 :meth:`acquire` 立即返回，不改变单个发送方的行为。
+    """
+
+    def __init__(self, weights: Optional[Mapping[str, int]] = None) -> None:
+        self._waiters: WeightedLanes[asyncio.Future[None]] = WeightedLanes(weights)
+        self._busy = False
+        self.waited: Dict[str, int] = {lane: 0 for lane in PRIORITIES}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"busy": self._busy, "waiting": self._waiters.depths(), "waited": dict(self.waited)}
+
+    async def acquire(self, priority: str) -> None:
+        if not self._busy and not self._waiters:
+            self._busy = True
+            return
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter, priority)
+        self.waited[priority if priority in self.waited else PRIORITY_INTERACTIVE] += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已获得写入权但被取消，交给下一个等待者
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy = False
+
+    def slot(self, priority: str) -> "_Slot":
+        """``async with gate.slot(priority):`` 包裹一次 socket 写入。"""
+        return _Slot(self, priority)
+
+
+class _Slot:
+    __slots__ = ("_gate", "_priority")
+
+    def __init__(self, gate: WriteGate, priority: str) -> None:
+        self._gate = gate
+        self._priority = priority
+
+    async def __aenter__(self) -> None:
+        await self._gate.acquire(self._priority)
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._gate.release()
@@ -0,0 +1,142 @@
+"""大帧编解码的线程池卸载。
+
+加解密与 JSON 处理默认在事件循环线程内执行；超过 ``threshold`` 字节的帧改由
+工作线程处理，避免单个大包阻塞其它连接。``cryptography`` 在加解密期间会释放 GIL。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+DEFAULT_OFFLOAD_WORKERS = 4
+
+
+def estimate(obj: Any, limit: int) -> int:
+    """粗略估算 *obj* 序列化后的字节数；超过 *limit* 即提前返回，此时结果只保证大于 *limit*。"""
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (str, bytes, bytearray)):
+            size += len(item)
+        elif isinstance(item, dict):
+            size += 2 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            size += len(item)
+            stack.extend(item)
+        else:
+            size += 8
+        if size > limit:
+            break
+    return size
+
+
+def exceeds(obj: Any, limit: int) -> bool:
+    """粗略判断 *obj* 序列化后是否超过 *limit* 字节，超过即提前返回。"""
+    return estimate(obj, limit) > limit
+
+
+class CodecPool:
+    """按帧大小决定内联执行还是交给线程池的编解码执行器。"""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_OFFLOAD_WORKERS,
+        threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+        name: str = "codec",
+    ) -> None:
+        self.workers = max(0, workers)
+        self.threshold = max(0, threshold)
+        self._name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.inline = 0
+        self.offloaded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def should_offload(self, size: int) -> bool:
+        return self.enabled and size >= self.threshold
+
+    async def run(self, size: int, func: Callable[..., T], *args: Any) -> T:
+        """*size* 达到阈值时在线程池中执行 ``func(*args)``，否则内联执行。"""
+        return await self._dispatch(self.should_offload(size), func, *args)
+
+    async def run_for_packet(
+        self, packet: Any, func: Callable[..., T], *args: Any
+    ) -> T:
+        """按待序列化数据包的估算大小决定是否卸载 ``func(*args)``。"""
+        offload = self.enabled and exceeds(packet, self.threshold)
+        return await self._dispatch(offload, func, *args)
+
+    async def _dispatch(self, offload: bool, func: Callable[..., T], *args: Any) -> T:
+        if not offload:
+            self.inline += 1
+            return func(*args)
+        self.offloaded += 1
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), func, *args
+        )
+
+    async def map(
+        self,
+        func: Callable[..., T],
+        items: Sequence[Tuple[Any, ...]],
+        min_items: int = 2,
+    ) -> List[T | Exception]:
+        """对每组参数调用 ``func``，少于 *min_items* 组时内联执行。
+
+        参数按工作线程数切分为连续的批次并行处理；单项失败时在对应位置返回异常，
+        不影响其它项。
+        """
+
+        def _batch(batch: Sequence[Tuple[Any, ...]]) -> List[T | Exception]:
+            results: List[T | Exception] = []
+            for args in batch:
+                try:
+                    results.append(func(*args))
+                except Exception as exc:
+                    results.append(exc)
+            return results
+
+        if not self.enabled or min_items <= 0 or len(items) < max(2, min_items):
+            self.inline += 1
+            return _batch(items)
+
+        size = -(-len(items) // self.workers)
+        batches = [items[start : start + size] for start in range(0, len(items), size)]
+        self.offloaded += len(batches)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        chunks = await asyncio.gather(
+            *(loop.run_in_executor(executor, _batch, batch) for batch in batches)
+        )
+        return [result for chunk in chunks for result in chunk]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix=self._name
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "threshold": self.threshold,
+            "inline": self.inline,
+            "offloaded": self.offloaded,
+        }
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+from connect_core.aes_encrypt import SessionCipher
+from connect_core.websockets.envelope import encode_envelope
+from connect_core.websockets.lanes import PRIORITY_INTERACTIVE, WeightedLanes
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = {OVERFLOW_DROP_OLDEST, OVERFLOW_DISCONNECT}
+
+# 慢消费者被断开时使用的 WebSocket 关闭码
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+QUEUED = "queued"
+OVERFLOW = "overflow"
+CLOSED = "closed"
+
+
+@dataclass
+class OutboundFrame:
+    """等待写入 socket 的已编码帧。
+
+    AEAD 会话帧入队时 ``data`` 仍是（可能已压缩的）明文，由 :meth:`wire` 在写出前加密：
+    会话计数器必须按写出顺序递增，优先级通道改变顺序后，提前加密的帧超出对端的重放窗口会被丢弃。
+    """
+
+    data: bytes | str
+    packet_type: str
+    persistent: bool
+    priority: str = PRIORITY_INTERACTIVE
+    session: Optional[SessionCipher] = None
+    flags: int = 0
+    # 子服务器据此在帧写出后标记发送窗口中的 data_send
+    sid: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    def seal_later(self, session: SessionCipher, flags: int = 0) -> "OutboundFrame":
+        """标记为写出前才以 *session* 加密的信封帧，*flags* 为信封标志位。"""
+        self.session = session
+        self.flags = flags
+        return self
+
+    def wire(self) -> bytes | str:
+        """返回写入 socket 的数据，会话帧在此时分配计数器并加密。"""
+        if self.session is None:
+            return self.data
+        data = self.data.encode() if isinstance(self.data, str) else self.data
+        return encode_envelope(data, None, self.flags, self.session)
+
+
+class OutboundQueue:
+    """单个连接的有界发送队列，由独立的写任务按优先级通道加权轮转排空。
+
+    同一优先级通道内按入队顺序写入，``weights`` 为各通道每轮最多写入的帧数。
+    超出 ``max_packets`` / ``max_bytes`` 时按 ``policy`` 处理：
+    ``drop_oldest`` 从低优先级通道起丢弃最旧的非持久化帧（仍然超限则视为慢消费者），
+    ``disconnect`` 直接视为慢消费者并调用 ``on_overflow``。
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes | str], Awaitable[Any]],
+        *,
+        max_packets: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        policy: str = OVERFLOW_DROP_OLDEST,
+        on_overflow: Optional[Callable[[], Awaitable[None]]] = None,
+        name: str = "",
+        weights: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        self._send = send
+        self._max_packets = max(1, max_packets)
+        self._max_bytes = max(1, max_bytes)
+        self._policy = policy if policy in OVERFLOW_POLICIES else OVERFLOW_DROP_OLDEST
+        self._on_overflow = on_overflow
+        self._name = name
+        self._frames: WeightedLanes[OutboundFrame] = WeightedLanes(weights)
+        self._bytes = 0
+        self._wakeup = asyncio.Event()
+        self._room = asyncio.Event()
+        self._writer: Optional[asyncio.Task[None]] = None
+        self._closed = False
+        self._overflowed = False
+        self.sent = 0
+        self.dropped = 0
+
+    # ===== 状态 =====
+    @property
+    def depth(self) -> int:
+        return len(self._frames)
+
+    @property
+    def queued_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "bytes": self._bytes,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lanes": self._frames.depths(),
+        }
+
+    # ===== 入队 =====
+    def put(self, frame: OutboundFrame) -> str:
+        """非阻塞入队，返回 ``queued`` / ``overflow`` / ``closed``。"""
+        if self._closed or self._overflowed:
+            return CLOSED
+        self._frames.append(frame, frame.priority)
+        self._bytes += frame.size
+        if self._over_limit() and not self._shed_load():
+            self._trigger_overflow()
+            return OVERFLOW
+        self._ensure_writer()
+        self._wakeup.set()
+        return QUEUED
+
+    def _over_limit(self) -> bool:
+        if len(self._frames) > self._max_packets:
+            return True
+        # 单帧本身超过字节上限时允许在空队列中发送，避免永远无法发出
+        return self._bytes > self._max_bytes and len(self._frames) > 1
+
+    def _shed_load(self) -> bool:
+        if self._policy != OVERFLOW_DROP_OLDEST:
+            return False
+        for frame in self._frames:
+            if not self._over_limit():
+                break
+            if frame.persistent:
+                continue
+            self._frames.remove(frame)
+            self._bytes -= frame.size
+            self.dropped += 1
+        return not self._over_limit()
+
+    async def wait_for_room(self, max_bytes: int) -> None:
+        """等待积压字节数降到 *max_bytes* 以下或队列关闭，用于向上游发送方施加背压。"""
+        while not (self._closed or self._overflowed) and self._bytes > max_bytes:
+            self._room.clear()
+            await self._room.wait()
+
+    def _trigger_overflow(self) -> None:
+        self._overflowed = True
+        self.dropped += len(self._frames)
+        self._frames.clear()
+        self._bytes = 0
+        self._room.set()
+        if self._on_overflow is not None:
+            asyncio.ensure_future(self._on_overflow())
+
+    # ===== 写任务 =====
+    def _ensure_writer(self) -> None:
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._drain())
+
+    async def _drain(self) -> None:
+        while not self._closed:
+            if not self._frames:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            frame = self._frames.popleft()
+            self._bytes -= frame.size
+            self._room.set()
+            try:
+                await self._send(frame.wire())
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 连接已失效，剩余帧无法送达
+                self.dropped += 1 + len(self._frames)
+                self._frames.clear()
+                self._bytes = 0
+                self._closed = True
+                self._room.set()
+                return
+
+    async def close(self) -> None:
+        self._closed = True
+        self._frames.clear()
+        self._bytes = 0
+        self._wakeup.set()
+        self._room.set()
+        writer = self._writer
+        if writer is not None and not writer.done():
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
@@ -0,0 +1,54 @@
+"""中心服务器转发 ``data_send`` 时的载荷直通。
+
+中心服务器转发数据包时不需要理解 payload：转发时沿用发送方的校验和；较大的 payload
+只序列化一次并保存为 :class:`RawPayload`，为每个目标编码时仅重写路由头与 sid，再把
+这份字节拼接进明文，省去逐目标的重新序列化与重新计算校验和。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from connect_core.tools import json_codec
+from connect_core.websockets.offload import exceeds
+
+# 小 payload 由 JSON 后端逐目标序列化更便宜，只有较大的 payload 才值得拼接
+SHARE_MIN_BYTES = 1024
+
+
+class RawPayload(bytes):
+    """已序列化的 payload JSON 字节；``value`` 保留原始字典，供本地读取。"""
+
+    value: Dict[str, Any]
+
+    def __new__(cls, raw: bytes, value: Dict[str, Any]) -> "RawPayload":
+        instance = super().__new__(cls, raw)
+        instance.value = value
+        return instance
+
+
+def freeze(payload: Dict[str, Any]) -> RawPayload:
+    """序列化一次 *payload*，供所有转发目标复用。"""
+    return RawPayload(json_codec.dumps(payload), payload)
+
+
+def share(payload: Dict[str, Any]) -> Dict[str, Any] | RawPayload:
+    """payload 估算超过 :data:`SHARE_MIN_BYTES` 时序列化一次供所有目标复用，否则原样返回。"""
+    return freeze(payload) if exceeds(payload, SHARE_MIN_BYTES) else payload
+
+
+def materialize(payload: Any) -> Any:
+    """把 :class:`RawPayload` 还原为字典，其它值原样返回。"""
+    return payload.value if isinstance(payload, RawPayload) else payload
+
+
+def dumps_packet(packet: Dict[str, Any]) -> bytes:
+    """序列化数据包；payload 为 :class:`RawPayload` 时直接拼接已序列化的字节。"""
+    payload = packet.get("payload")
+    if not isinstance(payload, RawPayload):
+        return json_codec.dumps(packet)
+    header = json_codec.dumps(
+        {key: value for key, value in packet.items() if key != "payload"}
+    )
+    separator = b"," if len(header) > 2 else b""
+    return header[:-1] + separator + b'"payload":' + payload + b"}"
@@ -0,0 +1,151 @@
+"""``ping`` 时的有界历史重放。
+
+子服务器的 ``ping`` 携带它已知的最大 sid，中心服务器重放此后发给它、仍在历史中的数据包。
+每种数据包按 ``resync_ttls`` 过期（未列出的类型使用 ``resync_max_age``，二者取较小值），过期的数据包不再重放；
+剩余的数据包超过 ``resync_max_packets`` 个或 ``resync_max_bytes`` 字节时说明子服务器落后太多，
+整段都不再重放。未重放的 sid 范围以 ``{"gap": {"from": A, "to": B}}`` 放在 ``pong`` 的 payload 中，
+子服务器据此跳过这段 sid，不再反复请求。
+
+协商了 ``batch_v1`` 的连接上，重放按 ``resync_batch_size`` 个数据包合并为一个批量帧发送。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from connect_core.websockets.offload import estimate
+
+DEFAULT_MAX_PACKETS = 256
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_MAX_AGE = 300.0
+DEFAULT_BATCH_SIZE = 32
+# 握手应答只对当时的握手有意义；上下线通知在重新登录时会随服务器列表重新下发
+DEFAULT_TTLS: Dict[str, float] = {
+    "registered": 0.0,
+    "register_error": 0.0,
+    "logined": 0.0,
+    "login_error": 0.0,
+    "new_login": 60.0,
+    "del_login": 60.0,
+}
+
+
+def policy_for(config: Any) -> "ResyncPolicy":
+    """按配置中的重放窗口与各类型过期时间创建 :class:`ResyncPolicy`。"""
+    ttls = dict(DEFAULT_TTLS)
+    configured = getattr(config, "resync_ttls", None)
+    if isinstance(configured, Mapping):
+        for packet_type, ttl in configured.items():
+            if isinstance(ttl, (int, float)) and ttl >= 0:
+                ttls[str(packet_type)] = float(ttl)
+    return ResyncPolicy(
+        max_packets=_positive(config, "resync_max_packets", DEFAULT_MAX_PACKETS),
+        max_bytes=_positive(config, "resync_max_bytes", DEFAULT_MAX_BYTES),
+        max_age=_positive(config, "resync_max_age", DEFAULT_MAX_AGE),
+        batch_size=_positive(config, "resync_batch_size", DEFAULT_BATCH_SIZE),
+        ttls=ttls,
+    )
+
+
+def _positive(config: Any, name: str, default: Any) -> Any:
+    value = getattr(config, name, default)
+    valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+    return value if valid else default
+
+
+def gap_payload(gap: Optional[Tuple[int, int]]) -> Optional[Dict[str, Any]]:
+    """``pong`` 的 payload；没有未重放的 sid 时按旧协议不携带 payload。"""
+    return None if gap is None else {"gap": {"from": gap[0], "to": gap[1]}}
+
+
+def gap_range(payload: Any) -> Optional[Tuple[int, int]]:
+    """从 ``pong`` 的 payload 中取出未重放的 sid 范围。"""
+    if not isinstance(payload, dict) or not isinstance(payload.get("gap"), dict):
+        return None
+    start, end = payload["gap"].get("from"), payload["gap"].get("to")
+    if not all(isinstance(sid, int) and not isinstance(sid, bool) for sid in (start, end)):
+        return None
+    return start, end
+
+
+@dataclass
+class ResyncPlan:
+    """一次 ``ping`` 的重放结果：按 sid 排序的待重放数据包与未重放的 sid 范围。"""
+
+    packets: List[Any] = field(default_factory=list)
+    expired: int = 0
+    gap: Optional[Tuple[int, int]] = None
+
+
+class ResyncPolicy:
+    """重放窗口与各类型过期时间。"""
+
+    def __init__(
+        self,
+        *,
+        max_packets: int = DEFAULT_MAX_PACKETS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = DEFAULT_MAX_AGE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        ttls: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        self.max_packets = max_packets
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        # 按数据包类型缓存 min(ttls, max_age)
+        self._resolved: Dict[Any, float] = {}
+        self.resyncs = 0
+        self.replayed = 0
+        self.expired = 0
+        self.gaps = 0
+        self.frames = 0
+
+    def ttl(self, packet_type: Any) -> float:
+        ttl = self._resolved.get(packet_type)
+        if ttl is None:
+            name = str(getattr(packet_type, "value", packet_type))
+            ttl = self._resolved[packet_type] = min(self.ttls.get(name, self.max_age), self.max_age)
+        return ttl
+
+    def plan(self, pending: Sequence[Any], now: float) -> ResyncPlan:
+        """从按 sid 排序的历史数据包中选出需要重放的部分。"""
+        plan = ResyncPlan()
+        if not pending:
+            return plan
+        self.resyncs += 1
+        expired: List[int] = []
+        for packet in pending:
+            if now - packet.timestamp >= self.ttl(packet.type):
+                expired.append(packet.sid)
+            else:
+                plan.packets.append(packet)
+        budget = self.max_bytes
+        if len(plan.packets) <= self.max_packets:
+            for packet in plan.packets:
+                budget -= estimate(packet.payload, budget)
+                if budget < 0:
+                    break
+        if budget < 0 or len(plan.packets) > self.max_packets:
+            # 落后太多：整段不再重放，由子服务器跳过
+            self.gaps += 1
+            return ResyncPlan(gap=(pending[0].sid, pending[-1].sid))
+        plan.expired = len(expired)
+        self.expired += plan.expired
+        self.replayed += len(plan.packets)
+        if expired:
+            plan.gap = (expired[0], expired[-1])
+        return plan
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_packets": self.max_packets,
+            "max_bytes": self.max_bytes,
+            "resyncs": self.resyncs,
+            "replayed": self.replayed,
+            "expired": self.expired,
+            "gaps": self.gaps,
+            "frames": self.frames,
+        }
@@ -0,0 +1,204 @@
+"""未确认 ``data_send`` 的逐包重传定时器。
+
+每个待确认的数据包各有一个重传截止时间，统一放在最小堆中，重传任务只在最早的截止时间到达时醒来，
+不再定期把所有未确认数据包整体重发。超时时间按对端的往返时延估算（RFC 6298：``srtt + 4 * rttvar``），
+每次重传翻倍，超过 ``retransmit_max_retries`` 次后放弃，交给重连后的历史重放补发。
+只有未重传过的数据包的确认参与往返时延采样，避免把对重传的确认误算为原包的时延。
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MIN_TIMEOUT = 1.0
+DEFAULT_MAX_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 5
+# 尚无往返时延样本时使用的超时
+INITIAL_TIMEOUT = 3.0
+
+# (server_id, sid)；未协商 send_window_v1 的对端只有一个未确认数据包，sid 为 None
+TimerKey = Tuple[str, Optional[int]]
+
+
+@dataclass
+class _Timer:
+    deadline: float
+    sent_at: float
+    attempts: int = 0
+    # 因 data_error 被提前重发过，确认不再参与往返时延采样
+    resent: bool = False
+
+
+class RttEstimator:
+    """单个对端的平滑往返时延与重传超时。"""
+
+    def __init__(self, min_timeout: float, max_timeout: float) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.samples = 0
+
+    def sample(self, rtt: float) -> None:
+        rtt = max(0.0, rtt)
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.samples += 1
+
+    @property
+    def timeout(self) -> float:
+        base = INITIAL_TIMEOUT if self.srtt is None else self.srtt + 4 * self.rttvar
+        return min(self.max_timeout, max(self.min_timeout, base))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "srtt_ms": None if self.srtt is None else round(self.srtt * 1000, 3),
+            "rto_ms": round(self.timeout * 1000, 3),
+            "samples": self.samples,
+        }
+
+
+def configured_limits(config: Any) -> Tuple[float, float, int]:
+    """读取配置中的最小 / 最大超时与最大重传次数。"""
+    min_timeout = getattr(config, "retransmit_min_timeout", DEFAULT_MIN_TIMEOUT)
+    max_timeout = getattr(config, "retransmit_max_timeout", DEFAULT_MAX_TIMEOUT)
+    max_retries = getattr(config, "retransmit_max_retries", DEFAULT_MAX_RETRIES)
+    if not isinstance(min_timeout, (int, float)) or min_timeout <= 0:
+        min_timeout = DEFAULT_MIN_TIMEOUT
+    if not isinstance(max_timeout, (int, float)) or max_timeout < min_timeout:
+        max_timeout = max(DEFAULT_MAX_TIMEOUT, min_timeout)
+    if not isinstance(max_retries, int) or max_retries < 0:
+        max_retries = DEFAULT_MAX_RETRIES
+    return float(min_timeout), float(max_timeout), max_retries
+
+
+class RetransmitTimers:
+    """按截止时间排序的重传定时器。
+
+    堆中的条目在确认或重新调度后不会立即删除，弹出时与 ``_timers`` 中的截止时间比对后跳过。
+    """
+
+    def __init__(
+        self,
+        min_timeout: float = DEFAULT_MIN_TIMEOUT,
+        max_timeout: float = DEFAULT_MAX_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.max_retries = max_retries
+        self._heap: List[Tuple[float, int, TimerKey]] = []
+        self._timers: Dict[TimerKey, _Timer] = {}
+        self._rtt: Dict[str, RttEstimator] = {}
+        self._seq = 0
+        self.retransmits = 0
+        self.gave_up = 0
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._timers
+
+    def rtt(self, server_id: str) -> RttEstimator:
+        estimator = self._rtt.get(server_id)
+        if estimator is None:
+            estimator = RttEstimator(self.min_timeout, self.max_timeout)
+            self._rtt[server_id] = estimator
+        return estimator
+
+    def schedule(self, key: TimerKey, now: float) -> bool:
+        """登记一次首次发送，返回新的截止时间是否早于原先最早的截止时间。"""
+        timer = _Timer(now + self.rtt(key[0]).timeout, now)
+        self._timers[key] = timer
+        return self._push(key, timer.deadline)
+
+    def ack(self, key: TimerKey, now: float) -> bool:
+        """确认后取消定时器；未重传过的数据包用于往返时延采样。"""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        if timer.attempts == 0 and not timer.resent:
+            self.rtt(key[0]).sample(now - timer.sent_at)
+        return True
+
+    def mark_resent(self, key: TimerKey) -> None:
+        """记录定时器之外的重发（例如响应 ``data_error``）。"""
+        timer = self._timers.get(key)
+        if timer is not None:
+            timer.resent = True
+
+    def cancel(self, key: TimerKey) -> None:
+        self._timers.pop(key, None)
+
+    def forget(self, server_id: str) -> None:
+        """连接关闭时丢弃该对端的所有定时器与往返时延估算。"""
+        for key in [key for key in self._timers if key[0] == server_id]:
+            del self._timers[key]
+        self._rtt.pop(server_id, None)
+
+    def next_deadline(self) -> Optional[float]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def expire(self, now: float) -> Tuple[List[TimerKey], List[TimerKey]]:
+        """弹出已到期的定时器，返回 ``(需要重传, 超过重传上限)``。
+
+        需要重传的数据包按指数退避重新调度。
+        """
+        resend: List[TimerKey] = []
+        expired: List[TimerKey] = []
+        while True:
+            self._discard_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            _, _, key = heapq.heappop(self._heap)
+            timer = self._timers[key]
+            if timer.attempts >= self.max_retries:
+                del self._timers[key]
+                self.gave_up += 1
+                expired.append(key)
+                continue
+            timer.attempts += 1
+            backoff = self.rtt(key[0]).timeout * (2 ** timer.attempts)
+            timer.deadline = now + min(self.max_timeout, backoff)
+            self._push(key, timer.deadline)
+            self.retransmits += 1
+            resend.append(key)
+        return resend, expired
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._timers),
+            "retransmits": self.retransmits,
+            "gave_up": self.gave_up,
+            "peers": {
+                server_id: estimator.stats()
+                for server_id, estimator in sorted(self._rtt.items())
+            },
+        }
+
+    def _push(self, key: TimerKey, deadline: float) -> bool:
+        self._discard_stale()
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            # 已确认的条目积压过多时重建堆
+            self._heap = [entry for entry in self._heap if self._live(entry)]
+            heapq.heapify(self._heap)
+        earliest = not self._heap or deadline < self._heap[0][0]
+        self._seq += 1
+        heapq.heappush(self._heap, (deadline, self._seq, key))
+        return earliest
+
+    def _live(self, entry: Tuple[float, int, TimerKey]) -> bool:
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer.deadline == entry[0]
+
+    def _discard_stale(self) -> None:
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
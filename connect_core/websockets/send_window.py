@@ -0,0 +1,174 @@
+"""``data_send`` 的发送窗口。
+
+双方协商了 ``send_window_v1`` 时，``data_sendok`` / ``data_error`` 的 payload 携带被确认或校验失败的
+``{"sid": N}``。发送方为每个对端保留最多 ``send_window_size`` 个尚未确认的 ``data_send``，
+收到确认时只移除对应的 sid，收到 ``data_error`` 时只重发对应的数据包；窗口未满时无需等待上一个数据包
+确认即可继续发送，吞吐不再受往返时延限制。未协商该能力的对端沿用只保留最后一个数据包的旧行为。
+
+累计确认（``cumulative_ack_v1``）一次移除所有 sid 不超过 N 的条目，但跳过尚未写入当前连接的数据包
+与收到过 ``data_error`` 的数据包，它们只能由单独确认移除。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SEND_WINDOW = 32
+
+
+def configured_size(config: Any) -> int:
+    """读取配置中的窗口大小，至少为 1。"""
+    size = getattr(config, "send_window_size", DEFAULT_SEND_WINDOW)
+    return size if isinstance(size, int) and size > 0 else DEFAULT_SEND_WINDOW
+
+
+def ack_payload(sid: Optional[int]) -> Optional[Dict[str, int]]:
+    """``data_sendok`` / ``data_error`` 的 payload；*sid* 为 ``None`` 时按旧协议不携带 payload。"""
+    return None if sid is None else {"sid": sid}
+
+
+def acked_sid(payload: Any) -> Optional[int]:
+    """从 ``data_sendok`` / ``data_error`` 的 payload 中取出 sid，旧协议的空 payload 返回 ``None``。"""
+    if not isinstance(payload, dict):
+        return None
+    sid = payload.get("sid")
+    return sid if isinstance(sid, int) and not isinstance(sid, bool) else None
+
+
+class SendWindow:
+    """单个对端的未确认 ``data_send``，按 sid 保存发送时的数据包映射。"""
+
+    def __init__(self, size: int = DEFAULT_SEND_WINDOW) -> None:
+        self.size = max(1, size)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        # 尚未写入当前连接的 sid，累计确认不能覆盖它们
+        self._unwritten: set[int] = set()
+        # 收到 data_error 后等待重发确认的 sid
+        self._nacked: set[int] = set()
+        self._room = asyncio.Event()
+        self._room.set()
+        self.tracked = 0
+        self.acked = 0
+        self.retransmitted = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sid: object) -> bool:
+        return sid in self._entries
+
+    @property
+    def full(self) -> bool:
+        return len(self._entries) >= self.size
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._entries),
+            "size": self.size,
+            "tracked": self.tracked,
+            "acked": self.acked,
+            "retransmitted": self.retransmitted,
+            "evicted": self.evicted,
+        }
+
+    async def wait_for_room(self) -> None:
+        """等待窗口中有空位。"""
+        while self.full:
+            self._room.clear()
+            await self._room.wait()
+
+    def track(
+        self, sid: int, packet: Dict[str, Any], *, written: bool = True
+    ) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """登记一个已发送的数据包；窗口已满时移除并返回最旧的条目。
+
+        *written* 为假时需在写入连接后调用 :meth:`written`，此前累计确认不会移除它。
+        """
+        evicted = None
+        if sid not in self._entries and self.full:
+            evicted = self._entries.popitem(last=False)
+            self._forget(evicted[0])
+            self.evicted += 1
+        self._entries[sid] = packet
+        self._entries.move_to_end(sid)
+        if not written:
+            self._unwritten.add(sid)
+        self.tracked += 1
+        self._update_room()
+        return evicted
+
+    def written(self, sid: int) -> None:
+        self._unwritten.discard(sid)
+
+    def reset_written(self) -> None:
+        """连接重建后所有条目都需要在新连接上重发，之前的写入不再算数。"""
+        self._unwritten = set(self._entries)
+
+    def nack(self, sid: int) -> None:
+        """记录 *sid* 收到了 ``data_error``。"""
+        if sid in self._entries:
+            self._nacked.add(sid)
+
+    def ack(self, sid: int) -> bool:
+        """确认 *sid*，返回它是否仍在窗口中。"""
+        if self._entries.pop(sid, None) is None:
+            return False
+        self._forget(sid)
+        self.acked += 1
+        self._update_room()
+        return True
+
+    def ack_through(self, upto: int) -> List[int]:
+        """累计确认 sid 不超过 *upto* 的条目，返回被移除的 sid。"""
+        acked = [
+            sid
+            for sid in self._entries
+            if sid <= upto and sid not in self._unwritten and sid not in self._nacked
+        ]
+        for sid in acked:
+            del self._entries[sid]
+        self.acked += len(acked)
+        if acked:
+            self._update_room()
+        return acked
+
+    def discard(self, sid: int) -> None:
+        """放弃重传 *sid*，不计入确认数。"""
+        if self._entries.pop(sid, None) is not None:
+            self._forget(sid)
+            self._update_room()
+
+    def get(self, sid: int) -> Optional[Dict[str, Any]]:
+        """取出待重发的数据包并计入重发次数。"""
+        packet = self._entries.get(sid)
+        if packet is not None:
+            self.retransmitted += 1
+        return packet
+
+    def unacked(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """按发送顺序返回所有未确认的数据包。"""
+        return list(self._entries.items())
+
+    def resend_all(self) -> List[Dict[str, Any]]:
+        """按发送顺序取出所有未确认的数据包用于整体重发，并计入重发次数。"""
+        self.retransmitted += len(self._entries)
+        return list(self._entries.values())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._unwritten.clear()
+        self._nacked.clear()
+        self._update_room()
+
+    def _forget(self, sid: int) -> None:
+        self._unwritten.discard(sid)
+        self._nacked.discard(sid)
+
+    def _update_room(self) -> None:
+        if self.full:
+            self._room.clear()
+        else:
+            self._room.set()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import os
 import shutil
@@ -9,23 +10,57 @@ import time
 from collections import deque
 from concurrent.futures import Future
 from pathlib import Path
-from typing import Dict, Optional, TYPE_CHECKING, Any, Awaitable
+from typing import Dict, Iterable, Optional, Tuple, TYPE_CHECKING, Any, Awaitable
 
 import websockets
 from websockets.exceptions import ConnectionClosed
 from websockets.server import WebSocketServerProtocol  # type: ignore[attr-defined]
 
-from connect_core.aes_encrypt import aes_encrypt, aes_decrypt
+from connect_core.aes_encrypt import (
+    SessionCipher,
+    aes_encrypt,
+    aes_decrypt,
+    evict_cipher,
+    get_cipher_cache_stats,
+)
+from connect_core.account.account_registry import AccountRegistry
 from connect_core.account.register_system import get_register_password
 from connect_core.context import GlobalContext
 from connect_core.plugin.init_plugin import del_connect, websockets_started
 from connect_core.websockets.data_packet import (
+    Capability,
     ServerDataPacket,
     PacketType,
+    PERSISTENT_TYPES,
     DEFAULT_TEMP,
     DEFAULT_SERVER,
     DEFAULT_ALL,
+    ensure_checksum,
+)
+from connect_core.websockets.compression import Compressor
+from connect_core.websockets.offload import (
+    DEFAULT_OFFLOAD_THRESHOLD,
+    DEFAULT_OFFLOAD_WORKERS,
+    CodecPool,
+)
+from connect_core.websockets.envelope import (
+    FLAG_COMPRESSED,
+    decode_envelope,
+    encode_envelope,
+    encode_group_envelope,
+    is_envelope,
 )
+from connect_core.websockets.frame_cache import DEFAULT_FRAME_CACHE_BYTES, FrameCache
+from connect_core.websockets.group_key import GroupKeyring
+from connect_core.websockets.outbound import (
+    CLOSED,
+    QUEUED,
+    SLOW_CONSUMER_CLOSE_CODE,
+    OutboundFrame,
+    OutboundQueue,
+)
+from connect_core.websockets import acks, batching, fragments, lanes, relay, retransmit, send_window
+from connect_core.tools import json_codec
 from connect_core.tools.common import get_file_hash
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -33,6 +68,9 @@ if TYPE_CHECKING:  # pragma: no cover
 
 PING_INTERVAL = 20
 PING_TIMEOUT = 20
+ACCOUNT_REFRESH_INTERVAL = 5
+# 未协商 dedup_v1 的子服务器沿用整体重发的间隔
+LEGACY_RESEND_INTERVAL = 30
 SEND_FILES_DIR = "send_files"
 
 _control_interface: Optional["CoreControlInterface"] = None
@@ -65,6 +103,17 @@ class SlidingWindowRateLimiter:
             self._events.pop(key, None)
 
 
+def _describe_frame(msg: Dict[str, Any] | bytes) -> str:
+    """日志中的帧摘要；二进制信封只记录长度与前缀。"""
+    if isinstance(msg, bytes):
+        return f"<binary frame {len(msg)} bytes {msg[:16]!r}>"
+    return str(msg)
+
+
+def _type_name(packet_type: Any) -> str:
+    return packet_type.value if isinstance(packet_type, PacketType) else str(packet_type)
+
+
 class WebsocketServer:
     """异步 WebSocket 服务器，负责子服务器的注册、登录与数据转发。"""
 
@@ -78,19 +127,47 @@ class WebsocketServer:
         self.websockets: Dict[str, WebSocketServerProtocol] = {}
         self.servers_info: Dict[str, Any] = {}
         self.last_send_packet: Dict[str, dict] = {}
+        # 协商了 send_window_v1 的子服务器的未确认 data_send
+        self.send_windows: Dict[str, send_window.SendWindow] = {}
+        # 每个未确认 data_send 的重传截止时间
+        self.retransmit = retransmit.RetransmitTimers(*retransmit.configured_limits(self._config))
+        self._retransmit_wakeup = asyncio.Event()
+        # 协商了 cumulative_ack_v1 的子服务器的延迟累计确认
+        self.acks = acks.DelayedAcks(self._flush_ack, acks.configured_delay(self._config))
+        self.outbound: Dict[str, OutboundQueue] = {}
+        # 协商了 batch_v1 的连接上的小数据包合并窗口
+        self.coalescers: Dict[str, batching.Coalescer] = {}
+        self.sessions: Dict[str, SessionCipher] = {}
+        self.group_keys = GroupKeyring()
         self.data_packet = ServerDataPacket(control_interface, self)
 
         self.loop = asyncio.new_event_loop()
         self.loop_thread: Optional[threading.Thread] = None
         self.server: Optional[websockets.server.Serve] = None  # type: ignore[name-defined]
+        self._retransmit_task: Optional[asyncio.Task[None]] = None
         self._resend_task: Optional[asyncio.Task[None]] = None
         self._keepalive_task: Optional[asyncio.Task[None]] = None
+        self._account_watch_task: Optional[asyncio.Task[None]] = None
         self._health_server: Optional[asyncio.base_events.Server] = None
         self._started_at = time.monotonic()
 
-        self._account_lock = threading.Lock()
         self._account_file = self._prepare_account_file()
+        self.accounts = AccountRegistry(self._account_file)
+        self.accounts.add_listener(lambda _account, password: evict_cipher(password))
+        self._accounts_checked_at = float("-inf")
+        self.frame_cache = FrameCache(
+            getattr(self._config, "frame_cache_max_bytes", DEFAULT_FRAME_CACHE_BYTES)
+        )
+        self.accounts.add_listener(
+            lambda account, _password: self.frame_cache.evict_account(account)
+        )
         self._send_files_path = self._prepare_send_files_dir()
+        self.compressor = Compressor(getattr(self._config, "compression_threshold", 256))
+        self.codec = CodecPool(
+            getattr(self._config, "offload_workers", DEFAULT_OFFLOAD_WORKERS),
+            getattr(self._config, "offload_threshold", DEFAULT_OFFLOAD_THRESHOLD),
+            "WebsocketServerCodec",
+        )
         self._rate_limiter: Optional[SlidingWindowRateLimiter] = None
         if getattr(self._config, "rate_limit_enabled", True):
             self._rate_limiter = SlidingWindowRateLimiter(
@@ -114,14 +191,25 @@ class WebsocketServer:
         """优雅关闭服务器与所有连接。"""
 
         async def _shutdown() -> None:
-            for task in (self._resend_task, self._keepalive_task):
-                if task is not None:
-                    task.cancel()
-            if self._resend_task is not None or self._keepalive_task is not None:
-                await asyncio.gather(
-                    *(task for task in (self._resend_task, self._keepalive_task) if task is not None),
-                    return_exceptions=True,
+            tasks = [
+                task
+                for task in (
+                    self._retransmit_task,
+                    self._resend_task,
+                    self._keepalive_task,
+                    self._account_watch_task,
                 )
+                if task is not None
+            ]
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.acks.close()
+            for coalescer in list(self.coalescers.values()):
+                coalescer.close()
+            for queue in list(self.outbound.values()):
+                await queue.close()
             for server_id, ws in list(self.websockets.items()):
                 try:
                     await ws.close(code=1000, reason="Server shutdown")
@@ -144,6 +232,7 @@ class WebsocketServer:
         self.loop.call_soon_threadsafe(self.loop.stop)
         if self.loop_thread is not None:
             self.loop_thread.join(timeout=3)
+        self.codec.shutdown()
 
         self.finish_close = True
 
@@ -151,23 +240,25 @@ class WebsocketServer:
         """主协程：创建 websockets 服务并等待关闭。"""
 
         try:
-            max_size = getattr(self._control.config, "max_packet_size", 64 * 1024 * 1024)
-            if not isinstance(max_size, int) or max_size <= 0:
-                max_size = None  # 不限制
             self.server = await websockets.serve(
                 self._handler,
                 self._host,
                 self._port,
                 ping_interval=PING_INTERVAL,
                 ping_timeout=PING_TIMEOUT,
-                max_size=max_size,
+                max_size=self._max_packet_size(),
             )
             self._control.logger.info(
                 self._control.tr("net_core.service.start_websocket")
             )
+            self._control.logger.info(
+                self._control.tr("net_core.service.json_codec", json_codec.backend_name())
+            )
             websockets_started()
+            self._retransmit_task = asyncio.create_task(self._retransmit_loop())
             self._resend_task = asyncio.create_task(self._resend_loop())
             self._keepalive_task = asyncio.create_task(self._keepalive_loop())
+            self._account_watch_task = asyncio.create_task(self._account_watch_loop())
             await self._start_healthcheck_server()
             await self.server.wait_closed()  # pyright: ignore[reportOptionalMemberAccess]
         except Exception as exc:  # pragma: no cover - log side effect
@@ -177,6 +268,12 @@ class WebsocketServer:
             self._control.logger.error(f"Websocket server failed: {exc}")
             self.finish_close = True
 
+    def _max_packet_size(self) -> Optional[int]:
+        max_size = getattr(self._config, "max_packet_size", 64 * 1024 * 1024)
+        if not isinstance(max_size, int) or max_size <= 0:
+            return None  # 不限制
+        return max_size
+
     def _run_loop(self) -> None:
         asyncio.set_event_loop(self.loop)
         self.loop.run_forever()
@@ -186,30 +283,39 @@ class WebsocketServer:
         server_id = "-----"
         try:
             async for raw in websocket:
-                try:
-                    msg = json.loads(raw)
-                except json.JSONDecodeError:
-                    await websocket.close(code=1003, reason="Invalid JSON")
-                    break
-
-                self._control.debug(f"[WS][RAW] recv={raw!r}", level=3)
-
-                if "account" not in msg:
-                    await websocket.send(
-                        json.dumps(
-                            self.data_packet.get_data_packet(
-                                PacketType.TEST_CONNECT,
-                                DEFAULT_TEMP,
-                                DEFAULT_TEMP,
-                                None,
-                            )[DEFAULT_TEMP[0]]
+                msg: Dict[str, Any] | bytes
+                if is_envelope(raw):
+                    # 二进制信封不携带账户，只接受已登录并绑定到本连接的账户
+                    if self.websockets.get(server_id) is not websocket:
+                        await websocket.close(code=1008, reason="Unbound binary frame")
+                        break
+                    msg = bytes(raw)  # type: ignore[arg-type]
+                else:
+                    try:
+                        handshake = await self.codec.run(len(raw), json_codec.loads, raw)
+                    except json.JSONDecodeError:
+                        await websocket.close(code=1003, reason="Invalid JSON")
+                        break
+
+                    self._control.debug(f"[WS][RAW] recv={raw!r}", level=3)
+
+                    if not isinstance(handshake, dict) or "account" not in handshake:
+                        await websocket.send(
+                            json_codec.dumps_str(
+                                self.data_packet.get_data_packet(
+                                    PacketType.TEST_CONNECT,
+                                    DEFAULT_TEMP,
+                                    DEFAULT_TEMP,
+                                    None,
+                                )[DEFAULT_TEMP[0]]
+                            )
                         )
-                    )
-                    await websocket.close(code=1008, reason="Malformed handshake")
-                    break
+                        await websocket.close(code=1008, reason="Malformed handshake")
+                        break
 
-                server_id = msg["account"]
-                self._control.debug(f"[WS][HANDSHAKE] account={server_id}", level=3)
+                    msg = handshake
+                    server_id = msg["account"]
+                    self._control.debug(f"[WS][HANDSHAKE] account={server_id}", level=3)
                 if self._rate_limiter is not None:
                     limit_key = self._resolve_rate_limit_key(server_id, websocket)
                     if not self._rate_limiter.allow(limit_key):
@@ -233,13 +339,15 @@ class WebsocketServer:
 
     async def _process_message(
         self,
-        msg: Dict[str, Any],
+        msg: Dict[str, Any] | bytes,
         websocket: WebSocketServerProtocol,
         server_id: str,
     ) -> None:
-        accounts = self.read_accounts()
         try:
-            payload = self._decrypt_message(msg, server_id, accounts)
+            size = len(msg) if isinstance(msg, bytes) else len(msg.get("data") or "")
+            payload = await self.codec.run(size, self._decrypt_message, msg, server_id)
+            if isinstance(payload, list) and not self.peer_supports(server_id, Capability.BATCHING):
+                raise ValueError("Batch frame from a peer without batch_v1")
             self._control.debug(
                 f"[WS][DECODED] account={server_id} payload={payload}", level=3
             )
@@ -248,7 +356,7 @@ class WebsocketServer:
             self._control.logger.warning(
                 f"Failed to process message from {server_id}: {exc}"
             )
-            self._control.debug(f"Raw message: {msg}", level=3)
+            self._control.debug(f"Raw message: {_describe_frame(msg)}", level=3)
             await websocket.close(code=1008, reason="HTTP 400")
             await self._close_connection(server_id, websocket)
         except Exception as exc:
@@ -256,22 +364,28 @@ class WebsocketServer:
                 f"Unexpected error during message processing: {exc}"
             )
             if GlobalContext.get_debug_level() >= 3:
-                self._control.logger.debug(f"Raw message: {msg}", exc_info=True)
+                self._control.logger.debug(
+                    f"Raw message: {_describe_frame(msg)}", exc_info=True
+                )
             await websocket.close(code=1011, reason="Internal error")
             await self._close_connection(server_id, websocket)
 
     def _decrypt_message(
         self,
-        msg: Dict[str, Any],
+        msg: Dict[str, Any] | bytes,
         account: str,
-        accounts: Dict[str, str],
     ) -> Dict[str, Any]:
-        if account not in accounts and account != "-----":
+        key = self._resolve_account_key(account)
+        if key is None:
             raise ValueError(f"Unknown account: {account}")
 
-        key = get_register_password() if account == "-----" else accounts[account]
-        decrypted = aes_decrypt(msg.get("data"), key)  # type: ignore[arg-type]
-        return json.loads(decrypted.decode())  # type: ignore[no-any-return]
+        if isinstance(msg, bytes):
+            _, decrypted = decode_envelope(
+                msg, key, self._max_packet_size(), self.sessions.get(account)
+            )
+        else:
+            decrypted = aes_decrypt(msg.get("data"), key)  # type: ignore[arg-type]
+        return json_codec.loads(decrypted)  # type: ignore[no-any-return]
 
     async def close_connect(
         self,
@@ -290,14 +404,35 @@ class WebsocketServer:
     async def _close_connection(
         self, server_id: str, websocket: WebSocketServerProtocol
     ) -> None:
+        owner = self.websockets.get(server_id)
+        if owner is not None and owner is not websocket:
+            # 账户已绑定到另一条连接（重复登录被拒，或旧连接在重连后才关闭），其状态不属于本连接
+            return
         if self._rate_limiter is not None:
             self._rate_limiter.clear(self._resolve_rate_limit_key(server_id, websocket))
         if server_id != "-----":
+            if owner is None:
+                # 出错路径与连接处理的 finally 都会调用，只有第一次需要清理；未登录的连接也没有状态
+                return
+            group_member = self.peer_supports(server_id, Capability.GROUP_KEY)
             self.websockets.pop(server_id, None)
+            coalescer = self.coalescers.pop(server_id, None)
+            if coalescer is not None:
+                coalescer.close()
+            queue = self.outbound.pop(server_id, None)
+            if queue is not None:
+                await queue.close()
             self.servers_info.pop(server_id, None)
+            self.sessions.pop(server_id, None)
+            self.frame_cache.evict_account(server_id)
             self.last_send_packet.pop(server_id, None)
+            self.send_windows.pop(server_id, None)
+            self.retransmit.forget(server_id)
+            self.acks.forget(server_id)
             self.data_packet.del_server_id(server_id)
             del_connect(server_id)
+            if group_member:
+                await self._rotate_group_key()
             await self.broadcast(
                 self.data_packet.get_data_packet(
                     PacketType.DEL_LOGIN,
@@ -318,8 +453,18 @@ class WebsocketServer:
 
     # ===== 数据收发 =====
     async def send(
-        self, data: dict, websocket: WebSocketServerProtocol, account: str
+        self,
+        data: dict,
+        websocket: WebSocketServerProtocol,
+        account: str,
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
     ) -> None:
+        """加密并发送单个数据包。
+
+        *urgent* 为真时跳过合并窗口立即发送；*priority* 覆盖按数据包类型决定的优先级通道。
+        """
         if data is None:
             if GlobalContext.get_debug_level() >= 2:
                 self._control.debug(
@@ -328,43 +473,625 @@ class WebsocketServer:
                 )
             return
 
+        packet = self._prepare_packet(data, account)
+        self._log_outgoing(packet, account)
+
+        try:
+            coalescer = self._coalescer(account, websocket)
+            if coalescer is not None:
+                if (
+                    not urgent
+                    and priority in (None, lanes.PRIORITY_INTERACTIVE)
+                    and (
+                        batching.batchable(packet, coalescer.max_bytes)
+                        or batching.rides_along(packet, coalescer)
+                    )
+                ):
+                    coalescer.add(self._outbound_frame(packet, relay.dumps_packet(packet)))
+                    self._piggyback_ack(account, coalescer)
+                    return
+                # 先发出窗口内已合并的数据包，保持发送顺序
+                await coalescer.flush()
+            outbound = await self.codec.run_for_packet(
+                packet, self._encode_outbound, packet, account, priority
+            )
+            queue = self._outbound_queue(account, websocket)
+            if queue is None:
+                await websocket.send(outbound.wire())
+            elif queue.put(outbound) != QUEUED:
+                raise ConnectionError("outbound queue overflow")
+        except Exception as exc:
+            self._control.logger.warning(
+                f"Failed to send packet type={packet.get('type')} account={account}: {exc}"
+            )
+
+    async def replay(
+        self, account: str, websocket: WebSocketServerProtocol, packets: list[dict]
+    ) -> int:
+        """发送 ``ping`` 的历史重放，返回写出的帧数。
+
+        协商了 ``batch_v1`` 的连接上每 ``resync_batch_size`` 个数据包（且不超过 ``batch_max_bytes``）
+        合并为一个批量帧，否则逐个发送。
+        """
+        if not self.peer_supports(account, Capability.BATCHING):
+            for packet in packets:
+                await self.send(packet, websocket, account)
+            return len(packets)
+        coalescer = self.coalescers.get(account)
+        if coalescer is not None:
+            # 先发出合并窗口中的数据包，保持发送顺序
+            await coalescer.flush()
+        batch_size = self.data_packet.resync.batch_size
+        max_bytes = getattr(self._config, "batch_max_bytes", batching.DEFAULT_BATCH_MAX_BYTES)
+        frames = 0
+        batch: list[OutboundFrame] = []
+        batch_bytes = 0
+        for data in packets:
+            packet = self._prepare_packet(data, account)
+            self._log_outgoing(packet, account)
+            frame = self._outbound_frame(packet, relay.dumps_packet(packet))
+            if batch and (len(batch) >= batch_size or batch_bytes + len(frame.data) > max_bytes):
+                await self._send_batch(account, websocket, batch)
+                frames += 1
+                batch, batch_bytes = [], 0
+            batch.append(frame)
+            batch_bytes += len(frame.data)
+        if batch:
+            await self._send_batch(account, websocket, batch)
+            frames += 1
+        return frames
+
+    async def broadcast(
+        self,
+        data: dict,
+        except_id: Optional[list] = None,
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
+    ) -> Dict[str, list[str]]:
+        """向多个子服务器发送数据包，返回 ``delivered`` / ``slow`` / ``failed`` 报告。
+
+        默认并发发送，每个目标单独受 ``broadcast_send_timeout`` 限制，
+        单个缓慢的子服务器不会拖慢其他目标。*urgent* 与 *priority* 的含义同 :meth:`send`。
+        """
+        except_id = except_id or []
+        targets = [
+            (server_id, self._prepare_packet(packet, server_id))
+            for server_id, packet in data.items()
+            if server_id in self.websockets
+            and server_id not in except_id
+            and packet is not None
+        ]
+        report: Dict[str, list[str]] = {"delivered": [], "slow": [], "failed": []}
+        if not targets:
+            return report
+
+        for server_id, packet in targets:
+            self._log_outgoing(packet, server_id)
+        # 组密钥成员共用一份密文；其余目标并行加密，再交给各自的写入方
+        frames: Dict[str, bytes | OutboundFrame | Exception] = dict(
+            await self._encode_group_broadcast(targets)
+        )
+        batched = await self._coalesce(
+            targets, frames, urgent or priority not in (None, lanes.PRIORITY_INTERACTIVE)
+        )
+        pending = [
+            (packet, server_id, priority)
+            for server_id, packet in targets
+            if server_id not in frames and server_id not in batched
+        ]
+        encoded = await self.codec.map(
+            self._encode_outbound,
+            pending,
+            getattr(self._config, "broadcast_parallel_min_recipients", 8),
+        )
+        frames.update(
+            (server_id, frame) for (_, server_id, _), frame in zip(pending, encoded)
+        )
+
+        report["delivered"].extend(batched)
+        direct = [(server_id, packet) for server_id, packet in targets if server_id not in batched]
+        timeout = getattr(self._config, "broadcast_send_timeout", 5.0)
+        if getattr(self._config, "broadcast_concurrent", True):
+            outcomes = await asyncio.gather(
+                *(
+                    self._deliver(server_id, packet, frames[server_id], timeout, priority)
+                    for server_id, packet in direct
+                )
+            )
+        else:
+            outcomes = [
+                await self._deliver(server_id, packet, frames[server_id], timeout, priority)
+                for server_id, packet in direct
+            ]
+
+        for (server_id, _), outcome in zip(direct, outcomes):
+            report[outcome].append(server_id)
+        if report["slow"] or report["failed"]:
+            self._control.logger.warning(
+                f"Broadcast incomplete: slow={report['slow']} failed={report['failed']}"
+            )
+        return report
+
+    async def _coalesce(
+        self, targets: list[tuple[str, dict]], group_frames: Dict[str, Any], urgent: bool
+    ) -> list[str]:
+        """把可合并的广播副本放入各连接的合并窗口，返回已放入的目标。
+
+        使用组密钥共享帧或不可合并的目标先冲刷自己的窗口，以保持发送顺序。
+        """
+        batched: list[str] = []
+        for server_id, packet in targets:
+            websocket = self.websockets.get(server_id)
+            coalescer = self._coalescer(server_id, websocket) if websocket else None
+            if coalescer is None:
+                continue
+            if (
+                not urgent
+                and server_id not in group_frames
+                and batching.batchable(packet, coalescer.max_bytes)
+            ):
+                coalescer.add(self._outbound_frame(packet, relay.dumps_packet(packet)))
+                self._piggyback_ack(server_id, coalescer)
+                batched.append(server_id)
+            else:
+                await coalescer.flush()
+        return batched
+
+    def _piggyback_ack(self, account: str, coalescer: batching.Coalescer) -> None:
+        """把待发送的累计确认放进同一合并窗口，随即将发出的数据一起成帧。"""
+        upto = self.acks.take(account)
+        if upto is None:
+            return
+        ack = self.data_packet.cumulative_ack(account, upto)
+        if ack is not None:
+            ack = self._prepare_packet(ack, account)
+            self._log_outgoing(ack, account)
+            coalescer.add(self._outbound_frame(ack, relay.dumps_packet(ack)))
+
+    async def _flush_ack(self, server_id: str, upto: int) -> None:
+        websocket = self.websockets.get(server_id)
+        ack = self.data_packet.cumulative_ack(server_id, upto)
+        if websocket is not None and ack is not None:
+            await self.send(ack, websocket, server_id)
+
+    async def _encode_group_broadcast(
+        self, targets: list[tuple[str, dict]]
+    ) -> Dict[str, bytes | Exception]:
+        """为组密钥成员生成共享帧；数据包除 sid 外不一致时返回空映射。"""
+        members = [
+            (server_id, packet)
+            for server_id, packet in targets
+            if self.peer_supports(server_id, Capability.GROUP_KEY)
+        ]
+        if len(members) < 2 or members[0][1].get("type") == PacketType.GROUP_KEY:
+            return {}
+        shared = {key: value for key, value in members[0][1].items() if key != "sid"}
+        for _, packet in members[1:]:
+            if any(
+                packet.get(key) != value
+                for key, value in shared.items()
+                if key != "timestamp"
+            ):
+                return {}
+        shared["sids"] = {server_id: packet["sid"] for server_id, packet in members}
+        compress = all(
+            self.peer_supports(server_id, Capability.COMPRESSION)
+            for server_id, _ in members
+        )
+        try:
+            frame: bytes | Exception = await self.codec.run_for_packet(
+                shared, self._encode_group_frame, shared, compress
+            )
+        except Exception as exc:
+            frame = exc
+        return {server_id: frame for server_id, _ in members}
+
+    def _encode_group_frame(self, packet: dict, compress: bool) -> bytes:
+        epoch, key = self.group_keys.current()
+        plaintext = relay.dumps_packet(packet)
+        flags = 0
+        if compress:
+            plaintext, compressed = self.compressor.maybe_compress(
+                plaintext, _type_name(packet.get("type"))
+            )
+            if compressed:
+                flags |= FLAG_COMPRESSED
+        return encode_group_envelope(plaintext, epoch, key, flags)
+
+    async def _rotate_group_key(self) -> None:
+        """成员离开后轮换组密钥，并以各自的账户密钥发送给剩余成员。"""
+        epoch, _ = self.group_keys.rotate()
+        members = {
+            server_id: websocket
+            for server_id, websocket in self.websockets.items()
+            if self.peer_supports(server_id, Capability.GROUP_KEY)
+        }
+        packets = self.data_packet.get_data_packet(
+            PacketType.GROUP_KEY,
+            DEFAULT_ALL,
+            DEFAULT_SERVER,
+            self.group_keys.export(),
+            [server_id for server_id in self.websockets if server_id not in members],
+        )
+        for server_id, websocket in members.items():
+            if server_id in packets:
+                await self.send(packets[server_id], websocket, server_id)
+        self._control.debug(f"[FLOW][GROUP_KEY] rotated epoch={epoch}", level=2)
+
+    async def _deliver(
+        self,
+        server_id: str,
+        packet: dict,
+        frame: bytes | OutboundFrame | Exception,
+        timeout: float,
+        priority: Optional[str] = None,
+    ) -> str:
+        websocket = self.websockets.get(server_id)
+        if isinstance(frame, Exception):
+            self._control.debug(
+                f"[FLOW][BROADCAST] encode failed account={server_id}: {frame}", level=2
+            )
+            return "failed"
+        if websocket is None:
+            return "failed"
+        if not isinstance(frame, OutboundFrame):
+            frame = self._outbound_frame(packet, frame, priority)
+        try:
+            queue = self._outbound_queue(server_id, websocket)
+            if queue is not None:
+                result = queue.put(frame)
+                if result == QUEUED:
+                    return "delivered"
+                return "failed" if result == CLOSED else "slow"
+            await asyncio.wait_for(
+                websocket.send(frame.wire()), timeout if timeout and timeout > 0 else None
+            )
+        except asyncio.TimeoutError:
+            return "slow"
+        except Exception as exc:
+            self._control.debug(
+                f"[FLOW][BROADCAST] send failed account={server_id}: {exc}", level=2
+            )
+            return "failed"
+        return "delivered"
+
+    @staticmethod
+    def _unwrap_packet(data: dict, account: str) -> dict:
         if (
             isinstance(data, dict)
             and account in data
             and isinstance(data[account], dict)
             and "sid" in data[account]
         ):
-            packet = data[account]
-        else:
-            packet = data
+            return data[account]  # type: ignore[no-any-return]
+        return data
+
+    def _prepare_packet(self, data: dict, account: str) -> dict:
+        packet = self._unwrap_packet(data, account)
+        return ensure_checksum(
+            packet, self.peer_supports(account, Capability.TRANSPORT_INTEGRITY)
+        )
 
+    def _log_outgoing(self, packet: dict, account: str) -> None:
         self._control.debug(
             f"[S][{packet['type']}][{packet['from']} -> {packet['to']}({account})][{packet['sid']}] {packet.get('payload')}",
             level=1,
         )
 
-        accounts = self.read_accounts()
+    def _outbound_queue(
+        self, account: str, websocket: WebSocketServerProtocol
+    ) -> Optional[OutboundQueue]:
+        """返回已登录连接的发送队列；未登录的临时连接直接写 socket。"""
+        current = self.websockets.get(account)
+        if current is None or current is not websocket:
+            return None
+        queue = self.outbound.get(account)
+        if queue is None:
+            queue = OutboundQueue(
+                current.send,
+                max_packets=getattr(self._config, "outbound_queue_max_packets", 1024),
+                max_bytes=getattr(
+                    self._config, "outbound_queue_max_bytes", 64 * 1024 * 1024
+                ),
+                policy=getattr(self._config, "outbound_queue_policy", "drop_oldest"),
+                on_overflow=lambda: self._evict_slow_consumer(account, websocket),
+                name=account,
+                weights=lanes.configured_weights(self._config),
+            )
+            self.outbound[account] = queue
+        return queue
+
+    def _coalescer(
+        self, account: str, websocket: WebSocketServerProtocol
+    ) -> Optional[batching.Coalescer]:
+        """返回协商了 ``batch_v1`` 且启用合并窗口的已登录连接的合并器。"""
+        window = getattr(self._config, "batch_window_ms", 0.0)
+        if (
+            not window
+            or window <= 0
+            or self.websockets.get(account) is not websocket
+            or not self.peer_supports(account, Capability.BATCHING)
+        ):
+            return None
+        coalescer = self.coalescers.get(account)
+        if coalescer is None:
+
+            async def sink(batch: list[OutboundFrame]) -> None:
+                await self._send_batch(account, websocket, batch)
+
+            coalescer = batching.Coalescer(
+                sink,
+                window=window / 1000,
+                max_packets=getattr(
+                    self._config, "batch_max_packets", batching.DEFAULT_BATCH_MAX_PACKETS
+                ),
+                max_bytes=getattr(
+                    self._config, "batch_max_bytes", batching.DEFAULT_BATCH_MAX_BYTES
+                ),
+            )
+            self.coalescers[account] = coalescer
+        return coalescer
+
+    async def _send_batch(
+        self, account: str, websocket: WebSocketServerProtocol, batch: list[OutboundFrame]
+    ) -> None:
+        """把合并窗口内的明文拼成一个帧，加密一次后放入发送队列。"""
         try:
-            if account == "-----":
-                encrypted = aes_encrypt(
-                    json.dumps(packet).encode(), get_register_password()
-                )
-                await websocket.send(encrypted)
-            elif account in accounts:
-                encrypted = aes_encrypt(json.dumps(packet).encode(), accounts[account])
-                await websocket.send(encrypted)
-            else:
+            key = self._resolve_account_key(account)
+            if key is None:
                 raise ValueError(f"Unknown account: {account}")
+            packet_type = batch[0].packet_type if len(batch) == 1 else batching.BATCH_TYPE
+            outbound = self._seal_frame(
+                OutboundFrame(
+                    batching.pack(batch), packet_type, any(item.persistent for item in batch)
+                ),
+                account,
+                key,
+            )
+            queue = self._outbound_queue(account, websocket)
+            if queue is None:
+                await websocket.send(outbound.wire())
+                return
+            if queue.put(outbound) != QUEUED:
+                raise ConnectionError("outbound queue overflow")
         except Exception as exc:
             self._control.logger.warning(
-                f"Failed to send packet type={packet.get('type')} account={account}: {exc}"
+                f"Failed to send batch of {len(batch)} packets account={account}: {exc}"
             )
 
-    async def broadcast(self, data: dict, except_id: Optional[list] = None) -> None:
-        except_id = except_id or []
-        for server_id, packet in data.items():
-            if server_id in self.websockets and server_id not in except_id:
-                await self.send(packet, self.websockets[server_id], server_id)
+    @staticmethod
+    def _outbound_frame(
+        packet: dict, frame: bytes, priority: Optional[str] = None
+    ) -> OutboundFrame:
+        try:
+            packet_type = PacketType(packet.get("type"))
+        except ValueError:
+            persistent = True
+        else:
+            # 丢弃任一分片都会使整个传输失效，队列超限时不丢弃分片
+            persistent = packet_type in PERSISTENT_TYPES or packet_type is PacketType.DATA_FRAGMENT
+        return OutboundFrame(
+            frame,
+            _type_name(packet.get("type")),
+            persistent,
+            lanes.priority_of(packet.get("type"), priority),
+        )
+
+    async def _evict_slow_consumer(
+        self, server_id: str, websocket: WebSocketServerProtocol
+    ) -> None:
+        self._control.logger.warning(
+            f"Outbound queue limit exceeded for {server_id}; disconnecting slow consumer"
+        )
+        try:
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
+        except Exception:
+            pass
+
+    def _encode_outbound(
+        self, packet: dict, account: str, priority: Optional[str] = None
+    ) -> OutboundFrame:
+        """编码待发送的数据包；AEAD 会话帧的加密推迟到写出时，见 :meth:`OutboundFrame.wire`。"""
+        if account not in self.sessions:
+            return self._outbound_frame(packet, self._encode_packet(packet, account), priority)
+        key = self._resolve_account_key(account)
+        if key is None:
+            raise ValueError(f"Unknown account: {account}")
+        return self._seal_frame(
+            self._outbound_frame(packet, relay.dumps_packet(packet), priority), account, key
+        )
+
+    def _seal_frame(self, frame: OutboundFrame, account: str, key: str) -> OutboundFrame:
+        """加密 *frame* 的明文；有会话密钥时只压缩，由写出方按写出顺序加密。"""
+        plaintext = frame.data if isinstance(frame.data, bytes) else frame.data.encode()
+        session = self.sessions.get(account)
+        if session is None:
+            frame.data = self._seal(plaintext, frame.packet_type, account, key, None)
+            return frame
+        frame.data, flags = self._compress(plaintext, frame.packet_type, account)
+        return frame.seal_later(session, flags)
+
+    def _encode_packet(self, packet: dict, account: str) -> bytes:
+        key = self._resolve_account_key(account)
+        if key is None:
+            raise ValueError(f"Unknown account: {account}")
+        session = self.sessions.get(account)
+        # 会话密钥使用递增计数器，重复发送相同密文会被对端视为重放
+        identity = (
+            self._frame_identity(packet)
+            if session is None and account != DEFAULT_TEMP[0]
+            else None
+        )
+        plaintext: Optional[bytes] = None
+        if identity is not None and packet.get("checksum") is None:
+            # 协商了 transport_integrity_v1 时没有校验和区分内容，改用序列化后明文的摘要
+            plaintext = relay.dumps_packet(packet)
+            identity += (hashlib.blake2b(plaintext, digest_size=16).digest(),)
+        if identity is not None:
+            cached = self.frame_cache.get(account, identity, key)
+            if cached is not None:
+                return cached
+        if plaintext is None:
+            frame = self._seal_packet(packet, account, key, session)
+        else:
+            frame = self._seal(plaintext, _type_name(packet.get("type")), account, key, session)
+        if identity is not None:
+            self.frame_cache.put(account, identity, key, frame)
+        return frame
+
+    def _frame_identity(self, packet: dict) -> Optional[tuple]:
+        """持久化数据包的缓存标识；非持久化数据包不会重发，不缓存。"""
+        if not self.frame_cache.enabled:
+            return None
+        try:
+            packet_type = PacketType(packet.get("type"))
+        except ValueError:
+            return None
+        if packet_type not in PERSISTENT_TYPES:
+            return None
+        return (
+            packet_type.value,
+            packet.get("sid"),
+            packet.get("status"),
+            packet.get("timestamp"),
+            packet.get("checksum"),
+        )
+
+    def _seal_packet(
+        self,
+        packet: dict,
+        account: str,
+        key: str,
+        session: Optional[SessionCipher],
+    ) -> bytes:
+        return self._seal(
+            relay.dumps_packet(packet), _type_name(packet.get("type")), account, key, session
+        )
+
+    def _seal(
+        self,
+        plaintext: bytes,
+        packet_type: str,
+        account: str,
+        key: str,
+        session: Optional[SessionCipher],
+    ) -> bytes:
+        if self.peer_supports(account, Capability.BINARY_ENVELOPE):
+            plaintext, flags = self._compress(plaintext, packet_type, account)
+            return encode_envelope(plaintext, key, flags, session)
+        return aes_encrypt(plaintext, key)
+
+    def _compress(self, plaintext: bytes, packet_type: str, account: str) -> tuple[bytes, int]:
+        if not self.peer_supports(account, Capability.COMPRESSION):
+            return plaintext, 0
+        plaintext, compressed = self.compressor.maybe_compress(plaintext, packet_type)
+        return plaintext, FLAG_COMPRESSED if compressed else 0
+
+    async def wait_for_room(self, server_ids: Iterable[str]) -> None:
+        """等待各目标发送队列的积压降到分片转发预算以内。
+
+        中心服务器逐条处理同一连接的消息，等待期间不再读取发送方，背压经 TCP 传回发送方；
+        单个目标最多等待 ``broadcast_send_timeout`` 秒，之后交由发送队列的超限策略处理。
+        """
+        budget = fragments.relay_backlog_bytes(self._config)
+        timeout = getattr(self._config, "broadcast_send_timeout", 5.0)
+        for server_id in server_ids:
+            queue = self.outbound.get(server_id)
+            if queue is None:
+                continue
+            try:
+                await asyncio.wait_for(
+                    queue.wait_for_room(budget), timeout if timeout and timeout > 0 else None
+                )
+            except asyncio.TimeoutError:
+                self._control.debug(
+                    f"[FLOW][FRAGMENT] backlog still above budget account={server_id}", level=2
+                )
+
+    def peer_supports(self, server_id: str, capability: Capability) -> bool:
+        """对端在登录时是否协商了 *capability*。"""
+        info = self.servers_info.get(server_id)
+        if not info:
+            return False
+        return capability.value in info.get("capabilities", ())
+
+    # ===== 未确认的 data_send =====
+    def track_data_send(self, packets: Dict[str, dict]) -> None:
+        """记录待确认的 ``data_send``：协商了 ``send_window_v1`` 的目标进入发送窗口，其余只保留最后一个。
+
+        中心服务器不因窗口已满而暂停转发，窗口满时丢弃最旧的条目，它仍可通过 ``ping`` 的历史重放补发。
+        只有协商了 ``dedup_v1`` 的目标启用逐包重传定时器，其余目标由 :meth:`_resend_loop` 定期整体重发，
+        避免不能识别重复数据包的旧子服务器把重传交给插件多次处理。
+        """
+        now = time.monotonic()
+        for server_id, packet in packets.items():
+            timed = self.peer_supports(server_id, Capability.DUPLICATE_SUPPRESSION)
+            if not self.peer_supports(server_id, Capability.SEND_WINDOW):
+                self.last_send_packet[server_id] = packet
+                if timed:
+                    self._schedule_retransmit((server_id, None), now)
+                continue
+            window = self.send_windows.get(server_id)
+            if window is None:
+                window = send_window.SendWindow(send_window.configured_size(self._config))
+                self.send_windows[server_id] = window
+            evicted = window.track(packet["sid"], packet)
+            if evicted is not None:
+                self.retransmit.cancel((server_id, evicted[0]))
+                self._control.debug(
+                    f"[FLOW][WINDOW] full account={server_id}, untracked sid={evicted[0]}", level=2
+                )
+            if timed:
+                self._schedule_retransmit((server_id, packet["sid"]), now)
+
+    def acknowledge(self, server_id: str, sid: Optional[int]) -> None:
+        """处理 ``data_sendok``：携带 sid 时只确认该数据包，否则按旧协议清除最后一个数据包。"""
+        key = self._timer_key(server_id, sid)
+        window = self.send_windows.get(server_id)
+        if key[1] is not None and window is not None:
+            window.ack(key[1])
+        else:
+            self.last_send_packet.pop(server_id, None)
+        self.retransmit.ack(key, time.monotonic())
+
+    def acknowledge_through(self, server_id: str, upto: int) -> None:
+        """处理累计确认：移除该子服务器窗口中 sid 不超过 *upto* 的数据包。"""
+        window = self.send_windows.get(server_id)
+        if window is None:
+            return
+        now = time.monotonic()
+        for sid in window.ack_through(upto):
+            self.retransmit.ack((server_id, sid), now)
+
+    def unacked_data_send(self, server_id: str, sid: Optional[int]) -> Optional[dict]:
+        """返回 ``data_error`` 要求重发的数据包：携带 sid 时只取该数据包，否则取最后一个。
+
+        该数据包此后只能由单独确认移除，不受累计确认影响。
+        """
+        key = self._timer_key(server_id, sid)
+        self.retransmit.mark_resent(key)
+        window = self.send_windows.get(server_id)
+        if key[1] is not None and window is not None:
+            window.nack(key[1])
+        return self._unacked_packet(key)
+
+    def _timer_key(self, server_id: str, sid: Optional[int]) -> retransmit.TimerKey:
+        if sid is not None and server_id in self.send_windows:
+            return server_id, sid
+        return server_id, None
+
+    def _unacked_packet(self, key: retransmit.TimerKey) -> Optional[dict]:
+        server_id, sid = key
+        window = self.send_windows.get(server_id)
+        if sid is not None and window is not None:
+            return window.get(sid)
+        return self.last_send_packet.get(server_id)
+
+    def _schedule_retransmit(self, key: retransmit.TimerKey, now: float) -> None:
+        if self.retransmit.schedule(key, now):
+            # 新的截止时间早于重传任务正在等待的时间
+            self._retransmit_wakeup.set()
 
     async def send_data_to_other_server(
         self,
@@ -374,25 +1101,70 @@ class WebsocketServer:
         t_plugin_id: str,
         data: dict,
         except_id: Optional[list] = None,
+        *,
+        urgent: bool = False,
+        priority: Optional[str] = None,
     ) -> None:
         except_id = except_id or []
+        fragment_size = fragments.configured_size(self._config)
+        chunked: list[str] = []
+        if fragments.oversized(data, fragment_size):
+            chunked = [
+                server_id
+                for server_id in (self.websockets if t_server_id == "all" else [t_server_id])
+                if server_id in self.websockets
+                and server_id not in except_id
+                and self.peer_supports(server_id, Capability.FRAGMENTATION)
+            ]
+        if chunked:
+            await self._send_fragments(
+                (t_server_id, t_plugin_id), (f_server_id, f_plugin_id), data, fragment_size, chunked
+            )
+            if t_server_id != "all":
+                return
         msg = self.data_packet.get_data_packet(
             PacketType.DATA_SEND,
             (t_server_id, t_plugin_id),
             (f_server_id, f_plugin_id),
             data,
+            chunked,
         )
         if t_server_id == "all":
-            for server in self.servers_info:
-                self.last_send_packet[server] = msg
-            await self.broadcast(msg, except_id)
+            self.track_data_send(msg)
+            await self.broadcast(msg, except_id, urgent=urgent, priority=priority)
         elif t_server_id not in self.websockets:
             self._control.log_system.logger.error(
                 f"Unable to send data to server {t_server_id}"
             )
         else:
-            self.last_send_packet[t_server_id] = msg
-            await self.send(msg[t_server_id], self.websockets[t_server_id], t_server_id)
+            self.track_data_send(msg)
+            await self.send(
+                msg[t_server_id],
+                self.websockets[t_server_id],
+                t_server_id,
+                urgent=urgent,
+                priority=priority,
+            )
+
+    async def _send_fragments(
+        self,
+        to_info: Tuple[str, str],
+        from_info: Tuple[str, str],
+        data: dict,
+        fragment_size: int,
+        targets: list[str],
+    ) -> None:
+        """向协商了 ``data_fragment_v1`` 的 *targets* 逐片发送超大 payload。"""
+        text = await self.codec.run_for_packet(data, json_codec.dumps_str, data)
+        for fragment in fragments.split(text, fragment_size):
+            packets = self.data_packet.get_data_packet(
+                PacketType.DATA_FRAGMENT, to_info, from_info, fragment
+            )
+            for server_id in targets:
+                websocket = self.websockets.get(server_id)
+                if websocket is not None and server_id in packets:
+                    await self.send(packets[server_id], websocket, server_id)
+            await self.wait_for_room(targets)
 
     async def send_file_to_other_server(
         self,
@@ -480,21 +1252,60 @@ class WebsocketServer:
         except Exception as exc:
             self._control.logger.error(f"Send file error: {exc}")
 
+    async def _retransmit_due(self, now: float) -> None:
+        """重发到期的数据包，放弃超过重传上限的数据包。"""
+        resend, expired = self.retransmit.expire(now)
+        for server_id, sid in expired:
+            window = self.send_windows.get(server_id)
+            if sid is not None and window is not None:
+                window.discard(sid)
+            else:
+                self.last_send_packet.pop(server_id, None)
+            self._control.debug(
+                f"[FLOW][RETRANSMIT] give up account={server_id}, sid={sid}", level=2
+            )
+        for key in resend:
+            websocket = self.websockets.get(key[0])
+            packet = self._unacked_packet(key)
+            if websocket is not None and packet is not None:
+                await self.send(packet, websocket, key[0])
+
     async def _resend(self) -> None:
-        for server_id, packet in list(self.last_send_packet.items()):
-            if server_id == "all":
-                await self.broadcast(packet)
-            elif server_id in self.websockets:
-                await self.send(packet, self.websockets[server_id], server_id)
+        """整体重发未协商 ``dedup_v1`` 的子服务器的未确认数据包。"""
+        for server_id, websocket in list(self.websockets.items()):
+            if self.peer_supports(server_id, Capability.DUPLICATE_SUPPRESSION):
+                continue
+            window = self.send_windows.get(server_id)
+            if window is not None:
+                packets = window.resend_all()
+            else:
+                packet = self.last_send_packet.get(server_id)
+                packets = [] if packet is None else [packet]
+            for packet in packets:
+                await self.send(packet, websocket, server_id)
 
     async def _resend_loop(self) -> None:
         try:
             while True:
-                await asyncio.sleep(30)
+                await asyncio.sleep(LEGACY_RESEND_INTERVAL)
                 await self._resend()
         except asyncio.CancelledError:
             return
 
+    async def _retransmit_loop(self) -> None:
+        try:
+            while True:
+                deadline = self.retransmit.next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                self._retransmit_wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._retransmit_wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                await self._retransmit_due(time.monotonic())
+        except asyncio.CancelledError:
+            return
+
     async def _send_keepalive(self) -> None:
         for server_id, ws in list(self.websockets.items()):
             try:
@@ -512,6 +1323,14 @@ class WebsocketServer:
         except asyncio.CancelledError:
             return
 
+    async def _account_watch_loop(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(ACCOUNT_REFRESH_INTERVAL)
+                self.accounts.refresh()
+        except asyncio.CancelledError:
+            return
+
     async def _start_healthcheck_server(self) -> None:
         if not getattr(self._config, "healthcheck_enabled", True):
             return
@@ -567,6 +1386,33 @@ class WebsocketServer:
             "connected_servers": len(self.websockets),
             "known_servers": sorted(self.servers_info.keys()),
             "rate_limit_enabled": self._rate_limiter is not None,
+            "cipher_cache": get_cipher_cache_stats(),
+            "compression": self.compressor.stats(),
+            "aead_sessions": len(self.sessions),
+            "codec_pool": self.codec.stats(),
+            "frame_cache": self.frame_cache.stats(),
+            "fragments": self.data_packet.fragments.stats(),
+            "duplicates": self.data_packet.duplicates.stats(),
+            "resync": self.data_packet.resync.stats(),
+            "json_codec": json_codec.backend_name(),
+            "group_key": {
+                "epoch": self.group_keys.epoch,
+                "rotations": self.group_keys.rotations,
+            },
+            "outbound_queues": {
+                server_id: queue.stats()
+                for server_id, queue in sorted(self.outbound.items())
+            },
+            "batching": {
+                server_id: coalescer.stats()
+                for server_id, coalescer in sorted(self.coalescers.items())
+            },
+            "send_windows": {
+                server_id: window.stats()
+                for server_id, window in sorted(self.send_windows.items())
+            },
+            "retransmit": self.retransmit.stats(),
+            "acks": self.acks.stats(),
         }
 
     @staticmethod
@@ -594,7 +1440,10 @@ class WebsocketServer:
 
     def get_history_data_packet(self, server_id: str) -> Optional[list]:
         if server_id in self.websockets:
-            return self.data_packet.get_history_packet(server_id, 0)
+            return [
+                {**packet, "payload": relay.materialize(packet.get("payload"))}
+                for packet in self.data_packet.get_history_packet(server_id, 0)
+            ]
         return None
 
     def get_recent_packets(
@@ -604,17 +1453,31 @@ class WebsocketServer:
 
     # ===== 账户文件 =====
     def read_accounts(self) -> Dict[str, str]:
-        with self._account_lock:
-            try:
-                with self._account_file.open("r", encoding="utf-8") as fh:
-                    return json.load(fh)  # type: ignore[no-any-return]
-            except (json.JSONDecodeError, FileNotFoundError):
-                return {}
+        return self.accounts.snapshot()
 
     def write_accounts(self, accounts: Dict[str, str]) -> None:
-        with self._account_lock:
-            with self._account_file.open("w", encoding="utf-8") as fh:
-                json.dump(accounts, fh, indent=4, ensure_ascii=False)
+        self.accounts.replace(accounts)
+
+    def _resolve_account_key(self, account: str) -> Optional[str]:
+        if account == DEFAULT_TEMP[0]:
+            return get_register_password()
+        key = self.accounts.get(account)
+        if key is None and self._refresh_accounts():
+            # 未知账户时才检查文件，兼容外部新增账户
+            key = self.accounts.get(account)
+        return key
+
+    def _refresh_accounts(self) -> bool:
+        """按需检查账户文件，间隔不小于 ``ACCOUNT_REFRESH_INTERVAL``。
+
+        未知账户的帧可由对端任意伪造，若每帧都 ``stat`` 文件会被放大为
+        文件系统负载；节流后最坏情况与 :meth:`_account_watch_loop` 相同。
+        """
+        now = time.monotonic()
+        if now - self._accounts_checked_at < ACCOUNT_REFRESH_INTERVAL:
+            return False
+        self._accounts_checked_at = now
+        return self.accounts.refresh()
 
     def _prepare_account_file(self) -> Path:
         base_path = Path(GlobalContext.get_path())
@@ -676,6 +1539,8 @@ def send_data(
     t_server_id: str,
     t_plugin_id: str,
     data: dict,
+    urgent: bool = False,
+    priority: Optional[str] = None,
 ) -> None:
     if websocket_server is None:
         return
@@ -685,6 +1550,8 @@ def send_data(
         t_server_id,
         t_plugin_id,
         data,
+        urgent=urgent,
+        priority=priority,
     )
     _schedule_on_ws_loop(coro)
 
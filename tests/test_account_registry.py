@@ -0,0 +1,67 @@
+"""Tests for the in-memory AccountRegistry."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from connect_core.account.account_registry import AccountRegistry
+
+
+@pytest.fixture()
+def account_file(tmp_path: Path) -> Path:
+    path = tmp_path / "account.json"
+    path.write_text(json.dumps({"alpha": "key-a"}), encoding="utf-8")
+    return path
+
+
+class TestAccountRegistry:
+    def test_loads_existing_file(self, account_file: Path):
+        registry = AccountRegistry(account_file)
+        assert registry.get("alpha") == "key-a"
+        assert registry.get("missing") is None
+        assert "alpha" in registry
+
+    def test_lookup_does_not_touch_disk(self, account_file: Path, monkeypatch: pytest.MonkeyPatch):
+        registry = AccountRegistry(account_file)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("unexpected filesystem access")
+
+        monkeypatch.setattr("connect_core.account.account_registry.os.stat", _fail)
+        monkeypatch.setattr(Path, "open", _fail)
+        assert registry.get("alpha") == "key-a"
+
+    def test_set_writes_through(self, account_file: Path):
+        registry = AccountRegistry(account_file)
+        registry.set("beta", "key-b")
+        assert registry.get("beta") == "key-b"
+        assert json.loads(account_file.read_text(encoding="utf-8")) == {
+            "alpha": "key-a",
+            "beta": "key-b",
+        }
+        assert registry.refresh() is False
+
+    def test_refresh_picks_up_external_edit(self, account_file: Path):
+        registry = AccountRegistry(account_file)
+        account_file.write_text(json.dumps({"gamma": "key-g"}), encoding="utf-8")
+        stat = account_file.stat()
+        os.utime(account_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert registry.refresh() is True
+        assert registry.get("gamma") == "key-g"
+        assert registry.get("alpha") is None
+
+    def test_listener_notified_on_remove_and_rekey(self, account_file: Path):
+        registry = AccountRegistry(account_file)
+        changed: list[tuple[str, str]] = []
+        registry.add_listener(lambda account, old: changed.append((account, old)))
+
+        registry.set("alpha", "key-a2")
+        registry.remove("alpha")
+        registry.set("delta", "key-d")
+
+        assert changed == [("alpha", "key-a"), ("alpha", "key-a2")]
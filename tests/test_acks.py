@@ -0,0 +1,95 @@
+"""Tests for delayed cumulative acknowledgements."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from connect_core.websockets.acks import (
+    DEFAULT_ACK_DELAY_MS,
+    DelayedAcks,
+    acked_through,
+    configured_delay,
+    cumulative_payload,
+)
+
+
+class _Flushed:
+    def __init__(self) -> None:
+        self.acks: list[tuple[str, int]] = []
+
+    async def __call__(self, peer: str, upto: int) -> None:
+        self.acks.append((peer, upto))
+
+
+class TestPayload:
+    def test_round_trip(self):
+        assert acked_through(cumulative_payload(12)) == 12
+        assert acked_through({"sid": 12}) is None
+        assert acked_through({"upto": True}) is None
+        assert acked_through(None) is None
+
+    def test_configured_delay(self):
+        assert configured_delay(SimpleNamespace(ack_delay_ms=20)) == 0.02
+        assert configured_delay(SimpleNamespace(ack_delay_ms=-1)) == 0.0
+        assert configured_delay(object()) == DEFAULT_ACK_DELAY_MS / 1000
+
+
+class TestDelayedAcks:
+    @pytest.mark.asyncio
+    async def test_in_order_packets_share_one_ack(self):
+        flushed = _Flushed()
+        acks = DelayedAcks(flushed, 0.01)
+
+        assert all(acks.defer("alpha", sid) for sid in (3, 4, 6))
+        assert acks.defer("beta", 1)
+        await asyncio.sleep(0.03)
+
+        assert sorted(flushed.acks) == [("alpha", 6), ("beta", 1)]
+        assert acks.stats() == {
+            "pending": 0,
+            "deferred": 4,
+            "immediate": 0,
+            "cumulative": 2,
+            "piggybacked": 0,
+        }
+
+    @pytest.mark.asyncio
+    async def test_late_and_failed_sids_are_acked_immediately(self):
+        acks = DelayedAcks(_Flushed(), 0.01)
+        acks.defer("alpha", 5)
+        acks.seen("alpha", 7)
+
+        assert not acks.defer("alpha", 5)
+        assert not acks.defer("alpha", 7)
+        assert acks.defer("alpha", 8)
+        assert acks.stats()["immediate"] == 2
+        acks.close()
+
+    @pytest.mark.asyncio
+    async def test_take_cancels_the_timer(self):
+        flushed = _Flushed()
+        acks = DelayedAcks(flushed, 0.01)
+        acks.defer("alpha", 1)
+        acks.defer("alpha", 2)
+
+        assert acks.take("alpha") == 2
+        assert acks.take("alpha") is None
+        await asyncio.sleep(0.03)
+
+        assert flushed.acks == []
+        assert acks.stats()["piggybacked"] == 1
+
+    @pytest.mark.asyncio
+    async def test_forget_restarts_numbering(self):
+        flushed = _Flushed()
+        acks = DelayedAcks(flushed, 0.01)
+        acks.defer("alpha", 9)
+
+        acks.forget("alpha")
+        assert acks.defer("alpha", 1)
+        await asyncio.sleep(0.03)
+
+        assert flushed.acks == [("alpha", 1)]
@@ -5,13 +5,20 @@ from __future__ import annotations
 import base64
 
 import pytest
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 
 from connect_core.aes_encrypt import (
+    ROLE_CLIENT,
+    ROLE_SERVER,
+    CipherCache,
     DecryptionError,
+    SessionCipher,
     aes_decrypt,
     aes_encrypt,
     aes_main,
+    derive_session,
+    evict_cipher,
+    get_cipher_cache_stats,
 )
 
 
@@ -21,9 +28,12 @@ def _reset_aes_globals():
     import connect_core.aes_encrypt as mod
 
     mod._fernet = None
+    mod._password = None
     mod._control_interface = None
+    mod._cipher_cache.clear()
     yield
     mod._fernet = None
+    mod._password = None
     mod._control_interface = None
 
 
@@ -70,3 +80,88 @@ class TestAesEncryptDecrypt:
         aes_main(None, password=None)
         with pytest.raises(Exception):
             aes_encrypt(b"data")
+
+
+class TestCipherCache:
+    def test_repeated_key_hits_cache(self):
+        key = _make_key()
+        ciphertext = aes_encrypt(b"one", password=key)
+        aes_encrypt(b"two", password=key)
+        aes_decrypt(ciphertext, password=key)
+        stats = get_cipher_cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_evict_forces_rebuild(self):
+        key = _make_key()
+        aes_encrypt(b"data", password=key)
+        evict_cipher(key)
+        aes_encrypt(b"data", password=key)
+        stats = get_cipher_cache_stats()
+        assert stats["misses"] == 2
+        assert stats["evictions"] == 1
+
+    def test_bounded_size(self):
+        cache = CipherCache(max_size=2)
+        keys = [_make_key() for _ in range(3)]
+        for key in keys:
+            cache.get(key)
+        stats = cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        cache.get(keys[0])
+        assert cache.stats()["misses"] == 4
+
+
+def _session_pair() -> tuple[SessionCipher, SessionCipher]:
+    key = Fernet.generate_key().decode()
+    client_nonce, server_nonce = b"c" * 16, b"s" * 16
+    return (
+        SessionCipher.derive(key, client_nonce, server_nonce, ROLE_CLIENT),
+        SessionCipher.derive(key, client_nonce, server_nonce, ROLE_SERVER),
+    )
+
+
+class TestSessionCipher:
+    def test_round_trip_both_directions(self):
+        client, server = _session_pair()
+        assert aes_decrypt(aes_encrypt(b"up", session=client), session=server) == b"up"
+        assert aes_decrypt(aes_encrypt(b"down", session=server), session=client) == b"down"
+
+    def test_smaller_than_fernet(self):
+        client, _ = _session_pair()
+        key = Fernet.generate_key().decode()
+        raw_fernet = base64.urlsafe_b64decode(aes_encrypt(b"x" * 100, key))
+        assert len(aes_encrypt(b"x" * 100, session=client)) < len(raw_fernet)
+
+    def test_replay_rejected_but_reordering_allowed(self):
+        client, server = _session_pair()
+        first = aes_encrypt(b"1", session=client)
+        second = aes_encrypt(b"2", session=client)
+        assert aes_decrypt(second, session=server) == b"2"
+        assert aes_decrypt(first, session=server) == b"1"
+        with pytest.raises(DecryptionError):
+            aes_decrypt(first, session=server)
+
+    def test_own_direction_cannot_be_reflected(self):
+        client, _ = _session_pair()
+        with pytest.raises(DecryptionError):
+            aes_decrypt(aes_encrypt(b"data", session=client), session=client)
+
+    def test_associated_data_is_authenticated(self):
+        client, server = _session_pair()
+        message = aes_encrypt(b"data", session=client, associated_data=b"hdr")
+        with pytest.raises(DecryptionError):
+            aes_decrypt(message, session=server, associated_data=b"HDR")
+
+    def test_derive_session_uses_configured_key(self):
+        key = Fernet.generate_key().decode()
+        aes_main(None, key)  # type: ignore[arg-type]
+        client = derive_session(b"c" * 16, b"s" * 16, ROLE_CLIENT)
+        server = derive_session(b"c" * 16, b"s" * 16, ROLE_SERVER, key)
+        assert aes_decrypt(aes_encrypt(b"ok", session=client), session=server) == b"ok"
+
+    def test_server_role_needs_account_key(self):
+        aes_main(None, Fernet.generate_key().decode())  # type: ignore[arg-type]
+        with pytest.raises(InvalidToken):
+            derive_session(b"c" * 16, b"s" * 16, ROLE_SERVER)
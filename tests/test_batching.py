@@ -0,0 +1,106 @@
+"""Tests for per-connection micro-batching of small packets."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from connect_core.websockets.batching import Coalescer, batchable, pack
+from connect_core.websockets.outbound import OutboundFrame
+
+
+def _frame(sid: int, persistent: bool = True) -> OutboundFrame:
+    return OutboundFrame(json.dumps({"type": "data_send", "sid": sid}).encode(), "data_send", persistent)
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.batches: list[list[OutboundFrame]] = []
+
+    async def __call__(self, batch: list[OutboundFrame]) -> None:
+        self.batches.append(batch)
+
+
+class TestPack:
+    def test_single_frame_is_unchanged(self):
+        frame = _frame(1)
+        assert pack([frame]) == frame.data
+
+    def test_frames_become_json_array(self):
+        assert [packet["sid"] for packet in json.loads(pack([_frame(1), _frame(2)]))] == [1, 2]
+
+    def test_batchable(self):
+        assert batchable({"type": "data_send", "payload": {"a": 1}}, 1024)
+        assert not batchable({"type": "ping", "payload": None}, 1024)
+        assert not batchable({"type": "login", "payload": {}}, 1024)
+        assert not batchable({"type": "file_send", "payload": {}}, 1024)
+        assert not batchable({"type": "data_fragment", "payload": {}}, 1024)
+        assert not batchable({"type": "data_send", "payload": {"a": "x" * 2048}}, 1024)
+
+
+class TestCoalescer:
+    @pytest.mark.asyncio
+    async def test_window_flushes_one_batch(self):
+        sink = _Sink()
+        coalescer = Coalescer(sink, window=0.01)
+
+        for sid in range(3):
+            coalescer.add(_frame(sid))
+        assert sink.batches == []
+        assert coalescer.depth == 3
+        await asyncio.sleep(0.03)
+
+        assert [[frame.data for frame in batch] for batch in sink.batches] == [
+            [_frame(sid).data for sid in range(3)]
+        ]
+        assert coalescer.stats() == {"pending": 0, "batches": 1, "packets": 3}
+
+    @pytest.mark.asyncio
+    async def test_packet_limit_flushes_early(self):
+        sink = _Sink()
+        coalescer = Coalescer(sink, window=10.0, max_packets=2)
+
+        for sid in range(5):
+            coalescer.add(_frame(sid))
+        await asyncio.sleep(0)
+
+        assert [len(batch) for batch in sink.batches] == [2, 2]
+        assert coalescer.depth == 1
+        coalescer.close()
+
+    @pytest.mark.asyncio
+    async def test_byte_limit_flushes_early(self):
+        sink = _Sink()
+        coalescer = Coalescer(sink, window=10.0, max_bytes=len(_frame(0).data) * 2)
+
+        for sid in range(2):
+            coalescer.add(_frame(sid))
+        await asyncio.sleep(0)
+
+        assert [len(batch) for batch in sink.batches] == [2]
+
+    @pytest.mark.asyncio
+    async def test_explicit_flush_cancels_timer(self):
+        sink = _Sink()
+        coalescer = Coalescer(sink, window=0.01)
+
+        coalescer.add(_frame(1))
+        await coalescer.flush()
+        await coalescer.flush()
+        await asyncio.sleep(0.03)
+
+        assert [len(batch) for batch in sink.batches] == [1]
+
+    @pytest.mark.asyncio
+    async def test_close_discards_pending(self):
+        sink = _Sink()
+        coalescer = Coalescer(sink, window=0.01)
+
+        coalescer.add(_frame(1))
+        coalescer.close()
+        await asyncio.sleep(0.03)
+
+        assert sink.batches == []
+        assert coalescer.depth == 0
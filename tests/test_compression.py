@@ -0,0 +1,108 @@
+"""Tests for negotiated payload compression."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from cryptography.fernet import Fernet
+
+from connect_core.websockets.compression import (
+    Compressor,
+    DecompressionError,
+    compress,
+    decompress,
+)
+from connect_core.websockets.data_packet import (
+    MIN_PROTOCOL_VERSION,
+    PROTOCOL_VERSION,
+    Capability,
+    local_capabilities,
+    negotiate_capabilities,
+    negotiate_protocol_version,
+)
+from connect_core.websockets.envelope import (
+    FLAG_COMPRESSED,
+    decode_envelope,
+    encode_envelope,
+)
+
+
+def _payload(size: int = 40) -> bytes:
+    players = [{"name": f"player{i}", "uuid": f"{i:032x}"} for i in range(size)]
+    return json.dumps({"type": "data_send", "payload": {"players": players}}).encode()
+
+
+class TestCompression:
+    def test_round_trip(self):
+        data = _payload()
+        assert decompress(compress(data)) == data
+        assert len(compress(data)) < len(data)
+
+    def test_bomb_guard(self):
+        with pytest.raises(DecompressionError):
+            decompress(compress(b"a" * 100_000), max_size=1024)
+
+    def test_corrupt_payload_rejected(self):
+        with pytest.raises(DecompressionError):
+            decompress(b"not zlib")
+
+    def test_threshold_and_stats(self):
+        compressor = Compressor(threshold=256)
+        small, small_compressed = compressor.maybe_compress(b'{"type": "ping"}', "ping")
+        large, large_compressed = compressor.maybe_compress(_payload(), "data_send")
+
+        assert not small_compressed and small == b'{"type": "ping"}'
+        assert large_compressed and decompress(large) == _payload()
+        stats = compressor.stats()
+        assert stats["ping"]["skipped"] == 1
+        assert stats["data_send"]["compressed"] == 1
+        assert stats["data_send"]["ratio"] < 1.0
+
+    def test_envelope_flag_decompresses(self):
+        key = Fernet.generate_key().decode()
+        frame = encode_envelope(compress(_payload()), key, FLAG_COMPRESSED)
+        assert decode_envelope(frame, key) == (FLAG_COMPRESSED, _payload())
+
+    def test_capability_can_be_disabled(self):
+        class _Config:
+            compression_enabled = False
+
+        assert Capability.COMPRESSION.value not in local_capabilities(_Config())
+        assert Capability.BINARY_ENVELOPE.value in local_capabilities(_Config())
+
+    def test_envelope_capabilities_require_binary_envelope(self):
+        assert negotiate_capabilities(["zlib_v1", "aead_aes256gcm_v1"]) == []
+        assert negotiate_capabilities(
+            ["binary_envelope", "aead_aes256gcm_v1"]
+        ) == ["aead_aes256gcm_v1", "binary_envelope"]
+
+    def test_transport_integrity_does_not_need_envelope(self):
+        assert negotiate_capabilities(["transport_integrity_v1"]) == ["transport_integrity_v1"]
+
+
+class TestProtocolVersion:
+    def test_legacy_client_pins_single_version(self):
+        assert negotiate_protocol_version({"protocol_version": PROTOCOL_VERSION}) == PROTOCOL_VERSION
+        assert negotiate_protocol_version({"protocol_version": PROTOCOL_VERSION + 1}) is None
+
+    def test_newer_client_falls_back_to_common_version(self):
+        payload = {
+            "protocol_version": PROTOCOL_VERSION + 3,
+            "min_protocol_version": MIN_PROTOCOL_VERSION,
+        }
+        assert negotiate_protocol_version(payload) == PROTOCOL_VERSION
+
+    def test_disjoint_ranges_are_rejected(self):
+        payload = {
+            "protocol_version": PROTOCOL_VERSION + 3,
+            "min_protocol_version": PROTOCOL_VERSION + 1,
+        }
+        assert negotiate_protocol_version(payload) is None
+
+    @pytest.mark.parametrize(
+        "payload",
+        [None, {}, {"protocol_version": "1"}, {"protocol_version": True}, {"protocol_version": 1, "min_protocol_version": 1.0}],
+    )
+    def test_malformed_versions_are_rejected(self, payload):
+        assert negotiate_protocol_version(payload) is None
@@ -1,4 +1,4 @@
-"""Tests for data_packet: DataModel, PacketType, PacketStatus, StatusRegistry."""
+"""Tests for data_packet: DataModel, Packet, PacketType, PacketStatus, StatusRegistry."""
 
 from __future__ import annotations
 
@@ -11,7 +11,9 @@ from pydantic import ValidationError
 from connect_core.websockets.data_packet import (
     PROTOCOL_VERSION,
     DataModel,
+    Packet,
     PacketStatus,
+    PacketValidationError,
     PacketType,
     StatusRegistry,
 )
@@ -116,3 +118,83 @@ class TestDataModel:
     def test_missing_required_field_raises(self):
         with pytest.raises(ValidationError):
             DataModel(type=PacketType.PING.value, sid=1)
+
+
+class TestPacket:
+    def _base_data(self, **overrides) -> Dict:
+        data = {
+            "type": PacketType.DATA_SEND.value,
+            "status": PacketStatus.REQUEST.value,
+            "sid": 1,
+            "to": ["server_a", "plugin_x"],
+            "from": ["client_b", "plugin_y"],
+            "payload": {"key": "value"},
+            "timestamp": 1760000000.5,
+        }
+        data.update(overrides)
+        return data
+
+    def test_dump_matches_model_dump(self):
+        data = self._base_data()
+        assert Packet.validate(dict(data)).dump() == DataModel.model_validate(
+            dict(data)
+        ).model_dump(by_alias=True)
+
+    def test_dump_key_order_matches_model(self):
+        packet = Packet.validate(self._base_data())
+        model = DataModel.model_validate(self._base_data())
+        assert list(packet.dump()) == list(model.model_dump(by_alias=True))
+
+    def test_lax_coercion_matches_model(self):
+        data = self._base_data(sid="3", timestamp=5)
+        packet = Packet.validate(dict(data))
+        assert packet.sid == 3
+        assert packet.timestamp == 5.0
+        assert Packet.validate(self._base_data(sid=4.0)).sid == 4
+
+    def test_checksum_generated_once(self):
+        packet = Packet.validate(self._base_data())
+        assert packet.checksum == DataModel(**self._base_data()).checksum
+        assert Packet.validate(self._base_data(payload=None)).checksum is None
+
+    def test_extra_keys_ignored(self):
+        packet = Packet.validate(self._base_data(sids={"a": 1}))
+        assert "sids" not in packet.dump()
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [
+            {"type": "no_such_type"},
+            {"sid": "abc"},
+            {"sid": 1.5},
+            {"to": ["only_one"]},
+            {"from": "client_b"},
+            {"payload": ["not", "a", "dict"]},
+            {"timestamp": None},
+            {"status": 3},
+        ],
+    )
+    def test_invalid_fields_raise(self, overrides):
+        with pytest.raises(PacketValidationError):
+            Packet.validate(self._base_data(**overrides))
+        with pytest.raises(ValidationError):
+            DataModel.model_validate(self._base_data(**overrides))
+
+    def test_missing_field_raises(self):
+        data = self._base_data()
+        del data["to"]
+        with pytest.raises(PacketValidationError, match="to"):
+            Packet.validate(data)
+
+    def test_model_round_trip(self):
+        packet = Packet.validate(self._base_data())
+        model = packet.to_model()
+        assert isinstance(model, DataModel)
+        assert model.from_ == ("client_b", "plugin_y")
+        assert model.model_dump(by_alias=True) == packet.dump()
+        assert Packet.from_model(model) == packet
+
+    def test_slots(self):
+        packet = Packet.validate(self._base_data())
+        with pytest.raises(AttributeError):
+            packet.extra = 1  # type: ignore[attr-defined]
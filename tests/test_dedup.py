@@ -0,0 +1,78 @@
+"""Tests for receiver-side duplicate suppression."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from connect_core.websockets.dedup import DEFAULT_DEDUP_WINDOW, DuplicateFilter, SidWindow, filter_for
+
+
+class TestSidWindow:
+    def test_in_order_and_repeated_sids(self):
+        window = SidWindow(8)
+        assert [window.mark(sid) for sid in (1, 2, 3)] == [True, True, True]
+        assert window.mark(2) is False
+        assert window.mark(3) is False
+
+    def test_out_of_order_sids_inside_window(self):
+        window = SidWindow(8)
+        assert window.mark(5) is True
+        assert window.mark(3) is True
+        assert window.mark(3) is False
+        assert window.mark(4) is True
+
+    def test_sids_older_than_window_are_unknown(self):
+        window = SidWindow(4)
+        window.mark(1)
+        window.mark(10)
+        assert window.mark(1) is None
+        assert window.mark(6) is None
+        assert window.mark(7) is True
+
+    def test_large_jump_resets_bitmap(self):
+        window = SidWindow(4)
+        window.mark(1)
+        window.mark(2)
+        assert window.mark(100) is True
+        assert window.bits == 1
+        assert window.mark(99) is True
+
+    def test_unmark_allows_redelivery(self):
+        window = SidWindow(8)
+        window.mark(1)
+        window.mark(2)
+        window.unmark(1)
+        assert window.mark(1) is True
+        assert window.mark(2) is False
+
+
+class TestDuplicateFilter:
+    def test_sources_are_independent(self):
+        duplicates = DuplicateFilter(16)
+        assert duplicates.first_seen("alpha", 1)
+        assert duplicates.first_seen("beta", 1)
+        assert not duplicates.first_seen("alpha", 1)
+        assert duplicates.stats() == {"sources": 2, "accepted": 2, "duplicates": 1, "too_old": 0}
+
+    def test_too_old_sids_are_delivered(self):
+        duplicates = DuplicateFilter(2)
+        duplicates.first_seen("alpha", 1)
+        duplicates.first_seen("alpha", 5)
+        assert duplicates.first_seen("alpha", 1)
+        assert duplicates.stats()["too_old"] == 1
+
+    def test_forget_and_discard(self):
+        duplicates = DuplicateFilter(16)
+        duplicates.first_seen("alpha", 1)
+        duplicates.first_seen("alpha", 2)
+        duplicates.discard("alpha", 2)
+        assert duplicates.first_seen("alpha", 2)
+        duplicates.forget("alpha")
+        assert duplicates.first_seen("alpha", 1)
+        duplicates.clear()
+        assert duplicates.stats()["sources"] == 0
+
+    def test_filter_for_reads_config(self):
+        assert filter_for(SimpleNamespace(dedup_window_size=64)).size == 64
+        assert filter_for(SimpleNamespace(dedup_window_size=0)).size == DEFAULT_DEDUP_WINDOW
+        assert filter_for(object()).size == DEFAULT_DEDUP_WINDOW
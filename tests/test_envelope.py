@@ -0,0 +1,67 @@
+"""Tests for the binary wire envelope."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from cryptography.fernet import Fernet
+
+from connect_core.aes_encrypt import aes_encrypt
+from connect_core.websockets.envelope import (
+    FRAME_ENVELOPE,
+    FRAME_JSON,
+    FRAME_TOKEN,
+    HEADER,
+    MAGIC,
+    EnvelopeError,
+    classify_frame,
+    decode_envelope,
+    encode_envelope,
+    is_envelope,
+    unpack_frame,
+)
+
+
+@pytest.fixture()
+def key() -> str:
+    return Fernet.generate_key().decode()
+
+
+class TestEnvelope:
+    def test_round_trip(self, key: str):
+        frame = encode_envelope(b'{"type": "ping"}', key)
+        assert frame[0] == MAGIC
+        assert is_envelope(frame)
+        assert decode_envelope(frame, key) == (0, b'{"type": "ping"}')
+
+    def test_smaller_than_json_text_frame(self, key: str):
+        plaintext = json.dumps({"type": "data_send", "payload": {"msg": "hi"}}).encode()
+        legacy = json.dumps(
+            {"account": "abcde", "data": aes_encrypt(plaintext, key).decode()}
+        ).encode()
+        assert len(encode_envelope(plaintext, key)) < len(legacy)
+
+    def test_legacy_frames_are_not_envelopes(self, key: str):
+        assert not is_envelope(aes_encrypt(b"data", key))
+        assert not is_envelope('{"account": "-----"}')
+        assert not is_envelope(b"")
+
+    def test_unknown_version_rejected(self, key: str):
+        frame = bytearray(encode_envelope(b"data", key))
+        frame[1] = 99
+        with pytest.raises(EnvelopeError):
+            unpack_frame(bytes(frame))
+
+    def test_tampered_frame_rejected(self, key: str):
+        frame = bytearray(encode_envelope(b"data", key))
+        frame[HEADER.size + 20] ^= 0xFF
+        with pytest.raises(ValueError):
+            decode_envelope(bytes(frame), key)
+
+    def test_classify_frame(self, key: str):
+        assert classify_frame(encode_envelope(b"data", key)) == FRAME_ENVELOPE
+        assert classify_frame(aes_encrypt(b"data", key)) == FRAME_TOKEN
+        assert classify_frame(aes_encrypt(b"data", key).decode()) == FRAME_TOKEN
+        assert classify_frame(b'{"type": "ping"}') == FRAME_JSON
+        assert classify_frame('{"type": "ping"}') == FRAME_JSON
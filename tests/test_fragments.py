@@ -0,0 +1,139 @@
+"""Tests for DATA_SEND payload fragmentation and reassembly."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from connect_core.websockets.fragments import (
+    FragmentError,
+    Reassembler,
+    oversized,
+    split,
+)
+
+
+def _payload() -> dict:
+    return {"rows": [{"id": i, "name": f"玩家{i}"} for i in range(200)]}
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSplit:
+    def test_fragments_cover_text(self):
+        text = json.dumps(_payload(), ensure_ascii=False)
+        parts = list(split(text, 1000))
+
+        assert len(parts) == -(-len(text) // 1000)
+        assert {part["id"] for part in parts} == {parts[0]["id"]}
+        assert [part["index"] for part in parts] == list(range(len(parts)))
+        assert all(part["count"] == len(parts) and part["size"] == len(text) for part in parts)
+        assert "".join(part["data"] for part in parts) == text
+
+    def test_oversized(self):
+        assert oversized(_payload(), 1000)
+        assert not oversized({"a": 1}, 1000)
+        assert not oversized(_payload(), 0)
+
+
+class TestReassembler:
+    def test_round_trip_out_of_order(self):
+        text = json.dumps(_payload())
+        parts = list(split(text, 500))
+        reassembler = Reassembler()
+
+        results = [reassembler.add("alpha", part) for part in reversed(parts)]
+
+        assert results[:-1] == [None] * (len(parts) - 1)
+        assert results[-1] == _payload()
+        assert reassembler.stats() == {
+            "pending": 0,
+            "buffered": 0,
+            "completed": 1,
+            "expired": 0,
+            "rejected": 0,
+        }
+
+    def test_duplicate_fragment_is_ignored(self):
+        parts = list(split(json.dumps(_payload()), 500))
+        reassembler = Reassembler()
+
+        reassembler.add("alpha", parts[0])
+        reassembler.add("alpha", parts[0])
+
+        assert reassembler.pending == 1
+        for part in parts[1:-1]:
+            assert reassembler.add("alpha", part) is None
+        assert reassembler.add("alpha", parts[-1]) == _payload()
+
+    def test_transfers_are_scoped_by_source(self):
+        parts = list(split(json.dumps(_payload()), 500))
+        reassembler = Reassembler()
+
+        for part in parts[:-1]:
+            reassembler.add("alpha", part)
+        assert reassembler.add("beta", parts[-1]) is None
+        assert reassembler.pending == 2
+
+        reassembler.drop_source("beta")
+        assert reassembler.add("alpha", parts[-1]) == _payload()
+        assert reassembler.buffered == 0
+
+    def test_buffer_limit_rejects_new_transfer(self):
+        parts = list(split(json.dumps(_payload()), 500))
+        reassembler = Reassembler(max_bytes=parts[0]["size"] - 1)
+
+        with pytest.raises(FragmentError):
+            reassembler.add("alpha", parts[0])
+        assert reassembler.pending == 0
+        assert reassembler.rejected == 1
+
+    def test_stale_transfer_expires(self):
+        clock = _Clock()
+        parts = list(split(json.dumps(_payload()), 500))
+        reassembler = Reassembler(timeout=10.0, clock=clock)
+
+        reassembler.add("alpha", parts[0])
+        clock.now = 11.0
+
+        assert reassembler.expire() == 1
+        assert reassembler.buffered == 0
+        assert reassembler.add("alpha", parts[1]) is None
+        assert reassembler.pending == 1
+
+    @pytest.mark.parametrize(
+        "fragment",
+        [
+            None,
+            {"id": "", "index": 0, "count": 1, "size": 1, "data": "x"},
+            {"id": "t", "index": 2, "count": 2, "size": 10, "data": "x"},
+            {"id": "t", "index": 0, "count": 11, "size": 10, "data": "x"},
+            {"id": "t", "index": 0, "count": 1, "size": 1, "data": 1},
+            {"id": "t", "index": True, "count": 1, "size": 1, "data": "x"},
+            {"id": "t", "index": 0, "size": 1, "data": "x"},
+            {"id": "t", "index": 0, "count": 1, "size": "1", "data": "x"},
+        ],
+    )
+    def test_malformed_fragment(self, fragment):
+        with pytest.raises(FragmentError):
+            Reassembler().add("alpha", fragment)
+
+    def test_fragment_exceeding_declared_size(self):
+        reassembler = Reassembler()
+        reassembler.add("alpha", {"id": "t", "index": 0, "count": 2, "size": 3, "data": "ab"})
+
+        with pytest.raises(FragmentError):
+            reassembler.add("alpha", {"id": "t", "index": 1, "count": 2, "size": 3, "data": "cd"})
+        assert reassembler.pending == 0
+        assert reassembler.buffered == 0
+
+    def test_invalid_json_is_rejected(self):
+        with pytest.raises(FragmentError):
+            Reassembler().add("alpha", {"id": "t", "index": 0, "count": 1, "size": 3, "data": "[1]"})
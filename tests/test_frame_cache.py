@@ -0,0 +1,33 @@
+"""Tests for the encoded-frame cache."""
+
+from __future__ import annotations
+
+from connect_core.websockets.frame_cache import FrameCache
+
+
+class TestFrameCache:
+    def test_hit_requires_same_key(self):
+        cache = FrameCache(1024)
+        cache.put("alpha", ("data_send", 1), "key-1", b"frame")
+        assert cache.get("alpha", ("data_send", 1), "key-1") == b"frame"
+        assert cache.get("alpha", ("data_send", 1), "key-2") is None
+        assert cache.get("alpha", ("data_send", 1), "key-1") is None
+
+    def test_bounded_by_bytes(self):
+        cache = FrameCache(10)
+        cache.put("alpha", 1, "k", b"12345")
+        cache.put("alpha", 2, "k", b"12345")
+        cache.put("alpha", 3, "k", b"12345")
+        assert cache.get("alpha", 1, "k") is None
+        assert cache.stats()["bytes"] == 10
+        cache.put("alpha", 4, "k", b"x" * 11)
+        assert cache.get("alpha", 4, "k") is None
+
+    def test_evict_account(self):
+        cache = FrameCache(1024)
+        cache.put("alpha", 1, "k", b"a")
+        cache.put("beta", 1, "k", b"b")
+        cache.evict_account("alpha")
+        assert cache.get("alpha", 1, "k") is None
+        assert cache.get("beta", 1, "k") == b"b"
+        assert cache.stats()["entries"] == 1
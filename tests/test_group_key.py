@@ -0,0 +1,50 @@
+"""Tests for the rotating broadcast group key."""
+
+from __future__ import annotations
+
+import pytest
+
+from connect_core.websockets.envelope import (
+    FLAG_GROUP,
+    EnvelopeError,
+    decode_envelope,
+    encode_group_envelope,
+)
+from connect_core.websockets.group_key import GroupKeyring, parse_group_key
+
+
+class TestGroupKeyring:
+    def test_rotation_advances_epoch(self):
+        keyring = GroupKeyring()
+        first = keyring.current()
+        second = keyring.rotate()
+        assert first[0] == 1 and second[0] == 2
+        assert first[1] != second[1]
+        assert keyring.export() == {"epoch": 2, "key": second[1]}
+
+    def test_install_retains_previous_epoch(self):
+        hub, member = GroupKeyring(), GroupKeyring()
+        for _ in range(3):
+            member.install(*hub.rotate())
+        assert member.get(3) is not None and member.get(2) is not None
+        assert member.get(1) is None
+
+    def test_parse_group_key(self):
+        assert parse_group_key({"epoch": 3, "key": "abc"}) == (3, "abc")
+        assert parse_group_key({"epoch": 0, "key": "abc"}) is None
+        assert parse_group_key(None) is None
+
+
+class TestGroupEnvelope:
+    def test_round_trip(self):
+        keyring = GroupKeyring()
+        frame = encode_group_envelope(b"hello", *keyring.current())
+        assert decode_envelope(frame, group_keys=keyring) == (FLAG_GROUP, b"hello")
+
+    def test_unknown_epoch_rejected(self):
+        hub, member = GroupKeyring(), GroupKeyring()
+        frame = encode_group_envelope(b"hello", *hub.current())
+        with pytest.raises(EnvelopeError):
+            decode_envelope(frame, group_keys=member)
+        with pytest.raises(EnvelopeError):
+            decode_envelope(frame)
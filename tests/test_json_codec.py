@@ -0,0 +1,54 @@
+"""Tests for the pluggable JSON codec."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from connect_core.tools import json_codec
+from connect_core.tools.common import generate_md5_checksum
+from connect_core.websockets.data_packet import PacketType
+
+
+@pytest.fixture(params=json_codec.available_backends())
+def backend(request: pytest.FixtureRequest):
+    previous = json_codec.backend_name()
+    json_codec.use_backend(request.param)
+    yield request.param
+    json_codec.use_backend(previous)
+
+
+class TestJsonCodec:
+    def test_round_trip(self, backend: str):
+        packet = {
+            "type": PacketType.DATA_SEND,
+            "to": ("all", "chat"),
+            "payload": {"message": "你好", "count": 3, "ratio": 0.5},
+        }
+        decoded = json_codec.loads(json_codec.dumps(packet))
+        assert decoded == {
+            "type": "data_send",
+            "to": ["all", "chat"],
+            "payload": {"message": "你好", "count": 3, "ratio": 0.5},
+        }
+
+    def test_values_unsupported_by_fast_backend_fall_back(self, backend: str):
+        assert json_codec.loads(json_codec.dumps({"big": 1 << 70})) == {"big": 1 << 70}
+        assert json_codec.loads(json_codec.dumps({1: "a"})) == {"1": "a"}
+
+    def test_invalid_input_raises_json_error(self, backend: str):
+        with pytest.raises(json.JSONDecodeError):
+            json_codec.loads(b"{not json")
+
+    def test_canonical_output_matches_stdlib(self, backend: str):
+        payload = {"b": [1, 2.5, None], "a": "ü", "c": {"z": True, "y": False}}
+        expected = json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        assert json_codec.canonical_dumps(payload) == expected
+        assert generate_md5_checksum(payload) == generate_md5_checksum(
+            json.loads(json_codec.dumps(payload))
+        )
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            json_codec.use_backend("nope")
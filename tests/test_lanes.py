@@ -0,0 +1,126 @@
+"""Tests for priority lanes and the weighted write scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from connect_core.websockets.data_packet import PacketType
+from connect_core.websockets.lanes import (
+    PRIORITY_BULK,
+    PRIORITY_CONTROL,
+    PRIORITY_INTERACTIVE,
+    WeightedLanes,
+    WriteGate,
+    configured_weights,
+    priority_of,
+    validate,
+)
+
+
+class TestClassification:
+    def test_packet_types(self):
+        assert priority_of(PacketType.PING) == PRIORITY_CONTROL
+        assert priority_of("data_sendok") == PRIORITY_CONTROL
+        assert priority_of("data_send") == PRIORITY_INTERACTIVE
+        assert priority_of("custom_type") == PRIORITY_INTERACTIVE
+        assert priority_of(PacketType.FILE_SENDING) == PRIORITY_BULK
+        assert priority_of("data_fragment") == PRIORITY_BULK
+
+    def test_requested_priority_wins(self):
+        assert priority_of("data_send", PRIORITY_BULK) == PRIORITY_BULK
+        assert priority_of("data_send", None) == PRIORITY_INTERACTIVE
+
+    def test_validate(self):
+        assert validate(None) is None
+        assert validate("bulk") == "bulk"
+        with pytest.raises(ValueError):
+            validate("highest")
+
+    def test_configured_weights(self):
+        config = SimpleNamespace(priority_weights={"bulk": 2, "control": 0, "other": 5})
+        assert configured_weights(config) == {"control": 8, "interactive": 4, "bulk": 2}
+        assert configured_weights(object()) == {"control": 8, "interactive": 4, "bulk": 1}
+
+
+class TestWeightedLanes:
+    def test_weighted_round_robin(self):
+        lanes: WeightedLanes[str] = WeightedLanes({"control": 2, "interactive": 2, "bulk": 1})
+        for index in range(4):
+            lanes.append(f"b{index}", PRIORITY_BULK)
+            lanes.append(f"i{index}", PRIORITY_INTERACTIVE)
+            lanes.append(f"c{index}", PRIORITY_CONTROL)
+
+        order = [lanes.popleft() for _ in range(len(lanes))]
+
+        assert order == [
+            "c0", "c1", "i0", "i1", "b0",
+            "c2", "c3", "i2", "i3", "b1",
+            "b2", "b3",
+        ]
+
+    def test_single_lane_is_not_throttled(self):
+        lanes: WeightedLanes[int] = WeightedLanes()
+        for index in range(5):
+            lanes.append(index, PRIORITY_BULK)
+        assert [lanes.popleft() for _ in range(5)] == list(range(5))
+        with pytest.raises(IndexError):
+            lanes.popleft()
+
+    def test_iteration_starts_with_lowest_priority(self):
+        lanes: WeightedLanes[str] = WeightedLanes()
+        lanes.append("c", PRIORITY_CONTROL)
+        lanes.append("b", PRIORITY_BULK)
+        lanes.append("i", PRIORITY_INTERACTIVE)
+
+        assert list(lanes) == ["b", "i", "c"]
+        lanes.remove("i")
+        assert lanes.depths() == {"control": 1, "interactive": 0, "bulk": 1}
+
+
+class TestWriteGate:
+    @pytest.mark.asyncio
+    async def test_uncontended_acquire_is_immediate(self):
+        gate = WriteGate()
+        async with gate.slot(PRIORITY_BULK):
+            assert gate.stats()["busy"]
+        assert not gate.stats()["busy"]
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_released_by_priority(self):
+        gate = WriteGate()
+        order: list[str] = []
+
+        async def write(name: str, lane: str) -> None:
+            async with gate.slot(lane):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await gate.acquire(PRIORITY_BULK)
+        tasks = [
+            asyncio.ensure_future(write("bulk", PRIORITY_BULK)),
+            asyncio.ensure_future(write("chat", PRIORITY_INTERACTIVE)),
+            asyncio.ensure_future(write("ping", PRIORITY_CONTROL)),
+        ]
+        await asyncio.sleep(0)
+        gate.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["ping", "chat", "bulk"]
+        assert gate.stats()["waited"] == {"control": 1, "interactive": 1, "bulk": 1}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_skipped(self):
+        gate = WriteGate()
+        await gate.acquire(PRIORITY_BULK)
+        waiter = asyncio.ensure_future(gate.acquire(PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+        gate.release()
+
+        assert not gate.stats()["busy"]
+        assert gate.stats()["waiting"] == {"control": 0, "interactive": 0, "bulk": 0}
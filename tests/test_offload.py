@@ -0,0 +1,62 @@
+"""Tests for size-based codec offloading."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from connect_core.websockets.offload import CodecPool, estimate, exceeds
+
+
+class TestExceeds:
+    def test_small_packet(self):
+        assert not exceeds({"type": "ping", "payload": None}, 1024)
+
+    def test_large_nested_string(self):
+        assert exceeds({"payload": {"chunk": "x" * 2048}}, 1024)
+
+    def test_estimate_stops_past_limit(self):
+        assert estimate({"chunk": "x" * 100}, 1024) == 2 + len("chunk") + 100
+        assert 1024 < estimate(["x" * 2048, "y" * 2048], 1024) < 4096
+
+
+class TestCodecPool:
+    @pytest.mark.asyncio
+    async def test_small_frames_stay_inline(self):
+        pool = CodecPool(workers=2, threshold=1024)
+        thread = await pool.run(10, threading.current_thread)
+        assert thread is threading.current_thread()
+        assert pool.stats()["inline"] == 1
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_large_frames_run_in_worker(self):
+        pool = CodecPool(workers=2, threshold=1024)
+        thread = await pool.run(4096, threading.current_thread)
+        packet_thread = await pool.run_for_packet(
+            {"payload": "x" * 4096}, threading.current_thread
+        )
+        assert thread is not threading.current_thread()
+        assert packet_thread is not threading.current_thread()
+        assert pool.stats()["offloaded"] == 2
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_zero_workers_disables_offload(self):
+        pool = CodecPool(workers=0, threshold=0)
+        assert await pool.run(1 << 20, threading.current_thread) is threading.current_thread()
+
+    @pytest.mark.asyncio
+    async def test_map_keeps_order_and_isolates_failures(self):
+        pool = CodecPool(workers=3, threshold=0)
+
+        def _invert(value: int) -> float:
+            return 1 / value
+
+        results = await pool.map(_invert, [(1,), (0,), (2,), (4,)])
+
+        assert results[0] == 1.0 and results[2:] == [0.5, 0.25]
+        assert isinstance(results[1], ZeroDivisionError)
+        assert pool.stats()["offloaded"] == 2
+        pool.shutdown()
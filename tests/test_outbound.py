@@ -0,0 +1,116 @@
+"""Tests for the per-connection OutboundQueue."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from connect_core.websockets.outbound import (
+    OVERFLOW,
+    QUEUED,
+    OutboundFrame,
+    OutboundQueue,
+)
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.frames: list[bytes | str] = []
+        self.gate = asyncio.Event()
+
+    async def send(self, data: bytes | str) -> None:
+        await self.gate.wait()
+        self.frames.append(data)
+
+
+class TestOutboundQueue:
+    @pytest.mark.asyncio
+    async def test_frames_are_written_in_order(self):
+        sink = _Sink()
+        sink.gate.set()
+        queue = OutboundQueue(sink.send)
+        for index in range(3):
+            assert queue.put(OutboundFrame(f"f{index}".encode(), "data_send", True)) == QUEUED
+        await asyncio.sleep(0.01)
+        assert sink.frames == [b"f0", b"f1", b"f2"]
+        assert queue.stats()["sent"] == 3
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_persistent_frames(self):
+        sink = _Sink()
+        queue = OutboundQueue(sink.send, max_packets=2, policy="drop_oldest")
+        queue.put(OutboundFrame(b"ping", "ping", False))
+        queue.put(OutboundFrame(b"data-1", "data_send", True))
+        assert queue.put(OutboundFrame(b"data-2", "data_send", True)) == QUEUED
+        assert queue.depth == 2
+        assert queue.dropped == 1
+
+        sink.gate.set()
+        await asyncio.sleep(0.01)
+        assert sink.frames == [b"data-1", b"data-2"]
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_byte_limit_triggers_overflow_callback(self):
+        sink = _Sink()
+        evicted: list[bool] = []
+
+        async def _on_overflow() -> None:
+            evicted.append(True)
+
+        queue = OutboundQueue(sink.send, max_bytes=8, on_overflow=_on_overflow)
+        queue.put(OutboundFrame(b"12345", "data_send", True))
+        assert queue.put(OutboundFrame(b"67890", "data_send", True)) == OVERFLOW
+        await asyncio.sleep(0)
+        assert evicted == [True]
+        assert queue.depth == 0
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_wait_for_room_resumes_once_drained(self):
+        sink = _Sink()
+        queue = OutboundQueue(sink.send)
+        for _ in range(3):
+            queue.put(OutboundFrame(b"12345", "data_fragment", True))
+
+        waiter = asyncio.ensure_future(queue.wait_for_room(5))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        sink.gate.set()
+        await asyncio.wait_for(waiter, 1.0)
+        assert queue.queued_bytes <= 5
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_interactive_frames_overtake_queued_bulk(self):
+        sink = _Sink()
+        queue = OutboundQueue(sink.send)
+        for index in range(3):
+            queue.put(OutboundFrame(f"chunk-{index}".encode(), "file_sending", True, "bulk"))
+        await asyncio.sleep(0)
+        queue.put(OutboundFrame(b"chat", "data_send", True, "interactive"))
+        queue.put(OutboundFrame(b"pong", "pong", False, "control"))
+        assert queue.stats()["lanes"] == {"control": 1, "interactive": 1, "bulk": 2}
+
+        sink.gate.set()
+        await asyncio.sleep(0.01)
+        assert sink.frames == [b"chunk-0", b"pong", b"chat", b"chunk-1", b"chunk-2"]
+        await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_sheds_bulk_first(self):
+        sink = _Sink()
+        queue = OutboundQueue(sink.send, max_packets=2, policy="drop_oldest")
+        queue.put(OutboundFrame(b"ping", "ping", False, "control"))
+        queue.put(OutboundFrame(b"chunk", "data_send", False, "bulk"))
+        await asyncio.sleep(0)
+        queue.put(OutboundFrame(b"late", "data_send", False, "bulk"))
+        queue.put(OutboundFrame(b"pong", "pong", False, "control"))
+
+        sink.gate.set()
+        await asyncio.sleep(0.01)
+        assert sink.frames == [b"ping", b"pong", b"late"]
+        await queue.close()
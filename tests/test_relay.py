@@ -0,0 +1,60 @@
+"""Tests for the hub relay payload passthrough."""
+
+from __future__ import annotations
+
+import json
+
+from connect_core.websockets.relay import (
+    SHARE_MIN_BYTES,
+    RawPayload,
+    dumps_packet,
+    freeze,
+    materialize,
+    share,
+)
+
+
+class TestFreeze:
+    def test_keeps_value_and_bytes(self):
+        payload = {"msg": "你好", "n": 1}
+        raw = freeze(payload)
+
+        assert isinstance(raw, RawPayload)
+        assert raw.value is payload
+        assert json.loads(raw) == payload
+
+    def test_share_only_freezes_large_payloads(self):
+        small = {"msg": "hi"}
+        large = {"rows": ["x" * 64] * (SHARE_MIN_BYTES // 32)}
+
+        assert share(small) is small
+        assert isinstance(share(large), RawPayload)
+
+    def test_materialize(self):
+        payload = {"a": 1}
+        assert materialize(freeze(payload)) is payload
+        assert materialize(payload) is payload
+        assert materialize(None) is None
+
+
+class TestDumpsPacket:
+    def test_splices_serialized_payload(self):
+        raw = RawPayload(b'{"b": 1,  "a": 2}', {"b": 1, "a": 2})
+        packet = {"type": "data_send", "sid": 9, "to": ["gamma", "demo"], "payload": raw}
+
+        encoded = dumps_packet(packet)
+
+        assert encoded.endswith(b'"payload":{"b": 1,  "a": 2}}')
+        assert json.loads(encoded) == {
+            "type": "data_send",
+            "sid": 9,
+            "to": ["gamma", "demo"],
+            "payload": {"b": 1, "a": 2},
+        }
+
+    def test_plain_payload_uses_codec(self):
+        packet = {"sid": 1, "payload": {"a": 1}}
+        assert json.loads(dumps_packet(packet)) == packet
+
+    def test_payload_only_packet(self):
+        assert json.loads(dumps_packet({"payload": freeze({"a": 1})})) == {"payload": {"a": 1}}
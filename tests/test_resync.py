@@ -0,0 +1,114 @@
+"""Tests for bounded history replay on ping."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from connect_core.websockets.data_packet import Packet, PacketType
+from connect_core.websockets.resync import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_PACKETS,
+    ResyncPolicy,
+    gap_payload,
+    gap_range,
+    policy_for,
+)
+
+NOW = 1_000.0
+
+
+def _history(
+    *sids: int, type_: PacketType = PacketType.DATA_SEND, age: float = 1.0, size: int = 10
+) -> list[Packet]:
+    return [
+        Packet(type_, sid, ("alpha", "demo"), ("-----", "demo"), {"x": "y" * size}, timestamp=NOW - age)
+        for sid in sids
+    ]
+
+
+class TestPayload:
+    def test_round_trip(self):
+        assert gap_range(gap_payload((3, 9))) == (3, 9)
+        assert gap_payload(None) is None
+        assert gap_range(None) is None
+        assert gap_range({"gap": {"from": "3", "to": 9}}) is None
+
+
+class TestPlan:
+    def test_replays_everything_inside_window(self):
+        policy = ResyncPolicy()
+        plan = policy.plan(_history(1, 2, 3), NOW)
+        assert [packet.sid for packet in plan.packets] == [1, 2, 3]
+        assert plan.gap is None
+        assert policy.stats()["replayed"] == 3
+
+    def test_nothing_pending(self):
+        policy = ResyncPolicy()
+        assert policy.plan([], NOW).packets == []
+        assert policy.stats()["resyncs"] == 0
+
+    def test_too_many_packets_sends_gap_only(self):
+        policy = ResyncPolicy(max_packets=2)
+        plan = policy.plan(_history(4, 5, 6), NOW)
+        assert plan.packets == []
+        assert plan.gap == (4, 6)
+        assert policy.stats()["gaps"] == 1
+
+    def test_too_many_bytes_sends_gap_only(self):
+        policy = ResyncPolicy(max_bytes=100)
+        plan = policy.plan(_history(1, 2, size=60), NOW)
+        assert plan.packets == []
+        assert plan.gap == (1, 2)
+
+    def test_expired_packets_are_skipped(self):
+        policy = ResyncPolicy(max_age=60.0)
+        pending = sorted(
+            _history(1, 3, age=120.0) + _history(2, 4),
+            key=lambda packet: packet.sid,
+        )
+        plan = policy.plan(pending, NOW)
+        assert [packet.sid for packet in plan.packets] == [2, 4]
+        assert plan.expired == 2
+        assert plan.gap == (1, 3)
+
+    def test_expired_packets_do_not_count_against_window(self):
+        policy = ResyncPolicy(max_packets=1, max_age=60.0)
+        plan = policy.plan(_history(1, 2, age=120.0) + _history(3), NOW)
+        assert [packet.sid for packet in plan.packets] == [3]
+
+    def test_per_type_ttl(self):
+        policy = ResyncPolicy(ttls={"new_login": 10.0, "logined": 0.0})
+        pending = (
+            _history(1, type_=PacketType.LOGINED, age=0.5)
+            + _history(2, type_=PacketType.NEW_LOGIN, age=30.0)
+            + _history(3, type_=PacketType.NEW_LOGIN, age=5.0)
+        )
+        plan = policy.plan(pending, NOW)
+        assert [packet.sid for packet in plan.packets] == [3]
+        assert policy.ttl(PacketType.DATA_SEND) == policy.max_age
+
+    def test_ttl_never_exceeds_max_age(self):
+        policy = ResyncPolicy(max_age=30.0, ttls={"data_send": 600.0})
+        assert policy.ttl("data_send") == 30.0
+
+
+class TestPolicyFor:
+    def test_reads_config(self):
+        policy = policy_for(
+            SimpleNamespace(
+                resync_max_packets=8,
+                resync_max_bytes=4096,
+                resync_max_age=30.0,
+                resync_batch_size=4,
+                resync_ttls={"data_send": 5.0, "file_send": -1},
+            )
+        )
+        assert (policy.max_packets, policy.max_bytes, policy.max_age, policy.batch_size) == (8, 4096, 30.0, 4)
+        assert policy.ttl("data_send") == 5.0
+        assert policy.ttl("file_send") == 30.0
+        assert policy.ttl("logined") == 0.0
+
+    def test_invalid_values_fall_back(self):
+        policy = policy_for(SimpleNamespace(resync_max_packets=0, resync_batch_size=True))
+        assert policy.max_packets == DEFAULT_MAX_PACKETS
+        assert policy.batch_size == DEFAULT_BATCH_SIZE
@@ -0,0 +1,108 @@
+"""Tests for per-packet retransmission timers."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from connect_core.websockets.retransmit import (
+    DEFAULT_MAX_RETRIES,
+    INITIAL_TIMEOUT,
+    RetransmitTimers,
+    RttEstimator,
+    configured_limits,
+)
+
+
+class TestRttEstimator:
+    def test_initial_timeout_before_samples(self):
+        assert RttEstimator(0.5, 60.0).timeout == INITIAL_TIMEOUT
+
+    def test_timeout_follows_samples(self):
+        estimator = RttEstimator(0.01, 60.0)
+        estimator.sample(0.1)
+        assert estimator.timeout == pytest.approx(0.1 + 4 * 0.05)
+        for _ in range(50):
+            estimator.sample(0.1)
+        assert estimator.timeout == pytest.approx(0.1, abs=0.01)
+
+    def test_timeout_is_clamped(self):
+        estimator = RttEstimator(1.0, 2.0)
+        estimator.sample(0.001)
+        assert estimator.timeout == 1.0
+        estimator.sample(10.0)
+        assert estimator.timeout == 2.0
+
+    def test_configured_limits(self):
+        config = SimpleNamespace(retransmit_min_timeout=0.5, retransmit_max_timeout=10, retransmit_max_retries=2)
+        assert configured_limits(config) == (0.5, 10.0, 2)
+        assert configured_limits(SimpleNamespace(retransmit_max_retries=-1))[2] == DEFAULT_MAX_RETRIES
+
+
+class TestRetransmitTimers:
+    def test_deadlines_fire_in_order(self):
+        timers = RetransmitTimers(1.0, 60.0, 5)
+        assert timers.next_deadline() is None
+        assert timers.schedule(("alpha", 2), now=1.0)
+        assert not timers.schedule(("beta", 1), now=2.0)
+
+        assert timers.expire(now=3.9) == ([], [])
+        assert timers.expire(now=5.5) == ([("alpha", 2), ("beta", 1)], [])
+        assert timers.stats()["retransmits"] == 2
+
+    def test_backoff_doubles_until_retry_cap(self):
+        timers = RetransmitTimers(1.0, 60.0, 2)
+        timers.schedule(("alpha", 1), now=0.0)
+
+        now = timers.next_deadline()
+        assert now == INITIAL_TIMEOUT
+        assert timers.expire(now) == ([("alpha", 1)], [])
+        assert timers.next_deadline() == pytest.approx(now + INITIAL_TIMEOUT * 2)
+
+        now = timers.next_deadline()
+        assert timers.expire(now) == ([("alpha", 1)], [])
+        assert timers.next_deadline() == pytest.approx(now + INITIAL_TIMEOUT * 4)
+
+        assert timers.expire(timers.next_deadline()) == ([], [("alpha", 1)])
+        assert len(timers) == 0
+        assert timers.stats()["gave_up"] == 1
+
+    def test_ack_samples_rtt_only_for_first_transmission(self):
+        timers = RetransmitTimers(0.01, 60.0, 5)
+        timers.schedule(("alpha", 1), now=0.0)
+        timers.schedule(("alpha", 2), now=0.0)
+        timers.mark_resent(("alpha", 2))
+
+        assert timers.ack(("alpha", 1), now=0.2)
+        assert timers.ack(("alpha", 2), now=5.0)
+        assert not timers.ack(("alpha", 2), now=5.0)
+        assert timers.rtt("alpha").samples == 1
+        assert timers.stats()["peers"]["alpha"]["srtt_ms"] == pytest.approx(200.0)
+
+    def test_acked_and_rescheduled_entries_are_skipped(self):
+        timers = RetransmitTimers(1.0, 60.0, 5)
+        timers.schedule(("alpha", None), now=0.0)
+        timers.schedule(("alpha", None), now=2.0)
+        timers.schedule(("beta", 1), now=0.0)
+        timers.cancel(("beta", 1))
+
+        assert timers.expire(now=4.0) == ([], [])
+        assert timers.expire(now=5.0) == ([("alpha", None)], [])
+
+    def test_forget_drops_peer(self):
+        timers = RetransmitTimers(1.0, 60.0, 5)
+        timers.schedule(("alpha", 1), now=0.0)
+        timers.schedule(("beta", 1), now=0.0)
+
+        timers.forget("alpha")
+
+        assert ("alpha", 1) not in timers and ("beta", 1) in timers
+        assert "alpha" not in timers.stats()["peers"]
+
+    def test_heap_is_compacted(self):
+        timers = RetransmitTimers(1.0, 60.0, 5)
+        for sid in range(1000):
+            timers.schedule(("alpha", sid), now=float(sid))
+            timers.ack(("alpha", sid), now=float(sid))
+        assert len(timers._heap) < 200
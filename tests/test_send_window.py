@@ -0,0 +1,124 @@
+"""Tests for the per-peer window of unacknowledged data_send packets."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from connect_core.websockets.send_window import (
+    DEFAULT_SEND_WINDOW,
+    SendWindow,
+    ack_payload,
+    acked_sid,
+    configured_size,
+)
+
+
+def _packet(sid: int) -> dict:
+    return {"-----": {"type": "data_send", "sid": sid}}
+
+
+class TestAckPayload:
+    def test_round_trip(self):
+        assert ack_payload(None) is None
+        assert acked_sid(ack_payload(7)) == 7
+
+    def test_legacy_and_malformed_payloads(self):
+        assert acked_sid(None) is None
+        assert acked_sid({}) is None
+        assert acked_sid({"sid": "7"}) is None
+        assert acked_sid({"sid": True}) is None
+        assert acked_sid([7]) is None
+
+    def test_configured_size(self):
+        assert configured_size(SimpleNamespace(send_window_size=4)) == 4
+        assert configured_size(SimpleNamespace(send_window_size=0)) == DEFAULT_SEND_WINDOW
+        assert configured_size(object()) == DEFAULT_SEND_WINDOW
+
+
+class TestSendWindow:
+    def test_ack_removes_only_that_sid(self):
+        window = SendWindow(4)
+        for sid in range(3):
+            window.track(sid, _packet(sid))
+
+        assert window.ack(1)
+        assert not window.ack(1)
+        assert [sid for sid, _ in window.unacked()] == [0, 2]
+        assert window.stats() == {
+            "in_flight": 2,
+            "size": 4,
+            "tracked": 3,
+            "acked": 1,
+            "retransmitted": 0,
+            "evicted": 0,
+        }
+
+    def test_full_window_evicts_oldest(self):
+        window = SendWindow(2)
+        window.track(1, _packet(1))
+        window.track(2, _packet(2))
+
+        assert window.full
+        assert window.track(3, _packet(3)) == (1, _packet(1))
+        assert 1 not in window and 3 in window
+        assert window.stats()["evicted"] == 1
+
+    def test_retransmissions_are_counted(self):
+        window = SendWindow(4)
+        window.track(1, _packet(1))
+        window.track(2, _packet(2))
+
+        assert window.get(2) == _packet(2)
+        assert window.get(5) is None
+        assert window.resend_all() == [_packet(1), _packet(2)]
+        assert window.stats()["retransmitted"] == 3
+
+    @pytest.mark.asyncio
+    async def test_wait_for_room_blocks_until_ack(self):
+        window = SendWindow(1)
+        window.track(1, _packet(1))
+        waiter = asyncio.ensure_future(window.wait_for_room())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        window.ack(1)
+        await asyncio.wait_for(waiter, 0.1)
+
+    @pytest.mark.asyncio
+    async def test_clear_releases_waiters(self):
+        window = SendWindow(1)
+        window.track(1, _packet(1))
+        waiter = asyncio.ensure_future(window.wait_for_room())
+        await asyncio.sleep(0)
+
+        window.clear()
+        await asyncio.wait_for(waiter, 0.1)
+        assert len(window) == 0
+
+
+class TestCumulativeAck:
+    def test_ack_through_skips_unwritten_and_nacked(self):
+        window = SendWindow(8)
+        for sid in range(1, 6):
+            window.track(sid, _packet(sid), written=sid != 3)
+        window.nack(2)
+
+        assert window.ack_through(4) == [1, 4]
+        assert [sid for sid, _ in window.unacked()] == [2, 3, 5]
+
+        window.written(3)
+        assert window.ack_through(5) == [3, 5]
+        assert window.ack(2)
+        assert window.stats()["acked"] == 5
+
+    def test_reset_written_after_reconnect(self):
+        window = SendWindow(8)
+        window.track(1, _packet(1))
+        window.reset_written()
+
+        assert window.ack_through(1) == []
+        window.written(1)
+        assert window.ack_through(1) == [1]
@@ -0,0 +1,566 @@
+"""Tests for the WebsocketClient receive path."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet
+from websockets.exceptions import ConnectionClosedError
+
+from connect_core.aes_encrypt import ROLE_CLIENT, ROLE_SERVER, SessionCipher, aes_decrypt, aes_encrypt, aes_main
+from connect_core.context import GlobalContext
+from connect_core.tools.common import generate_md5_checksum
+from connect_core.websockets.acks import DelayedAcks
+from connect_core.websockets.client import WebsocketClient
+from connect_core.websockets.data_packet import Packet, PacketType
+from connect_core.websockets.envelope import decode_envelope, encode_envelope
+from connect_core.websockets.fragments import split
+from connect_core.websockets.send_window import SendWindow
+from tests.test_p2_enhancements import _DummyControl
+
+
+@pytest.fixture()
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> WebsocketClient:
+    GlobalContext.reset()
+    GlobalContext(server=False)
+    monkeypatch.setattr(GlobalContext, "get_path", staticmethod(lambda: tmp_path))
+    control = _DummyControl()
+    aes_main(control, Fernet.generate_key().decode())  # type: ignore[arg-type]
+    instance = WebsocketClient(control)  # type: ignore[arg-type]
+    yield instance
+    aes_main(control, None)  # type: ignore[arg-type]
+
+
+class TestFrameClassification:
+    def test_fernet_binary_frame(self, client: WebsocketClient):
+        frame = aes_encrypt(json.dumps({"type": "pong"}).encode())
+        assert client._decode_frame(frame) == {"type": "pong"}
+
+    def test_fernet_text_frame(self, client: WebsocketClient):
+        frame = aes_encrypt(json.dumps({"type": "pong"}).encode()).decode()
+        assert client._decode_frame(frame) == {"type": "pong"}
+
+    def test_plain_json_frames(self, client: WebsocketClient):
+        assert client._decode_frame('{"type": "test_connect"}') == {"type": "test_connect"}
+        assert client._decode_frame(b'{"type": "test_connect"}') == {"type": "test_connect"}
+
+    def test_envelope_frame(self, client: WebsocketClient):
+        frame = encode_envelope(json.dumps({"type": "pong"}).encode())
+        assert client._decode_frame(frame) == {"type": "pong"}
+
+    @pytest.mark.asyncio
+    async def test_undecodable_frame_is_dropped(self, client: WebsocketClient):
+        assert await client._decode_payload(b"garbage") is None
+
+
+class _RecordingWebSocket:
+    def __init__(self) -> None:
+        self.sent: list = []
+
+    async def send(self, message) -> None:
+        self.sent.append(message)
+
+
+class TestTransportIntegrity:
+    def _data_send(self, client: WebsocketClient) -> dict:
+        return client.data_packet.get_data_packet(
+            PacketType.DATA_SEND, ("beta", "demo"), ("alpha", "demo"), {"a": 1}
+        )["-----"]
+
+    def test_negotiated_packets_omit_checksum(self, client: WebsocketClient):
+        client.capabilities = {"transport_integrity_v1"}
+        assert self._data_send(client)["checksum"] is None
+
+        client.capabilities = set()
+        assert self._data_send(client)["checksum"] == generate_md5_checksum({"a": 1})
+
+    def test_receive_skips_verification_when_negotiated(self, client: WebsocketClient):
+        packet = Packet(PacketType.DATA_SEND, 1, ("alpha", "demo"), ("-----", "demo"), {"a": 1}, with_checksum=False)
+        assert not client.data_packet._payload_intact(packet, packet.payload)
+        client.capabilities = {"transport_integrity_v1"}
+        assert client.data_packet._payload_intact(packet, packet.payload)
+
+    @pytest.mark.asyncio
+    async def test_replay_to_unnegotiated_hub_restores_checksum(self, client: WebsocketClient):
+        client.capabilities = {"transport_integrity_v1"}
+        packet = self._data_send(client)
+        client.capabilities = set()
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send(packet)
+
+        sent = json.loads(client.websocket.sent[0])  # type: ignore[union-attr]
+        assert json.loads(aes_decrypt(sent["data"]))["checksum"] == generate_md5_checksum({"a": 1})
+
+
+class TestFragmentation:
+    PAYLOAD = {"rows": [f"row-{index}" for index in range(400)]}
+
+    @pytest.mark.asyncio
+    async def test_oversized_payload_is_sent_in_fragments(self, client: WebsocketClient):
+        client._control.config.fragment_size = 1000
+        client.server_id = "alpha"
+        client.capabilities = {"data_fragment_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send_data_to_other_server("demo", "all", "demo", self.PAYLOAD)
+
+        sent = [
+            json.loads(aes_decrypt(json.loads(frame)["data"]))
+            for frame in client.websocket.sent  # type: ignore[union-attr]
+        ]
+        assert len(sent) > 1
+        assert {packet["type"] for packet in sent} == {"data_fragment"}
+        assert json.loads("".join(packet["payload"]["data"] for packet in sent)) == self.PAYLOAD
+        assert client.last_data_packet is None
+        assert client.data_packet.get_history_packet("-----", 0) == []
+
+    @pytest.mark.asyncio
+    async def test_unnegotiated_hub_receives_single_packet(self, client: WebsocketClient):
+        client._control.config.fragment_size = 1000
+        client.server_id = "alpha"
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send_data_to_other_server("demo", "all", "demo", self.PAYLOAD)
+
+        assert len(client.websocket.sent) == 1  # type: ignore[union-attr]
+
+    @pytest.mark.asyncio
+    async def test_fragments_are_reassembled(self, client: WebsocketClient, monkeypatch):
+        received = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data",
+            lambda plugin_id, server_id, data: received.append((plugin_id, server_id, data)),
+        )
+        client.capabilities = {"transport_integrity_v1", "data_fragment_v1"}
+        for fragment in split(json.dumps(self.PAYLOAD), 1000):
+            packet = Packet(
+                PacketType.DATA_FRAGMENT, 3, ("alpha", "demo"), ("beta", "demo"), fragment, with_checksum=False
+            )
+            await client.data_packet.parse_msg(packet.dump())
+
+        assert received == [("demo", "beta", self.PAYLOAD)]
+        assert client.data_packet.get_recent_packets() == []
+
+
+class TestBatching:
+    @pytest.mark.asyncio
+    async def test_small_packets_share_one_frame(self, client: WebsocketClient):
+        client._control.config.batch_window_ms = 5.0
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"binary_envelope", "batch_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send_data_to_other_server("demo", "all", "demo", {"a": 1})
+        await client.send_data_to_other_server("demo", "-----", "demo", {"b": 2})
+        await client.send_data_to_other_server("demo", "-----", "demo", {"c": 3}, urgent=True)
+
+        sent = [json.loads(decode_envelope(frame)[1]) for frame in client.websocket.sent]  # type: ignore[union-attr]
+        assert [[packet["payload"] for packet in sent[0]], sent[1]["payload"]] == [[{"a": 1}, {"b": 2}], {"c": 3}]
+
+    @pytest.mark.asyncio
+    async def test_batch_frame_is_parsed_in_order(self, client: WebsocketClient, monkeypatch):
+        received = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data",
+            lambda plugin_id, server_id, data: received.append(data),
+        )
+        client.capabilities = {"transport_integrity_v1"}
+        batch = [
+            Packet(PacketType.DATA_SEND, sid, ("alpha", "demo"), ("beta", "demo"), {"n": sid}, with_checksum=False).dump()
+            for sid in (1, 2)
+        ]
+
+        await client.data_packet.parse_msg(json.loads(json.dumps(batch)))
+
+        assert received == [{"n": 1}, {"n": 2}]
+
+
+class TestPriorityLanes:
+    @pytest.mark.asyncio
+    async def test_bulk_priority_bypasses_batch_window(self, client: WebsocketClient):
+        client._control.config.batch_window_ms = 1000.0
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"binary_envelope", "batch_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send_data_to_other_server("demo", "all", "demo", {"a": 1}, priority="bulk")
+
+        assert len(client.websocket.sent) == 1  # type: ignore[union-attr]
+        assert client._coalescer is not None and client._coalescer.depth == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_follow_priority(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        await client.write_gate.acquire("bulk")
+
+        def packet(packet_type: PacketType) -> dict:
+            return client.data_packet.get_data_packet(packet_type, ("all", "demo"), ("alpha", "demo"), {})
+
+        tasks = [
+            asyncio.ensure_future(client.send(packet(PacketType.FILE_SENDING))),
+            asyncio.ensure_future(client.send(packet(PacketType.DATA_SEND))),
+            asyncio.ensure_future(client.send(packet(PacketType.PING))),
+        ]
+        await asyncio.sleep(0.01)
+        client.write_gate.release()
+        await asyncio.gather(*tasks)
+
+        sent = [
+            json.loads(aes_decrypt(json.loads(frame)["data"]))["type"]
+            for frame in client.websocket.sent  # type: ignore[union-attr]
+        ]
+        assert sent == ["ping", "data_send", "file_sending"]
+
+    @pytest.mark.asyncio
+    async def test_session_counters_follow_write_order(self, client: WebsocketClient):
+        key = Fernet.generate_key().decode()
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"binary_envelope", "aead_aes256gcm_v1"}
+        client.session = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_CLIENT)
+        hub = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_SERVER)
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        await client.write_gate.acquire("bulk")
+
+        def packet(packet_type: PacketType) -> dict:
+            return client.data_packet.get_data_packet(packet_type, ("all", "demo"), ("alpha", "demo"), {})
+
+        # Bulk writers wait first, so the gate lets the later control writers through ahead of them
+        tasks = [asyncio.ensure_future(client.send(packet(PacketType.FILE_SENDING))) for _ in range(100)]
+        tasks += [asyncio.ensure_future(client.send(packet(PacketType.PING))) for _ in range(50)]
+        await asyncio.sleep(0.01)
+        client.write_gate.release()
+        await asyncio.gather(*tasks)
+
+        sent = [
+            json.loads(decode_envelope(frame, session=hub)[1])["type"]
+            for frame in client.websocket.sent  # type: ignore[union-attr]
+        ]
+        assert sent[0] == "ping"
+        assert sorted(sent) == ["file_sending"] * 100 + ["ping"] * 50
+
+
+class TestSendWindow:
+    @staticmethod
+    def _reply(packet_type: PacketType, sid: int | None) -> dict:
+        payload = None if sid is None else {"sid": sid}
+        return Packet(packet_type, 0, ("alpha", "system"), ("-----", "system"), payload, with_checksum=False).dump()
+
+    @pytest.mark.asyncio
+    async def test_several_packets_in_flight(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        for index in range(3):
+            await client.send_data_to_other_server("demo", "all", "demo", {"n": index})
+        sids = [sid for sid, _ in client.send_window.unacked()]
+        assert len(sids) == 3 and client.last_data_packet is None
+
+        await client.data_packet.parse_msg(self._reply(PacketType.DATA_SENDOK, sids[0]))
+        assert [sid for sid, _ in client.send_window.unacked()] == sids[1:]
+
+        client.websocket.sent.clear()  # type: ignore[union-attr]
+        await client.data_packet.parse_msg(self._reply(PacketType.DATA_ERROR, sids[2]))
+        resent = [
+            json.loads(aes_decrypt(json.loads(frame)["data"]))
+            for frame in client.websocket.sent  # type: ignore[union-attr]
+        ]
+        assert [packet["payload"] for packet in resent] == [{"n": 2}]
+
+    @pytest.mark.asyncio
+    async def test_full_window_blocks_sender(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        client.send_window = SendWindow(1)
+
+        await client.send_data_to_other_server("demo", "all", "demo", {"n": 0})
+        blocked = asyncio.ensure_future(client.send_data_to_other_server("demo", "all", "demo", {"n": 1}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        (sid, _), = client.send_window.unacked()
+        await client.data_packet.parse_msg(self._reply(PacketType.DATA_SENDOK, sid))
+        await asyncio.wait_for(blocked, 0.1)
+        assert len(client.websocket.sent) == 2  # type: ignore[union-attr]
+
+    @pytest.mark.asyncio
+    async def test_legacy_hub_keeps_last_packet(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.send_data_to_other_server("demo", "all", "demo", {"n": 0})
+        assert client.last_data_packet is not None and len(client.send_window) == 0
+
+        await client.data_packet.parse_msg(self._reply(PacketType.DATA_SENDOK, None))
+        assert client.last_data_packet is None
+
+
+class TestCumulativeAck:
+    @staticmethod
+    def _sent(client: WebsocketClient) -> list[dict]:
+        return [
+            json.loads(aes_decrypt(json.loads(frame)["data"]))
+            for frame in client.websocket.sent  # type: ignore[union-attr]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_received_packets_share_one_ack(self, client: WebsocketClient, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1", "cumulative_ack_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        client.acks = DelayedAcks(client._flush_ack, 0.01)
+
+        for sid in (4, 5):
+            packet = Packet(PacketType.DATA_SEND, sid, ("alpha", "demo"), ("beta", "demo"), {"n": sid}, with_checksum=False)
+            await client.data_packet.parse_msg(packet.dump())
+        assert client.websocket.sent == []  # type: ignore[union-attr]
+        await asyncio.sleep(0.03)
+
+        assert [(packet["type"], packet["payload"]) for packet in self._sent(client)] == [
+            ("data_sendok", {"upto": 5})
+        ]
+        assert client.data_packet.get_history_packet("-----", 0) == []
+
+    @pytest.mark.asyncio
+    async def test_legacy_hub_acks_keep_sid_continuity(self, client: WebsocketClient, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        packet = Packet(PacketType.DATA_SEND, 4, ("alpha", "demo"), ("beta", "demo"), {"n": 4}, with_checksum=False)
+        await client.data_packet.parse_msg(packet.dump())
+        await client.send_data_to_other_server("demo", "all", "demo", {"reply": 1})
+
+        assert [(packet["type"], packet["sid"]) for packet in self._sent(client)] == [
+            ("data_sendok", 5),
+            ("data_send", 6),
+        ]
+        assert [packet["sid"] for packet in client.data_packet.get_history_packet("-----", 0)] == [5, 6]
+
+    @pytest.mark.asyncio
+    async def test_batched_packet_is_written_when_batch_is_sent(self, client: WebsocketClient):
+        client._control.config.batch_window_ms = 1000.0
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"binary_envelope", "batch_v1", "send_window_v1", "cumulative_ack_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        def upto(sid: int) -> dict:
+            return Packet(
+                PacketType.DATA_SENDOK, 0, ("alpha", "system"), ("-----", "system"), {"upto": sid}, with_checksum=False
+            ).dump()
+
+        await client.send_data_to_other_server("demo", "all", "demo", {"n": 1})
+        ((sid, _),) = client.send_window.unacked()
+        await client.data_packet.parse_msg(upto(sid))
+        assert sid in client.send_window
+
+        await client._coalescer.flush()  # type: ignore[union-attr]
+        await client.data_packet.parse_msg(upto(sid))
+        assert len(client.websocket.sent) == 1  # type: ignore[union-attr]
+        assert sid not in client.send_window
+
+    @pytest.mark.asyncio
+    async def test_cumulative_ack_clears_window(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1", "cumulative_ack_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        for index in range(3):
+            await client.send_data_to_other_server("demo", "all", "demo", {"n": index})
+        sids = [sid for sid, _ in client.send_window.unacked()]
+        reply = Packet(
+            PacketType.DATA_SENDOK, 0, ("alpha", "system"), ("-----", "system"), {"upto": sids[1]}, with_checksum=False
+        )
+        await client.data_packet.parse_msg(reply.dump())
+
+        assert [sid for sid, _ in client.send_window.unacked()] == sids[2:]
+
+
+class TestDuplicateSuppression:
+    @staticmethod
+    def _data_send(sid: int) -> dict:
+        return Packet(PacketType.DATA_SEND, sid, ("alpha", "demo"), ("beta", "demo"), {"n": sid}, with_checksum=False).dump()
+
+    @pytest.mark.asyncio
+    async def test_replayed_packet_is_acked_once_delivered(self, client: WebsocketClient, monkeypatch):
+        delivered = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data", lambda *args: delivered.append(args[2])
+        )
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1", "send_window_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        for sid in (4, 5, 4):
+            await client.data_packet.parse_msg(self._data_send(sid))
+
+        assert delivered == [{"n": 4}, {"n": 5}]
+        assert [packet["payload"] for packet in TestCumulativeAck._sent(client)] == [
+            {"sid": 4},
+            {"sid": 5},
+            {"sid": 4},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_login_resets_window(self, client: WebsocketClient, monkeypatch):
+        delivered = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data", lambda *args: delivered.append(args[2])
+        )
+        monkeypatch.setattr("connect_core.websockets.data_packet.connected", lambda: None)
+        monkeypatch.setattr(client, "start_keepalive", lambda: None)
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"transport_integrity_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+
+        await client.data_packet.parse_msg(self._data_send(1))
+        logined = Packet(
+            PacketType.LOGINED,
+            0,
+            ("alpha", "system"),
+            ("-----", "system"),
+            {"capabilities": ["transport_integrity_v1"]},
+            with_checksum=False,
+        )
+        await client.data_packet._handle_logined(logined)
+        await client.data_packet.parse_msg(self._data_send(1))
+
+        assert delivered == [{"n": 1}, {"n": 1}]
+
+
+class TestResync:
+    @pytest.mark.asyncio
+    async def test_gap_marker_skips_unreplayed_sids(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        pong = Packet(
+            PacketType.PONG,
+            12,
+            ("alpha", "system"),
+            ("-----", "system"),
+            {"gap": {"from": 3, "to": 12}},
+            with_checksum=False,
+        )
+
+        await client.data_packet.parse_msg(pong.dump())
+
+        ping = client.data_packet.get_data_packet(PacketType.PING, ("-----", "system"), ("alpha", "system"))
+        assert ping["-----"]["sid"] == 12
+
+    @pytest.mark.asyncio
+    async def test_plain_pong_changes_nothing(self, client: WebsocketClient):
+        client.config["account"] = client.server_id = "alpha"
+        pong = Packet(PacketType.PONG, 12, ("alpha", "system"), ("-----", "system"), None, with_checksum=False)
+
+        await client.data_packet.parse_msg(pong.dump())
+
+        ping = client.data_packet.get_data_packet(PacketType.PING, ("-----", "system"), ("alpha", "system"))
+        assert ping["-----"]["sid"] == 0
+
+
+class _ClosedWebSocket(_RecordingWebSocket):
+    async def recv(self):
+        raise ConnectionClosedError(None, None)
+
+
+class TestReconnect:
+    @pytest.fixture()
+    def reconnects(self, client: WebsocketClient, monkeypatch) -> list:
+        calls: list = []
+        monkeypatch.setattr(client._control, "info", lambda *args: None, raising=False)
+        monkeypatch.setattr("connect_core.websockets.client.disconnected", lambda: None)
+        monkeypatch.setattr("connect_core.websockets.client._control_interface", client._control)
+        monkeypatch.setattr(
+            "connect_core.websockets.client.websocket_client_main", lambda *args: calls.append(args)
+        )
+        client.websocket = _ClosedWebSocket()  # type: ignore[assignment]
+        return calls
+
+    @pytest.mark.asyncio
+    async def test_codec_pool_is_released(self, client: WebsocketClient, reconnects: list):
+        client.codec._get_executor()
+
+        assert await client._get_recv() is None
+
+        assert client.codec._executor is None
+        assert len(reconnects) == 1
+
+    @pytest.mark.asyncio
+    async def test_unacked_packets_are_resent_after_login(
+        self, client: WebsocketClient, reconnects: list, monkeypatch
+    ):
+        monkeypatch.setattr("connect_core.websockets.data_packet.connected", lambda: None)
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"send_window_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        for index in range(3):
+            await client.send_data_to_other_server("demo", "all", "demo", {"n": index})
+        client.send_window.ack(client.send_window.unacked()[0][0])
+        client.websocket = _ClosedWebSocket()  # type: ignore[assignment]
+
+        await client._get_recv()
+        ((_, carried),) = reconnects
+        successor = WebsocketClient(client._control, carried)  # type: ignore[arg-type]
+        monkeypatch.setattr(successor, "start_keepalive", lambda: None)
+        successor.config["account"] = "alpha"
+        successor.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        logined = Packet(
+            PacketType.LOGINED, 0, ("alpha", "system"), ("-----", "system"),
+            {"capabilities": ["send_window_v1"]}, with_checksum=False,
+        )
+        await successor.data_packet._handle_logined(logined)
+
+        resent = [json.loads(aes_decrypt(json.loads(frame)["data"])) for frame in successor.websocket.sent]  # type: ignore[union-attr]
+        assert [(packet["type"], packet["payload"]) for packet in resent] == [
+            ("data_send", {"n": 1}),
+            ("data_send", {"n": 2}),
+        ]
+        assert [sid for sid, _ in successor.send_window.unacked()] == [packet["sid"] for packet in resent]
+
+    @pytest.mark.asyncio
+    async def test_carried_packets_ignore_cumulative_ack_until_written(
+        self, client: WebsocketClient, reconnects: list, monkeypatch
+    ):
+        monkeypatch.setattr("connect_core.websockets.data_packet.connected", lambda: None)
+        capabilities = ["binary_envelope", "batch_v1", "send_window_v1", "cumulative_ack_v1"]
+        client.config["account"] = client.server_id = "alpha"
+        client.capabilities = {"send_window_v1", "cumulative_ack_v1"}
+        client.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        for index in range(2):
+            await client.send_data_to_other_server("demo", "all", "demo", {"n": index})
+        client.acks.defer("-----", 7)
+        client.websocket = _ClosedWebSocket()  # type: ignore[assignment]
+
+        await client._get_recv()
+        ((_, carried),) = reconnects
+        successor = WebsocketClient(client._control, carried)  # type: ignore[arg-type]
+        monkeypatch.setattr(successor, "start_keepalive", lambda: None)
+        successor._control.config.batch_window_ms = 1000.0
+        successor.config["account"] = "alpha"
+        successor.websocket = _RecordingWebSocket()  # type: ignore[assignment]
+        await successor.data_packet._handle_logined(
+            Packet(
+                PacketType.LOGINED, 0, ("alpha", "system"), ("-----", "system"),
+                {"capabilities": capabilities}, with_checksum=False,
+            )
+        )
+        ack = Packet(
+            PacketType.DATA_SENDOK, 0, ("alpha", "system"), ("-----", "system"), {"upto": 10}, with_checksum=False
+        ).dump()
+
+        await successor.data_packet.parse_msg(ack)
+        assert len(successor.send_window) == 2
+        await successor._coalescer.flush()  # type: ignore[union-attr]
+        await successor.data_packet.parse_msg(ack)
+
+        assert len(successor.send_window) == 0
+        # Acks owed on the old connection refer to its sids and are not carried over
+        assert successor.acks.take("-----") is None and client.acks.take("-----") is None
+        successor._close_coalescer()
@@ -0,0 +1,1159 @@
+"""Tests for WebsocketServer send paths."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+from cryptography.fernet import Fernet
+
+from connect_core.aes_encrypt import ROLE_CLIENT, ROLE_SERVER, SessionCipher, aes_encrypt
+from connect_core.context import GlobalContext
+from connect_core.tools.common import generate_md5_checksum
+from connect_core.websockets.acks import DelayedAcks
+from connect_core.websockets.data_packet import Packet, PacketType, encode_session_nonce
+from connect_core.websockets.envelope import (
+    FLAG_COMPRESSED,
+    FLAG_GROUP,
+    FLAG_SESSION,
+    decode_envelope,
+    encode_envelope,
+    is_envelope,
+)
+from connect_core.websockets.fragments import split
+from connect_core.websockets.retransmit import RetransmitTimers
+from connect_core.websockets.server import WebsocketServer
+from tests.test_p2_enhancements import _DummyControl
+
+
+class _FakeWebSocket:
+    def __init__(self, delay: float = 0.0, fail: bool = False) -> None:
+        self.delay = delay
+        self.fail = fail
+        self.sent: list[bytes] = []
+
+    async def send(self, frame: bytes) -> None:
+        if self.fail:
+            raise ConnectionError("peer gone")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(frame)
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        return None
+
+
+def _packet(sid: int = 1) -> dict:
+    return {
+        "type": "data_send",
+        "status": None,
+        "sid": sid,
+        "to": ("all", "demo"),
+        "from": ("-----", "system"),
+        "payload": {"msg": "hi"},
+        "timestamp": 0.0,
+        "checksum": None,
+    }
+
+
+@pytest.fixture()
+def server(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> WebsocketServer:
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    GlobalContext.reset()
+    GlobalContext(server=True)
+    monkeypatch.setattr(GlobalContext, "get_path", staticmethod(lambda: workspace))
+    control = _DummyControl()
+    control.config.broadcast_send_timeout = 0.05
+    instance = WebsocketServer(control)
+    for server_id in ("alpha", "beta", "gamma"):
+        instance.accounts.set(server_id, Fernet.generate_key().decode())
+    return instance
+
+
+class TestBroadcast:
+    @pytest.mark.asyncio
+    async def test_slow_peer_does_not_stall_others(self, server: WebsocketServer):
+        fast, slow = _FakeWebSocket(), _FakeWebSocket(delay=1.0)
+        server.websockets.update({"alpha": fast, "beta": slow})
+        unknown = _FakeWebSocket()
+        server.websockets["delta"] = unknown
+
+        started = asyncio.get_running_loop().time()
+        report = await server.broadcast(
+            {server_id: _packet() for server_id in ("alpha", "beta", "delta")}
+        )
+        elapsed = asyncio.get_running_loop().time() - started
+        await asyncio.sleep(0.01)
+
+        assert report == {"delivered": ["alpha", "beta"], "slow": [], "failed": ["delta"]}
+        assert len(fast.sent) == 1
+        assert slow.sent == []
+        assert elapsed < 0.5
+        await server.outbound["beta"].close()
+
+    @pytest.mark.asyncio
+    async def test_direct_send_timeout_reports_slow(self, server: WebsocketServer):
+        slow = _FakeWebSocket(delay=1.0)
+        server.websockets["beta"] = slow
+        # 未建立发送队列的连接（例如登录完成前）直接写 socket 并受超时限制
+        server._outbound_queue = lambda account, websocket: None  # type: ignore[method-assign]
+
+        report = await server.broadcast({"beta": _packet()})
+
+        assert report["slow"] == ["beta"]
+
+    @pytest.mark.asyncio
+    async def test_queue_overflow_disconnects_slow_consumer(self, server: WebsocketServer):
+        server._config.outbound_queue_max_packets = 2
+        server._config.outbound_queue_policy = "disconnect"
+        slow = _FakeWebSocket(delay=1.0)
+        closed: list[int] = []
+
+        async def _close(code: int = 1000, reason: str = "") -> None:
+            closed.append(code)
+
+        slow.close = _close  # type: ignore[method-assign]
+        server.websockets["beta"] = slow
+
+        outcomes = [
+            (await server.broadcast({"beta": _packet(sid)})) for sid in range(1, 5)
+        ]
+        await asyncio.sleep(0)
+
+        assert outcomes[0]["delivered"] == ["beta"]
+        assert ["beta"] in [outcome["slow"] for outcome in outcomes]
+        assert closed == [4008]
+        assert server._health_payload()["outbound_queues"]["beta"]["dropped"] > 0
+        await server.outbound["beta"].close()
+
+    @pytest.mark.asyncio
+    async def test_parallel_encryption_for_many_recipients(self, server: WebsocketServer):
+        server._config.broadcast_parallel_min_recipients = 2
+        peers = {server_id: _FakeWebSocket() for server_id in ("alpha", "beta", "gamma")}
+        server.websockets.update(peers)
+
+        report = await server.broadcast(
+            {server_id: _packet(sid) for sid, server_id in enumerate(peers, 1)}
+        )
+        await asyncio.sleep(0.01)
+
+        assert report["delivered"] == ["alpha", "beta", "gamma"]
+        assert server.codec.stats()["offloaded"] > 0
+        for sid, (server_id, peer) in enumerate(peers.items(), 1):
+            assert server._decrypt_message({"data": peer.sent[0].decode()}, server_id)["sid"] == sid
+        for queue in list(server.outbound.values()):
+            await queue.close()
+        server.codec.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_except_id_is_skipped(self, server: WebsocketServer):
+        alpha, beta = _FakeWebSocket(), _FakeWebSocket()
+        server.websockets.update({"alpha": alpha, "beta": beta})
+
+        report = await server.broadcast(
+            {"alpha": _packet(), "beta": _packet()}, ["beta"]
+        )
+
+        assert report["delivered"] == ["alpha"]
+        assert beta.sent == []
+
+
+class TestWireEnvelope:
+    def test_binary_peer_gets_envelope_frames(self, server: WebsocketServer):
+        server.servers_info["alpha"] = {"capabilities": ["binary_envelope"]}
+        server.servers_info["beta"] = {"capabilities": []}
+
+        binary = server._encode_packet(_packet(), "alpha")
+        legacy = server._encode_packet(_packet(), "beta")
+
+        assert is_envelope(binary)
+        assert not is_envelope(legacy)
+        assert server._decrypt_message(binary, "alpha")["sid"] == 1
+        assert server._decrypt_message({"data": legacy.decode()}, "beta")["sid"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unbound_binary_frame_is_rejected(self, server: WebsocketServer):
+        frame = server._encode_packet(_packet(), "beta")
+        closed: list[tuple[int, str]] = []
+
+        class _Incoming(_FakeWebSocket):
+            def __aiter__(self):
+                return self._frames()
+
+            async def _frames(self):
+                yield encode_envelope(b"{}", server.accounts.get("alpha"))
+                yield frame
+
+            async def close(self, code: int = 1000, reason: str = "") -> None:
+                closed.append((code, reason))
+
+        await server._handler(_Incoming())
+
+        assert closed == [(1008, "Unbound binary frame")]
+
+    @pytest.mark.asyncio
+    async def test_non_object_handshake_is_rejected(self, server: WebsocketServer):
+        closed: list[tuple[int, str]] = []
+
+        class _Incoming(_FakeWebSocket):
+            def __aiter__(self):
+                return self._frames()
+
+            async def _frames(self):
+                yield '["account"]'
+
+            async def close(self, code: int = 1000, reason: str = "") -> None:
+                closed.append((code, reason))
+
+        await server._handler(_Incoming())
+
+        assert closed == [(1008, "Malformed handshake")]
+
+    def test_unknown_account_refresh_is_throttled(
+        self, server: WebsocketServer, monkeypatch: pytest.MonkeyPatch
+    ):
+        calls: list[None] = []
+        monkeypatch.setattr(server.accounts, "refresh", lambda: calls.append(None) or False)
+
+        for _ in range(100):
+            assert server._resolve_account_key("nobody") is None
+
+        assert len(calls) == 1
+        server._accounts_checked_at -= 10
+        server._resolve_account_key("nobody")
+        assert len(calls) == 2
+
+    def test_compressed_peer_round_trip(self, server: WebsocketServer):
+        server.servers_info["alpha"] = {"capabilities": ["binary_envelope", "zlib_v1"]}
+        packet = _packet()
+        packet["payload"] = {"players": [f"player{i}" for i in range(100)]}
+
+        frame = server._encode_packet(packet, "alpha")
+
+        assert frame[2] & FLAG_COMPRESSED
+        assert server._decrypt_message(frame, "alpha")["payload"] == packet["payload"]
+        assert server._health_payload()["compression"]["data_send"]["compressed"] == 1
+
+    def test_aead_session_peer_round_trip(self, server: WebsocketServer):
+        key = server.accounts.get("alpha")
+        server.servers_info["alpha"] = {"capabilities": ["aead_aes256gcm_v1", "binary_envelope"]}
+        server.sessions["alpha"] = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_SERVER)
+        client = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_CLIENT)
+
+        frame = server._encode_packet(_packet(), "alpha")
+
+        assert frame[2] & FLAG_SESSION
+        assert json.loads(decode_envelope(frame, session=client)[1])["sid"] == 1
+        reply = encode_envelope(json.dumps(_packet(2)).encode(), session=client)
+        assert server._decrypt_message(reply, "alpha")["sid"] == 2
+
+
+class TestGroupBroadcast:
+    @pytest.mark.asyncio
+    async def test_members_share_one_frame(self, server: WebsocketServer):
+        peers = {server_id: _FakeWebSocket() for server_id in ("alpha", "beta", "gamma")}
+        server.websockets.update(peers)
+        for server_id in ("alpha", "beta"):
+            server.servers_info[server_id] = {"capabilities": ["binary_envelope", "group_key_v1"]}
+        server.servers_info["gamma"] = {"capabilities": ["binary_envelope"]}
+
+        report = await server.broadcast(
+            {server_id: _packet(sid) for sid, server_id in enumerate(peers, 1)}
+        )
+        await asyncio.sleep(0.01)
+
+        assert report["delivered"] == ["alpha", "beta", "gamma"]
+        assert peers["alpha"].sent[0] is peers["beta"].sent[0]
+        flags, plaintext = decode_envelope(peers["alpha"].sent[0], group_keys=server.group_keys)
+        assert flags & FLAG_GROUP
+        assert json.loads(plaintext)["sids"] == {"alpha": 1, "beta": 2}
+        assert server._decrypt_message(peers["gamma"].sent[0], "gamma")["sid"] == 3
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_rotation_is_sent_to_remaining_members(self, server: WebsocketServer):
+        alpha = _FakeWebSocket()
+        server.websockets["alpha"] = alpha
+        server.servers_info["alpha"] = {"capabilities": ["binary_envelope", "group_key_v1"]}
+        first_epoch, _ = server.group_keys.current()
+
+        await server._rotate_group_key()
+        await asyncio.sleep(0.01)
+
+        packet = server._decrypt_message(alpha.sent[0], "alpha")
+        assert packet["type"] == "group_key"
+        assert packet["payload"] == {"epoch": first_epoch + 1, "key": server.group_keys.current()[1]}
+        await server.outbound["alpha"].close()
+
+
+class TestFrameCache:
+    def test_resend_reuses_encoded_frame(self, server: WebsocketServer):
+        packet = _packet()
+        first = server._encode_packet(packet, "alpha")
+        # 历史重放会重新导出同一数据包
+        assert server._encode_packet(dict(packet), "alpha") is first
+        assert server._health_payload()["frame_cache"]["hits"] == 1
+
+    def test_key_change_invalidates(self, server: WebsocketServer):
+        first = server._encode_packet(_packet(), "alpha")
+        server.accounts.set("alpha", Fernet.generate_key().decode())
+        second = server._encode_packet(_packet(), "alpha")
+        assert second is not first
+        assert server._decrypt_message({"data": second.decode()}, "alpha")["sid"] == 1
+
+    def test_session_peers_are_not_cached(self, server: WebsocketServer):
+        key = server.accounts.get("alpha")
+        server.servers_info["alpha"] = {"capabilities": ["aead_aes256gcm_v1", "binary_envelope"]}
+        server.sessions["alpha"] = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_SERVER)
+        assert server._encode_packet(_packet(), "alpha") != server._encode_packet(_packet(), "alpha")
+        assert server.frame_cache.stats()["entries"] == 0
+
+    def test_packets_without_checksum_are_keyed_by_content(self, server: WebsocketServer):
+        server.servers_info["alpha"] = {"capabilities": ["transport_integrity_v1"]}
+        first = server._encode_packet(_packet(), "alpha")
+        other = server._encode_packet({**_packet(), "payload": {"msg": "bye"}}, "alpha")
+
+        assert other is not first
+        assert server._decrypt_message({"data": other.decode()}, "alpha")["payload"] == {"msg": "bye"}
+        assert server._encode_packet(_packet(), "alpha") is first
+
+
+class TestRelayPassthrough:
+    async def _relay(self, server: WebsocketServer, to: str = "beta") -> dict:
+        peers = {server_id: _FakeWebSocket() for server_id in ("alpha", "beta", "gamma")}
+        server.websockets.update(peers)
+        packet = {
+            **_packet(),
+            "to": [to, "demo"],
+            "from": ["alpha", "demo"],
+            "payload": {"msg": "hi", "n": 1},
+            "checksum": "sender-checksum",
+        }
+        token = aes_encrypt(json.dumps(packet).encode(), server.accounts.get("alpha"))
+        await server._process_message({"account": "alpha", "data": token.decode()}, peers["alpha"], "alpha")
+        await asyncio.sleep(0.01)
+        for queue in list(server.outbound.values()):
+            await queue.close()
+        return {
+            server_id: server._decrypt_message({"data": peer.sent[0].decode()}, server_id)
+            for server_id, peer in peers.items()
+            if server_id != "alpha" and peer.sent
+        }
+
+    @pytest.mark.asyncio
+    async def test_direct_relay_reuses_sender_checksum(self, server: WebsocketServer):
+        relayed = (await self._relay(server))["beta"]
+
+        assert relayed["payload"] == {"msg": "hi", "n": 1}
+        assert relayed["checksum"] == "sender-checksum"
+        assert relayed["from"] == ["alpha", "demo"]
+        assert server.get_history_data_packet("beta")[-1]["payload"] == {"msg": "hi", "n": 1}
+
+    @pytest.mark.asyncio
+    async def test_broadcast_relay_shares_serialized_payload(self, server: WebsocketServer):
+        relayed = await self._relay(server, to="all")
+
+        assert set(relayed) == {"beta", "gamma"}
+        assert {packet["checksum"] for packet in relayed.values()} == {"sender-checksum"}
+        assert relayed["beta"]["sid"] == relayed["gamma"]["sid"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_passthrough_rehashes_payload(self, server: WebsocketServer):
+        server._config.relay_passthrough_enabled = False
+
+        relayed = (await self._relay(server))["beta"]
+
+        assert relayed["payload"] == {"msg": "hi", "n": 1}
+        assert relayed["checksum"] != "sender-checksum"
+
+
+class TestTransportIntegrity:
+    def test_checksum_skipped_when_all_targets_negotiated(self, server: WebsocketServer):
+        server.websockets.update({"alpha": _FakeWebSocket(), "beta": _FakeWebSocket()})
+        for server_id in ("alpha", "beta"):
+            server.servers_info[server_id] = {"capabilities": ["transport_integrity_v1"]}
+
+        packets = server.data_packet.get_data_packet(
+            PacketType.DATA_SEND, ("all", "demo"), ("-----", "system"), {"a": 1}
+        )
+        assert {packet["checksum"] for packet in packets.values()} == {None}
+
+        server.servers_info["beta"] = {"capabilities": []}
+        packets = server.data_packet.get_data_packet(
+            PacketType.DATA_SEND, ("all", "demo"), ("-----", "system"), {"a": 1}
+        )
+        assert {packet["checksum"] for packet in packets.values()} == {
+            generate_md5_checksum({"a": 1})
+        }
+
+    def test_receive_skips_verification_only_for_negotiated_peer(self, server: WebsocketServer):
+        packet = Packet(PacketType.DATA_SEND, 1, ("-----", "demo"), ("alpha", "demo"), {"a": 1}, with_checksum=False)
+        assert not server.data_packet._payload_intact(packet, packet.payload)
+        server.servers_info["alpha"] = {"capabilities": ["transport_integrity_v1"]}
+        assert server.data_packet._payload_intact(packet, packet.payload)
+
+    @pytest.mark.asyncio
+    async def test_send_restores_checksum_for_unnegotiated_peer(self, server: WebsocketServer):
+        alpha = _FakeWebSocket()
+        server.websockets["alpha"] = alpha
+
+        await server.send({**_packet(), "checksum": None}, alpha, "alpha")
+        await asyncio.sleep(0.01)
+
+        sent = server._decrypt_message({"data": alpha.sent[0].decode()}, "alpha")
+        assert sent["checksum"] == generate_md5_checksum({"msg": "hi"})
+        await server.outbound["alpha"].close()
+
+    @pytest.mark.asyncio
+    async def test_relay_hashes_for_unnegotiated_target(self, server: WebsocketServer):
+        alpha, beta = _FakeWebSocket(), _FakeWebSocket()
+        server.websockets.update({"alpha": alpha, "beta": beta})
+        server.servers_info["alpha"] = {"capabilities": ["transport_integrity_v1"]}
+        payload = {"rows": ["x" * 64] * 40}
+        packet = {
+            **_packet(),
+            "to": ["beta", "demo"],
+            "from": ["alpha", "demo"],
+            "payload": payload,
+            "checksum": None,
+        }
+        token = aes_encrypt(json.dumps(packet).encode(), server.accounts.get("alpha"))
+
+        await server._process_message({"account": "alpha", "data": token.decode()}, alpha, "alpha")
+        await asyncio.sleep(0.01)
+
+        relayed = server._decrypt_message({"data": beta.sent[0].decode()}, "beta")
+        assert relayed["checksum"] == generate_md5_checksum(payload)
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestProtocolVersionNegotiation:
+    @staticmethod
+    def _login(payload: dict) -> Packet:
+        return Packet(PacketType.LOGIN, 1, ("-----", "system"), ("alpha", "system"), payload)
+
+    @pytest.mark.asyncio
+    async def test_login_settles_on_common_version(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.new_connect", lambda server_id: None)
+        alpha = _FakeWebSocket()
+        payload = {"path": "x", "protocol_version": 7, "min_protocol_version": 1, "capabilities": []}
+
+        await server.data_packet._handle_login(self._login(payload), alpha)
+        await asyncio.sleep(0.01)
+
+        assert server.servers_info["alpha"]["protocol_version"] == 1
+        logined = server._decrypt_message({"data": alpha.sent[0].decode()}, "alpha")
+        assert logined["type"] == PacketType.LOGINED.value
+        assert logined["payload"] == {"capabilities": [], "protocol_version": 1}
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_login_rejects_disjoint_range(self, server: WebsocketServer, monkeypatch):
+        closed = []
+
+        async def close_connect(server_id, code, websocket):
+            closed.append(code)
+
+        monkeypatch.setattr(server, "close_connect", close_connect)
+        payload = {"protocol_version": 9, "min_protocol_version": 8}
+
+        await server.data_packet._handle_login(self._login(payload), _FakeWebSocket())
+
+        assert closed == [4001]
+        assert "alpha" not in server.websockets
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_login_without_account_key_gets_no_session(self, server: WebsocketServer, monkeypatch):
+        closed = []
+
+        async def close_connect(server_id, code, websocket):
+            closed.append(code)
+
+        monkeypatch.setattr(server, "close_connect", close_connect)
+        server.accounts.remove("alpha")
+        payload = {
+            "protocol_version": 1,
+            "capabilities": ["binary_envelope", "aead_aes256gcm_v1"],
+            "session_nonce": encode_session_nonce(b"c" * 16),
+        }
+
+        await server.data_packet._handle_login(self._login(payload), _FakeWebSocket())
+
+        assert closed == [401]
+        assert "alpha" not in server.websockets and "alpha" not in server.sessions
+
+
+class TestFragmentRelay:
+    PAYLOAD = {"rows": [f"row-{index}" for index in range(400)]}
+
+    @staticmethod
+    def _fragment_frames(server: WebsocketServer, to: str, size: int = 1000) -> list[str]:
+        text = json.dumps(TestFragmentRelay.PAYLOAD)
+        frames = []
+        for fragment in split(text, size):
+            packet = {
+                **_packet(),
+                "type": "data_fragment",
+                "to": [to, "demo"],
+                "from": ["alpha", "demo"],
+                "payload": fragment,
+                "checksum": generate_md5_checksum(fragment),
+            }
+            frames.append(aes_encrypt(json.dumps(packet).encode(), server.accounts.get("alpha")).decode())
+        return frames
+
+    @staticmethod
+    def _received(server: WebsocketServer, websocket: _FakeWebSocket, account: str) -> list[dict]:
+        return [server._decrypt_message({"data": frame.decode()}, account) for frame in websocket.sent]
+
+    @staticmethod
+    def _log_in(server: WebsocketServer, **capabilities: list[str]) -> dict[str, _FakeWebSocket]:
+        websockets = {}
+        for server_id, agreed in capabilities.items():
+            websockets[server_id] = server.websockets[server_id] = _FakeWebSocket()
+            server.servers_info[server_id] = {"capabilities": agreed}
+            server.data_packet.add_recv_packet(server_id, {**_packet(), "from": [server_id, "system"]})
+        return websockets
+
+    async def _deliver(self, server: WebsocketServer, frames: list[str], alpha: _FakeWebSocket) -> None:
+        for token in frames:
+            await server._process_message({"account": "alpha", "data": token}, alpha, "alpha")
+        await asyncio.sleep(0.01)
+
+    @pytest.mark.asyncio
+    async def test_relays_fragments_without_reassembling(self, server: WebsocketServer):
+        peers = self._log_in(server, alpha=["data_fragment_v1"], beta=["data_fragment_v1"])
+        alpha, beta = peers["alpha"], peers["beta"]
+        frames = self._fragment_frames(server, "beta")
+
+        await self._deliver(server, frames[:1], alpha)
+        assert server.data_packet.fragments.pending == 0
+        await self._deliver(server, frames[1:], alpha)
+
+        relayed = self._received(server, beta, "beta")
+        assert [packet["type"] for packet in relayed] == ["data_fragment"] * len(frames)
+        assert "".join(packet["payload"]["data"] for packet in relayed) == json.dumps(self.PAYLOAD)
+        assert server.data_packet.get_history_packet("beta", 0) == []
+        assert alpha.sent == []
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_reassembles_for_unnegotiated_target(self, server: WebsocketServer):
+        peers = self._log_in(server, alpha=["data_fragment_v1"], beta=[])
+        alpha, beta = peers["alpha"], peers["beta"]
+
+        await self._deliver(server, self._fragment_frames(server, "beta"), alpha)
+
+        relayed = self._received(server, beta, "beta")
+        assert len(relayed) == 1
+        assert relayed[0]["type"] == "data_send"
+        assert relayed[0]["payload"] == self.PAYLOAD
+        assert relayed[0]["checksum"] == generate_md5_checksum(self.PAYLOAD)
+        assert server.data_packet.fragments.stats()["buffered"] == 0
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_reassembles_for_the_hub_itself(self, server: WebsocketServer, monkeypatch):
+        received = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data",
+            lambda plugin_id, server_id, data: received.append((plugin_id, server_id, data)),
+        )
+        alpha = self._log_in(server, alpha=["data_fragment_v1"])["alpha"]
+
+        await self._deliver(server, self._fragment_frames(server, "-----"), alpha)
+
+        assert received == [("demo", "alpha", self.PAYLOAD)]
+
+    @pytest.mark.asyncio
+    async def test_hub_send_fragments_only_for_negotiated_peers(self, server: WebsocketServer):
+        server._config.fragment_size = 1000
+        peers = self._log_in(server, alpha=["data_fragment_v1"], beta=[])
+        alpha, beta = peers["alpha"], peers["beta"]
+
+        await server.send_data_to_other_server("-----", "demo", "all", "demo", self.PAYLOAD)
+        await asyncio.sleep(0.01)
+
+        to_alpha = self._received(server, alpha, "alpha")
+        to_beta = self._received(server, beta, "beta")
+        assert {packet["type"] for packet in to_alpha} == {"data_fragment"}
+        assert len(to_alpha) > 1
+        assert [packet["type"] for packet in to_beta] == ["data_send"]
+        assert "alpha" not in server.last_send_packet
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestBatching:
+    @staticmethod
+    def _batched(server: WebsocketServer, websocket: _FakeWebSocket) -> list:
+        key = server.accounts.get("alpha")
+        return [json.loads(decode_envelope(frame, key)[1]) for frame in websocket.sent]
+
+    @pytest.mark.asyncio
+    async def test_small_packets_share_one_frame(self, server: WebsocketServer):
+        server._config.batch_window_ms = 5.0
+        alpha = TestFragmentRelay._log_in(server, alpha=["binary_envelope", "batch_v1"])["alpha"]
+
+        for sid in range(3):
+            await server.send(_packet(sid), alpha, "alpha")
+        assert alpha.sent == []
+        await asyncio.sleep(0.03)
+
+        assert [[packet["sid"] for packet in batch] for batch in self._batched(server, alpha)] == [[0, 1, 2]]
+        assert server._health_payload()["batching"]["alpha"]["packets"] == 3
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_urgent_packet_flushes_window_first(self, server: WebsocketServer):
+        server._config.batch_window_ms = 1000.0
+        alpha = TestFragmentRelay._log_in(server, alpha=["binary_envelope", "batch_v1"])["alpha"]
+
+        await server.send(_packet(1), alpha, "alpha")
+        await server.send(_packet(2), alpha, "alpha")
+        await server.send(_packet(3), alpha, "alpha", urgent=True)
+        await asyncio.sleep(0.01)
+
+        batch, single = self._batched(server, alpha)
+        assert [packet["sid"] for packet in batch] == [1, 2]
+        assert single["sid"] == 3
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_unnegotiated_peer_is_not_batched(self, server: WebsocketServer):
+        server._config.batch_window_ms = 1000.0
+        alpha = TestFragmentRelay._log_in(server, alpha=["binary_envelope"])["alpha"]
+
+        await server.send(_packet(1), alpha, "alpha")
+        await asyncio.sleep(0.01)
+
+        assert len(alpha.sent) == 1
+        assert server.coalescers == {}
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_broadcast_batches_per_target(self, server: WebsocketServer):
+        server._config.batch_window_ms = 5.0
+        peers = TestFragmentRelay._log_in(
+            server, alpha=["binary_envelope", "batch_v1"], beta=[]
+        )
+
+        for sid in range(2):
+            report = await server.broadcast({"alpha": _packet(sid), "beta": _packet(sid)})
+            assert sorted(report["delivered"]) == ["alpha", "beta"]
+        await asyncio.sleep(0.03)
+
+        assert [[packet["sid"] for packet in batch] for batch in self._batched(server, peers["alpha"])] == [[0, 1]]
+        assert len(peers["beta"].sent) == 2
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_batch_frame_requires_negotiation(self, server: WebsocketServer, monkeypatch):
+        closed: list[tuple[int, str]] = []
+
+        async def _close_connection(server_id, websocket) -> None:
+            return None
+
+        monkeypatch.setattr(server, "_close_connection", _close_connection)
+
+        class _Closing(_FakeWebSocket):
+            async def close(self, code: int = 1000, reason: str = "") -> None:
+                closed.append((code, reason))
+
+        alpha = _Closing()
+        server.websockets["alpha"] = alpha  # type: ignore[assignment]
+        server.servers_info["alpha"] = {"capabilities": ["binary_envelope"]}
+        frame = encode_envelope(json.dumps([_packet(1), _packet(2)]).encode(), server.accounts.get("alpha"))
+
+        await server._process_message(frame, alpha, "alpha")  # type: ignore[arg-type]
+
+        assert closed == [(1008, "HTTP 400")]
+
+
+class TestPriorityLanes:
+    @pytest.mark.asyncio
+    async def test_chat_is_not_queued_behind_file_chunks(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+        alpha.delay = 0.01
+
+        for sid in range(3):
+            await server.send({**_packet(sid), "type": "file_sending", "payload": {"file": "00"}}, alpha, "alpha")
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"msg": "hi"})
+        await asyncio.sleep(0.1)
+
+        types = [packet["type"] for packet in TestFragmentRelay._received(server, alpha, "alpha")]
+        assert types == ["data_send", "file_sending", "file_sending", "file_sending"]
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_requested_priority_selects_lane(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+        alpha.delay = 1.0
+
+        await server.send(_packet(1), alpha, "alpha")
+        await asyncio.sleep(0)
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"a": 1}, priority="bulk")
+        await server.send_data_to_other_server("-----", "demo", "all", "demo", {"b": 2}, priority="control")
+
+        assert server._health_payload()["outbound_queues"]["alpha"]["lanes"] == {
+            "control": 1,
+            "interactive": 0,
+            "bulk": 1,
+        }
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_session_counters_follow_write_order(self, server: WebsocketServer):
+        key = server.accounts.get("alpha")
+        alpha = TestFragmentRelay._log_in(server, alpha=["binary_envelope", "aead_aes256gcm_v1"])["alpha"]
+        server.sessions["alpha"] = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_SERVER)
+        client = SessionCipher.derive(key, b"c" * 16, b"s" * 16, ROLE_CLIENT)
+
+        # Bulk frames queue up first, so the writer sends the control frames ahead of them
+        for sid in range(150):
+            await server.send(_packet(sid), alpha, "alpha", priority="bulk")
+            if sid % 3 == 0:
+                await server.send(_packet(1000 + sid), alpha, "alpha", priority="control")
+        await asyncio.sleep(0.05)
+
+        sids = [json.loads(decode_envelope(frame, session=client)[1])["sid"] for frame in alpha.sent]
+        assert len(sids) == 200
+        assert sids[0] == 1000 and sorted(sids) == sorted([*range(150), *range(1000, 1150, 3)])
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestSendWindow:
+    @staticmethod
+    def _reply(packet_type: PacketType, sid: int | None) -> Packet:
+        payload = None if sid is None else {"sid": sid}
+        return Packet(packet_type, 0, ("-----", "system"), ("alpha", "system"), payload, with_checksum=False)
+
+    async def _send_three(self, server: WebsocketServer) -> None:
+        for index in range(3):
+            await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": index})
+
+    @pytest.mark.asyncio
+    async def test_windowed_peer_keeps_every_unacked_packet(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=["send_window_v1"])["alpha"]
+        await self._send_three(server)
+        window = server.send_windows["alpha"]
+        sids = [sid for sid, _ in window.unacked()]
+        assert len(sids) == 3
+        assert "alpha" not in server.last_send_packet
+
+        await server.data_packet._handle_data_sendok(self._reply(PacketType.DATA_SENDOK, sids[1]))
+        assert [sid for sid, _ in window.unacked()] == [sids[0], sids[2]]
+
+        await asyncio.sleep(0.01)
+        alpha.sent.clear()
+        await server.data_packet._handle_data_error(self._reply(PacketType.DATA_ERROR, sids[2]), alpha)
+        await asyncio.sleep(0.01)
+        resent = TestFragmentRelay._received(server, alpha, "alpha")
+        assert [(packet["sid"], packet["payload"]) for packet in resent] == [(sids[2], {"n": 2})]
+        assert server._health_payload()["send_windows"]["alpha"]["retransmitted"] == 1
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_legacy_peer_keeps_last_packet(self, server: WebsocketServer):
+        TestFragmentRelay._log_in(server, alpha=[])
+        await self._send_three(server)
+
+        assert "alpha" not in server.send_windows
+        assert server.last_send_packet["alpha"]["payload"] == {"n": 2}
+        await server.data_packet._handle_data_sendok(self._reply(PacketType.DATA_SENDOK, None))
+        assert "alpha" not in server.last_send_packet
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_acknowledgement_carries_sid_when_negotiated(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        peers = TestFragmentRelay._log_in(server, alpha=["send_window_v1"], beta=[])
+        for server_id, websocket in peers.items():
+            packet = Packet(
+                PacketType.DATA_SEND, 9, ("-----", "demo"), (server_id, "demo"), {"a": 1}, with_checksum=True
+            )
+            await server.data_packet._handle_data_send(packet, websocket)
+        await asyncio.sleep(0.01)
+
+        acks = {
+            server_id: TestFragmentRelay._received(server, websocket, server_id)[-1]
+            for server_id, websocket in peers.items()
+        }
+        assert acks["alpha"]["type"] == "data_sendok" and acks["alpha"]["payload"] == {"sid": 9}
+        assert acks["beta"]["type"] == "data_sendok" and acks["beta"]["payload"] is None
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestRetransmit:
+    @pytest.mark.asyncio
+    async def test_unacked_packet_is_resent_after_timeout(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=["send_window_v1", "dedup_v1"])["alpha"]
+        server.retransmit = RetransmitTimers(0.01, 0.02, 5)
+        task = asyncio.ensure_future(server._retransmit_loop())
+
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": 0})
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": 1})
+        (acked, _), _ = server.send_windows["alpha"].unacked()
+        await server.data_packet._handle_data_sendok(TestSendWindow._reply(PacketType.DATA_SENDOK, acked))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        payloads = [packet["payload"] for packet in TestFragmentRelay._received(server, alpha, "alpha")]
+        assert payloads[:2] == [{"n": 0}, {"n": 1}]
+        assert payloads[2:] and all(payload == {"n": 1} for payload in payloads[2:])
+        assert server._health_payload()["retransmit"]["retransmits"] == len(payloads) - 2
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retry_cap(self, server: WebsocketServer):
+        TestFragmentRelay._log_in(server, alpha=["send_window_v1", "dedup_v1"], beta=["dedup_v1"])
+        server.retransmit = RetransmitTimers(1.0, 1.0, 0)
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": 0})
+        await server.send_data_to_other_server("-----", "demo", "beta", "demo", {"n": 0})
+
+        await server._retransmit_due(time.monotonic() + 2)
+
+        assert len(server.send_windows["alpha"]) == 0
+        assert "beta" not in server.last_send_packet
+        assert server.retransmit.stats()["gave_up"] == 2
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_peers_without_dedup_keep_the_periodic_sweep(self, server: WebsocketServer):
+        peers = TestFragmentRelay._log_in(server, alpha=["send_window_v1"], beta=[])
+        for index in range(2):
+            await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": index})
+        await server.send_data_to_other_server("-----", "demo", "beta", "demo", {"n": 0})
+        await asyncio.sleep(0.01)
+
+        assert len(server.retransmit) == 0
+        await server._resend()
+        await asyncio.sleep(0.01)
+
+        alpha = [packet["payload"] for packet in TestFragmentRelay._received(server, peers["alpha"], "alpha")]
+        beta = [packet["payload"] for packet in TestFragmentRelay._received(server, peers["beta"], "beta")]
+        assert alpha == [{"n": 0}, {"n": 1}, {"n": 0}, {"n": 1}]
+        assert beta == [{"n": 0}, {"n": 0}]
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestCumulativeAck:
+    CAPABILITIES = ["send_window_v1", "cumulative_ack_v1", "dedup_v1"]
+
+    @staticmethod
+    def _data_send(sid: int) -> Packet:
+        return Packet(PacketType.DATA_SEND, sid, ("-----", "demo"), ("alpha", "demo"), {"n": sid})
+
+    @pytest.mark.asyncio
+    async def test_in_order_packets_share_one_delayed_ack(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        alpha = TestFragmentRelay._log_in(server, alpha=self.CAPABILITIES)["alpha"]
+        server.acks = DelayedAcks(server._flush_ack, 0.01)
+
+        for sid in (1, 2, 3):
+            await server.data_packet._handle_data_send(self._data_send(sid), alpha)
+        await asyncio.sleep(0)
+        assert alpha.sent == []
+        await asyncio.sleep(0.03)
+        await server.data_packet._handle_data_send(self._data_send(2), alpha)
+        await asyncio.sleep(0.01)
+
+        acks = TestFragmentRelay._received(server, alpha, "alpha")
+        assert [(packet["type"], packet["payload"]) for packet in acks] == [
+            ("data_sendok", {"upto": 3}),
+            ("data_sendok", {"sid": 2}),
+        ]
+        assert server.data_packet.get_history_packet("alpha", 0) == []
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_ack_rides_along_with_outgoing_batch(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        server._config.batch_window_ms = 5.0
+        alpha = TestFragmentRelay._log_in(
+            server, alpha=["binary_envelope", "batch_v1", *self.CAPABILITIES]
+        )["alpha"]
+        server.acks = DelayedAcks(server._flush_ack, 1.0)
+
+        await server.data_packet._handle_data_send(self._data_send(1), alpha)
+        await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"reply": 1})
+        await asyncio.sleep(0.03)
+
+        (batch,) = TestBatching._batched(server, alpha)
+        assert [(packet["type"], packet["payload"]) for packet in batch] == [
+            ("data_send", {"reply": 1}),
+            ("data_sendok", {"upto": 1}),
+        ]
+        assert server._health_payload()["acks"]["piggybacked"] == 1
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_legacy_peer_acks_keep_sid_continuity(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.data_packet.recv_data", lambda *args: None)
+        peers = TestFragmentRelay._log_in(server, alpha=[], beta=self.CAPABILITIES)
+        # A legacy peer allocates a sid for its own acks and keeps them in history
+        server.data_packet.add_recv_packet(
+            "alpha", Packet(PacketType.DATA_SENDOK, 2, ("-----", "system"), ("alpha", "system")).dump()
+        )
+        await server.data_packet.parse_msg(
+            Packet(PacketType.DATA_SEND, 3, ("-----", "demo"), ("alpha", "demo"), {"n": 3}).dump(),
+            peers["alpha"],
+        )
+        await server.data_packet.parse_msg(
+            Packet(PacketType.DATA_SEND, 2, ("-----", "demo"), ("beta", "demo"), {"n": 2}).dump(),
+            peers["beta"],
+        )
+        for server_id in peers:
+            await server.send_data_to_other_server("-----", "demo", server_id, "demo", {"reply": 1})
+        await asyncio.sleep(0.03)
+
+        alpha = {packet["type"]: packet["sid"] for packet in TestFragmentRelay._received(server, peers["alpha"], "alpha")}
+        beta = {packet["type"]: packet["sid"] for packet in TestFragmentRelay._received(server, peers["beta"], "beta")}
+        assert alpha == {"data_sendok": 4, "data_send": 5}
+        assert [packet["sid"] for packet in server.data_packet.get_history_packet("alpha", 0)] == [4, 5]
+        assert beta["data_send"] == 3
+        assert [packet["sid"] for packet in server.data_packet.get_history_packet("beta", 0)] == [3]
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_cumulative_ack_spares_nacked_packets(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=self.CAPABILITIES)["alpha"]
+        for index in range(3):
+            await server.send_data_to_other_server("-----", "demo", "alpha", "demo", {"n": index})
+        first, second, third = [sid for sid, _ in server.send_windows["alpha"].unacked()]
+
+        await server.data_packet._handle_data_error(TestSendWindow._reply(PacketType.DATA_ERROR, second), alpha)
+        await server.data_packet._handle_data_sendok(
+            Packet(PacketType.DATA_SENDOK, 0, ("-----", "system"), ("alpha", "system"), {"upto": third})
+        )
+
+        assert [sid for sid, _ in server.send_windows["alpha"].unacked()] == [second]
+        assert (("alpha", first) not in server.retransmit) and (("alpha", second) in server.retransmit)
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestDuplicateSuppression:
+    @staticmethod
+    def _data_send(sid: int, to: str = "-----") -> dict:
+        return Packet(PacketType.DATA_SEND, sid, (to, "demo"), ("alpha", "demo"), {"n": sid}).dump()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_is_acked_without_redelivery(self, server: WebsocketServer, monkeypatch):
+        delivered = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data", lambda *args: delivered.append(args[2])
+        )
+        alpha = TestFragmentRelay._log_in(server, alpha=["send_window_v1"])["alpha"]
+
+        for sid in (1, 2, 1):
+            await server.data_packet.parse_msg(self._data_send(sid), alpha)
+        await asyncio.sleep(0.01)
+
+        assert delivered == [{"n": 1}, {"n": 2}]
+        acks = TestFragmentRelay._received(server, alpha, "alpha")
+        assert [packet["payload"] for packet in acks] == [{"sid": 1}, {"sid": 2}, {"sid": 1}]
+        assert server._health_payload()["duplicates"]["duplicates"] == 1
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_is_not_relayed(self, server: WebsocketServer):
+        peers = TestFragmentRelay._log_in(server, alpha=[], beta=[])
+
+        for _ in range(2):
+            await server.data_packet.parse_msg(self._data_send(7, to="beta"), peers["alpha"])
+        await asyncio.sleep(0.01)
+
+        relayed = TestFragmentRelay._received(server, peers["beta"], "beta")
+        assert [packet["payload"] for packet in relayed] == [{"n": 7}]
+        assert len(TestFragmentRelay._received(server, peers["alpha"], "alpha")) == 2
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_corrupted_packet_is_delivered_when_resent(self, server: WebsocketServer, monkeypatch):
+        delivered = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data", lambda *args: delivered.append(args[2])
+        )
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+        packet = self._data_send(3)
+
+        await server.data_packet.parse_msg({**packet, "checksum": "bad"}, alpha)
+        await server.data_packet.parse_msg(packet, alpha)
+        await asyncio.sleep(0.01)
+
+        assert delivered == [{"n": 3}]
+        types = [packet["type"] for packet in TestFragmentRelay._received(server, alpha, "alpha")]
+        assert types == ["data_error", "data_sendok"]
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_window_is_dropped_with_connection(self, server: WebsocketServer, monkeypatch):
+        delivered = []
+        monkeypatch.setattr(
+            "connect_core.websockets.data_packet.recv_data", lambda *args: delivered.append(args[2])
+        )
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+
+        await server.data_packet.parse_msg(self._data_send(1), alpha)
+        server.data_packet.del_server_id("alpha")
+        await server.data_packet.parse_msg(self._data_send(1), alpha)
+
+        assert delivered == [{"n": 1}, {"n": 1}]
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestResync:
+    @staticmethod
+    def _ping(server: WebsocketServer, sid: int) -> dict:
+        return Packet(PacketType.PING, sid, ("-----", "system"), ("alpha", "system"), None).dump()
+
+    @staticmethod
+    def _queue_history(server: WebsocketServer, count: int) -> None:
+        for index in range(count):
+            server.data_packet.get_data_packet(
+                PacketType.DATA_SEND, ("alpha", "demo"), ("-----", "demo"), {"n": index}
+            )
+
+    @pytest.mark.asyncio
+    async def test_replay_is_batched(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=["binary_envelope", "batch_v1"])["alpha"]
+        server.data_packet.resync.batch_size = 2
+        self._queue_history(server, 5)
+
+        await server.data_packet.parse_msg(self._ping(server, 1), alpha)
+        await asyncio.sleep(0.01)
+
+        # the pong travels on the control lane and may overtake the replay
+        frames = TestBatching._batched(server, alpha)
+        (pong,) = [frame for frame in frames if isinstance(frame, dict) and frame["type"] == "pong"]
+        replayed = [frame for frame in frames if frame is not pong]
+        assert [len(frame) if isinstance(frame, list) else 1 for frame in replayed] == [2, 2, 1]
+        assert [packet["payload"]["n"] for batch in replayed[:2] for packet in batch] == [0, 1, 2, 3]
+        assert pong["sid"] == 6 and pong["payload"] is None
+        assert server._health_payload()["resync"]["frames"] == 3
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_far_behind_peer_gets_gap_marker(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+        server.data_packet.resync.max_packets = 2
+        self._queue_history(server, 3)
+
+        await server.data_packet.parse_msg(self._ping(server, 1), alpha)
+        await asyncio.sleep(0.01)
+
+        (pong,) = TestFragmentRelay._received(server, alpha, "alpha")
+        assert pong["type"] == "pong"
+        assert pong["payload"] == {"gap": {"from": 2, "to": 4}}
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_packets_are_not_replayed(self, server: WebsocketServer):
+        alpha = TestFragmentRelay._log_in(server, alpha=[])["alpha"]
+        server.data_packet.resync.ttls["new_login"] = 0.0
+        server.data_packet.get_data_packet(
+            PacketType.NEW_LOGIN, ("alpha", "system"), ("-----", "system"), {"server_id": "beta"}
+        )
+        self._queue_history(server, 1)
+
+        await server.data_packet.parse_msg(self._ping(server, 1), alpha)
+        await asyncio.sleep(0.01)
+
+        received = {packet["type"]: packet for packet in TestFragmentRelay._received(server, alpha, "alpha")}
+        assert received.keys() == {"data_send", "pong"}
+        assert received["pong"]["payload"] == {"gap": {"from": 2, "to": 2}}
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+
+class TestCloseConnection:
+    class _Peer(_FakeWebSocket):
+        def __init__(self, frames: list[str]) -> None:
+            super().__init__()
+            self.frames = frames
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for frame in self.frames:
+                yield frame
+
+    @staticmethod
+    def _count_rotations(server: WebsocketServer, monkeypatch: pytest.MonkeyPatch) -> list[int]:
+        rotations: list[int] = []
+        rotate = server._rotate_group_key
+
+        async def _rotate_group_key() -> None:
+            rotations.append(1)
+            await rotate()
+
+        monkeypatch.setattr(server, "_rotate_group_key", _rotate_group_key)
+        return rotations
+
+    @pytest.mark.asyncio
+    async def test_bad_frame_tears_down_once(self, server: WebsocketServer, monkeypatch):
+        monkeypatch.setattr("connect_core.websockets.server.del_connect", lambda server_id: None)
+        rotations = self._count_rotations(server, monkeypatch)
+        beta = TestFragmentRelay._log_in(server, beta=["group_key_v1"])["beta"]
+        alpha = self._Peer([json.dumps({"account": "alpha", "data": "not a token"})])
+        server.websockets["alpha"] = alpha  # type: ignore[assignment]
+        server.servers_info["alpha"] = {"capabilities": ["group_key_v1"]}
+
+        await server._handler(alpha)  # type: ignore[arg-type]
+        await asyncio.sleep(0.01)
+
+        assert "alpha" not in server.websockets
+        assert rotations == [1]
+        received = TestFragmentRelay._received(server, beta, "beta")
+        assert [packet["type"] for packet in received].count("del_login") == 1
+        for queue in list(server.outbound.values()):
+            await queue.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_socket_keeps_reconnected_peer(self, server: WebsocketServer, monkeypatch):
+        rotations = self._count_rotations(server, monkeypatch)
+        peers = TestFragmentRelay._log_in(server, alpha=["group_key_v1"], beta=["group_key_v1"])
+
+        await server._close_connection("alpha", _FakeWebSocket())  # type: ignore[arg-type]
+        await asyncio.sleep(0.01)
+
+        assert server.websockets["alpha"] is peers["alpha"]
+        assert server.servers_info["alpha"] == {"capabilities": ["group_key_v1"]}
+        assert rotations == []
+        assert peers["beta"].sent == []